@@ -5,6 +5,8 @@ from sklearn.ensemble import IsolationForest
 from sklearn.metrics import mean_squared_error, r2_score
 import os
 from dotenv import load_dotenv
+from llm_cache import cached_completion
+from llm_client import get_llm_client, CircuitOpenError
 
 # Feature engineering: add rolling average and percent change
 def add_features(df):
@@ -46,24 +48,23 @@ def train_anomaly_detector(X, contamination=0.05):
 def predict_anomalies(model, X):
     return model.predict(X) == -1 
 
-# GPT summary integration
-try:
-    import openai
-except ImportError:
-    openai = None
+def anomaly_scores(model, X):
+    """Isolation Forest anomaly score (higher means more anomalous)."""
+    return -model.decision_function(X)
+
+# GPT summary integration (shared client with rate limits and a circuit breaker, see llm_client.py)
+load_dotenv()
 
 def gpt_summary(prompt_text):
-    load_dotenv()
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key or not openai:
+    client = get_llm_client()
+    if client is None:
         return generate_mock_summary_text(prompt_text)
-    openai.api_key = api_key
+    messages = [{"role": "user", "content": prompt_text}]
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt_text}]
-        )
-        return response.choices[0].message.content
+        # Identical prompts are answered from the persistent cache (see llm_cache.py)
+        return cached_completion("gpt-4", messages, {}, lambda: client.chat("gpt-4", messages))
+    except CircuitOpenError:
+        return generate_mock_summary_text(prompt_text)
     except Exception as e:
         return f"[GPT ERROR] {str(e)}\n" + generate_mock_summary_text(prompt_text)
 
@@ -0,0 +1,163 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Any, Optional, List
+
+from results_store import CO2_COL, severity_for_deviation, anomaly_mask
+from serialization import frame_to_records, dumps, loads
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Per-submission anomaly index.
+# The pipeline writes anomalies_{submission_id}.json holding only the anomalous rows
+# in a compact columnar form, so the paginated anomalies API never rescans the
+# full output file.
+
+INDEX_COLUMNS = [
+    'row', 'facility', 'facility_id', 'unit', 'sector', 'year', 'emission_value',
+    'predicted', 'deviation', 'severity', 'score', 'explanation'
+]
+SORT_FIELDS = ('row', 'facility', 'year', 'emission_value', 'deviation', 'abs_deviation', 'score')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+CACHE_SIZE = 32
+
+# Source columns of the flagged output, by index column
+_SOURCE_COLUMNS = {
+    'facility': 'Facility Name',
+    'facility_id': 'Facility Id',
+    'unit': 'Unit Name',
+    'sector': 'Industry Type (sectors)',
+    'emission_value': CO2_COL,
+    'predicted': 'Predicted CO2',
+    'deviation': 'Deviation (%)',
+    'score': 'Anomaly Score',
+    'explanation': 'Anomaly Explanation',
+}
+_NUMERIC = ('year', 'emission_value', 'predicted', 'deviation', 'score')
+
+
+def anomaly_index_name(submission_id) -> str:
+    return f'anomalies_{submission_id}.json'
+
+
+def build_anomaly_index(df: 'pd.DataFrame', submission_id) -> Dict[str, Any]:
+    """Extract the anomalous rows of a flagged output into an index document"""
+    import numpy as np
+    import pandas as pd
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+    mask = anomaly_mask(df)
+    anom = df.loc[mask]
+    positions = np.flatnonzero(mask.to_numpy())
+
+    index = pd.DataFrame({'row': positions}, index=anom.index)
+    for col, source in _SOURCE_COLUMNS.items():
+        index[col] = anom[source] if source in anom.columns else None
+    index['year'] = pd.to_numeric(anom['Reporting Year'], errors='coerce') if 'Reporting Year' in anom.columns else np.nan
+    for col in _NUMERIC:
+        index[col] = pd.to_numeric(index[col], errors='coerce')
+    index['severity'] = severity_for_deviation(index['deviation'])
+    index['year'] = index['year'].astype('Int64')
+    index = index[INDEX_COLUMNS]
+
+    return {
+        "submission_id": str(submission_id),
+        "total_records": int(len(df)),
+        "columns": INDEX_COLUMNS,
+        "rows": [list(r.values()) for r in frame_to_records(index)]
+    }
+
+
+def write_anomaly_index(index: Dict[str, Any], path: str) -> None:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(dumps(index))
+    os.replace(tmp_path, path)
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def load_anomaly_index(path: str) -> List[Dict[str, Any]]:
+    """Load an index as a list of row dicts, cached by path and modification time"""
+    key = (path, os.stat(path).st_mtime_ns)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    with open(path, 'rb') as f:
+        index = loads(f.read())
+    columns = index["columns"]
+    rows = [dict(zip(columns, r)) for r in index["rows"]]
+    with _cache_lock:
+        _cache[key] = rows
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return rows
+
+
+def _sort_value(row: Dict[str, Any], field: str):
+    if field == 'abs_deviation':
+        return abs(row['deviation']) if row['deviation'] is not None else None
+    return row[field]
+
+
+def query_anomaly_index(rows: List[Dict[str, Any]], facility: Optional[str] = None,
+                        year: Optional[int] = None, year_from: Optional[int] = None,
+                        year_to: Optional[int] = None, severity: Optional[List[str]] = None,
+                        min_deviation: Optional[float] = None, max_deviation: Optional[float] = None,
+                        min_abs_deviation: Optional[float] = None, sort: str = 'row',
+                        order: str = 'asc', cursor: Optional[str] = None,
+                        limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """Filter, sort and page an anomaly index.
+
+    The cursor is the opaque offset returned as ``next_cursor`` by the previous page;
+    indexes are immutable once written, so offsets are stable between page fetches.
+    """
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"Unsupported sort field '{sort}'. Use one of: {', '.join(SORT_FIELDS)}")
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    matched = rows
+    if facility:
+        needle = facility.lower()
+        matched = [r for r in matched if needle in str(r['facility'] or '').lower() or str(r['facility_id']) == facility]
+    if year is not None:
+        matched = [r for r in matched if r['year'] == year]
+    if year_from is not None:
+        matched = [r for r in matched if r['year'] is not None and r['year'] >= year_from]
+    if year_to is not None:
+        matched = [r for r in matched if r['year'] is not None and r['year'] <= year_to]
+    if severity:
+        wanted = {s.strip().capitalize() for s in severity}
+        matched = [r for r in matched if r['severity'] in wanted]
+    if min_deviation is not None:
+        matched = [r for r in matched if r['deviation'] is not None and r['deviation'] >= min_deviation]
+    if max_deviation is not None:
+        matched = [r for r in matched if r['deviation'] is not None and r['deviation'] <= max_deviation]
+    if min_abs_deviation is not None:
+        matched = [r for r in matched if r['deviation'] is not None and abs(r['deviation']) >= min_abs_deviation]
+
+    if sort != 'row' or order == 'desc':
+        # Missing values always sort last
+        present = [r for r in matched if _sort_value(r, sort) is not None]
+        missing = [r for r in matched if _sort_value(r, sort) is None]
+        present.sort(key=lambda r: _sort_value(r, sort), reverse=(order == 'desc'))
+        matched = present + missing
+
+    page = matched[offset:offset + limit]
+    next_offset = offset + len(page)
+    return {
+        "total": len(matched),
+        "items": page,
+        "next_cursor": str(next_offset) if next_offset < len(matched) else None
+    }
@@ -0,0 +1,183 @@
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+
+from results_store import CO2_COL, anomaly_mask, severity_for_deviation
+from facility_store import text_column
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Detected anomalies of every submission, served by /api/anomalies.
+# The pipeline replaces a submission's rows in one executemany transaction; the
+# list endpoint pages newest-first with keyset pagination on id.
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Columns added to the original anomalies table (title, severity, description, status, created_at)
+ADDED_COLUMNS = {
+    'submission_id': 'INTEGER',
+    'facility': 'TEXT',
+    'facility_id': 'TEXT',
+    'year': 'INTEGER',
+    'emission_value': 'REAL',
+    'predicted': 'REAL',
+    'deviation': 'REAL',
+    'score': 'REAL',
+}
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_anomalies_submission ON anomalies (submission_id, severity, year)',
+    'CREATE INDEX IF NOT EXISTS idx_anomalies_severity ON anomalies (severity, id)',
+]
+
+# Placeholder rows inserted by earlier versions of init_db()
+SAMPLE_TITLES = (
+    'Unusual Traffic Pattern', 'System Resource Spike', 'Authentication Failure', 'Database Query Anomaly'
+)
+
+_INSERT_COLUMNS = [
+    'submission_id', 'title', 'severity', 'description', 'facility', 'facility_id', 'year',
+    'emission_value', 'predicted', 'deviation', 'score'
+]
+
+
+def init_anomaly_store(conn) -> None:
+    """Add the per-submission columns and indexes to the anomalies table and drop the old sample rows"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(anomalies)')}
+    for column, column_type in ADDED_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f'ALTER TABLE anomalies ADD COLUMN {column} {column_type}')
+    for statement in INDEXES:
+        conn.execute(statement)
+    conn.execute(
+        f"DELETE FROM anomalies WHERE submission_id IS NULL AND title IN ({', '.join('?' for _ in SAMPLE_TITLES)})",
+        SAMPLE_TITLES
+    )
+    conn.commit()
+
+
+def _column(df: 'pd.DataFrame', name: str, numeric: bool = False) -> 'pd.Series':
+    import numpy as np
+    import pandas as pd
+    if name not in df.columns:
+        return pd.Series(np.nan if numeric else None, index=df.index)
+    return pd.to_numeric(df[name], errors='coerce') if numeric else df[name]
+
+
+def _anomaly_rows(df: 'pd.DataFrame', submission_id) -> List[tuple]:
+    """Insert tuples for the anomalous rows of a flagged output, built column-wise"""
+    import pandas as pd
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+    anom = df.loc[anomaly_mask(df)]
+    if anom.empty:
+        return []
+    facility_id = text_column(_column(anom, 'Facility Id'))
+    names = text_column(_column(anom, 'Facility Name'))
+    facility = names.where(names.notna(), facility_id)
+    year = _column(anom, 'Reporting Year', numeric=True).astype('Int64')
+    emission = _column(anom, CO2_COL, numeric=True)
+    deviation = _column(anom, 'Deviation (%)', numeric=True)
+    explanation = _column(anom, 'Anomaly Explanation')
+    rows = pd.DataFrame({
+        'submission_id': int(submission_id),
+        'title': 'Emission anomaly at ' + facility.fillna('unknown facility').astype(str),
+        'severity': severity_for_deviation(deviation),
+        'description': explanation.where(explanation.notna() & (explanation.astype(str) != ''),
+                                         'CO2 emissions deviate from the predicted value'),
+        'facility': facility,
+        'facility_id': facility_id,
+        'year': year,
+        'emission_value': emission,
+        'predicted': _column(anom, 'Predicted CO2', numeric=True),
+        'deviation': deviation,
+        'score': _column(anom, 'Anomaly Score', numeric=True),
+    }, index=anom.index)[_INSERT_COLUMNS]
+    rows = rows.astype(object).where(rows.notna(), None)
+    return list(rows.itertuples(index=False, name=None))
+
+
+def record_anomalies(conn, submission_id, df: 'pd.DataFrame') -> int:
+    """Replace a submission's anomalies in a single transaction"""
+    rows = _anomaly_rows(df, submission_id)
+    with conn:
+        conn.execute('DELETE FROM anomalies WHERE submission_id = ?', (int(submission_id),))
+        conn.executemany(
+            f"INSERT INTO anomalies ({', '.join(_INSERT_COLUMNS)}) VALUES ({', '.join('?' for _ in _INSERT_COLUMNS)})",
+            rows
+        )
+    return len(rows)
+
+
+def anomaly_record(row) -> Dict[str, Any]:
+    """API representation of an anomalies table row"""
+    return {
+        "id": row['id'],
+        "title": row['title'],
+        "severity": row['severity'],
+        "timestamp": row['created_at'],
+        "description": row['description'],
+        "status": row['status'],
+        "submission_id": row['submission_id'],
+        "facility": row['facility'],
+        "facility_id": row['facility_id'],
+        "year": row['year'],
+        "emission_value": row['emission_value'],
+        "predicted": row['predicted'],
+        "deviation": row['deviation'],
+        "score": row['score']
+    }
+
+
+def list_anomalies(conn, submission_id: Optional[int] = None, severity: Optional[List[str]] = None,
+                   year_from: Optional[int] = None, year_to: Optional[int] = None,
+                   status: Optional[str] = None, facility: Optional[str] = None,
+                   cursor: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Newest-first page of anomalies; returns (records, next_cursor) with keyset pagination on id"""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    where = []
+    params = []
+    if submission_id is not None:
+        where.append('submission_id = ?')
+        params.append(submission_id)
+    # Stored as "High"/"Medium"/"Low"; accept any case like the per-submission index
+    severity = [s.strip().capitalize() for s in severity or [] if s.strip()]
+    if severity:
+        where.append(f"severity IN ({', '.join('?' for _ in severity)})")
+        params.extend(severity)
+    if year_from is not None:
+        where.append('year >= ?')
+        params.append(year_from)
+    if year_to is not None:
+        where.append('year <= ?')
+        params.append(year_to)
+    if status:
+        where.append('status = ?')
+        params.append(status)
+    if facility:
+        where.append('(facility = ? OR facility_id = ?)')
+        params.extend([facility, facility])
+    if cursor is not None:
+        where.append('id < ?')
+        params.append(cursor)
+    sql = 'SELECT * FROM anomalies'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY id DESC LIMIT ?'
+    rows = conn.execute(sql, params + [limit + 1]).fetchall()
+    next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+    return [anomaly_record(row) for row in rows[:limit]], next_cursor
+
+
+def severity_counts(conn, submission_id: Optional[int] = None) -> Dict[str, int]:
+    """Number of anomalies per severity, so paged clients can show totals"""
+    sql = 'SELECT severity, COUNT(*) FROM anomalies'
+    params = []
+    if submission_id is not None:
+        sql += ' WHERE submission_id = ?'
+        params.append(submission_id)
+    counts = {severity: 0 for severity in ('High', 'Medium', 'Low')}
+    for severity, count in conn.execute(sql + ' GROUP BY severity', params):
+        counts[severity] = count
+    return counts
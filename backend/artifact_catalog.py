@@ -0,0 +1,129 @@
+import os
+import re
+import hashlib
+from datetime import datetime
+from typing import Dict, Optional
+
+
+# Catalog of generated artifacts.
+# Pipeline scripts register every file they write (submission, type, size, checksum,
+# created time) through manifest.record_artifacts, so /api/reports/list is served
+# from an indexed table instead of listing and stat-ing the deliverables directories
+# on every request.
+
+ARTIFACT_TYPES = ('tables', 'logs', 'plots')
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS artifacts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        submission_id INTEGER,
+        type TEXT NOT NULL,
+        name TEXT NOT NULL,
+        path TEXT NOT NULL UNIQUE,
+        size INTEGER NOT NULL,
+        checksum TEXT NOT NULL,
+        created_at TIMESTAMP NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_artifacts_type ON artifacts (type, id)',
+    'CREATE INDEX IF NOT EXISTS idx_artifacts_submission ON artifacts (submission_id, id)',
+]
+
+_SUBMISSION_SUFFIX = re.compile(r'_(\d+)\.[^.]+$')
+
+
+def init_artifact_catalog(conn) -> None:
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+
+def file_checksum(path: str) -> str:
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_type(path: str) -> str:
+    """Artifact type from the deliverables subdirectory a file lives in"""
+    rtype = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    if rtype not in ARTIFACT_TYPES:
+        raise ValueError(f"{path} is not inside a deliverables/tables, logs or plots directory")
+    return rtype
+
+
+def register_artifact(conn, path: str, submission_id=None, checksum: Optional[str] = None) -> None:
+    """Insert or refresh the catalog entry of one artifact (caller commits)"""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    conn.execute('''
+        INSERT INTO artifacts (submission_id, type, name, path, size, checksum, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(path) DO UPDATE SET
+            submission_id = excluded.submission_id,
+            size = excluded.size,
+            checksum = excluded.checksum,
+            created_at = excluded.created_at
+    ''', (
+        int(submission_id) if submission_id not in (None, '') else None,
+        artifact_type(path),
+        os.path.basename(path),
+        path,
+        st.st_size,
+        checksum or file_checksum(path),
+        datetime.fromtimestamp(st.st_mtime).isoformat()
+    ))
+
+
+def sync_from_disk(conn, base_dirs: Dict[str, str]) -> int:
+    """Backfill the catalog from existing deliverables (used once, when the catalog is empty)"""
+    count = 0
+    with conn:
+        for rtype, dir_path in base_dirs.items():
+            if not os.path.isdir(dir_path):
+                continue
+            for entry in os.scandir(dir_path):
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                match = _SUBMISSION_SUFFIX.search(entry.name)
+                register_artifact(conn, entry.path, match.group(1) if match else None)
+                count += 1
+    return count
+
+
+def catalog_is_empty(conn) -> bool:
+    return conn.execute('SELECT 1 FROM artifacts LIMIT 1').fetchone() is None
+
+
+def list_artifacts(conn, rtype: Optional[str] = None, submission_id: Optional[int] = None,
+                   name: Optional[str] = None, cursor: Optional[int] = None,
+                   limit: int = DEFAULT_PAGE_SIZE):
+    """Newest-first page of artifacts; returns (rows, next_cursor) with keyset pagination on id"""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    where = []
+    params = []
+    if rtype:
+        where.append('type = ?')
+        params.append(rtype)
+    if submission_id is not None:
+        where.append('submission_id = ?')
+        params.append(submission_id)
+    if name:
+        where.append('name LIKE ?')
+        params.append(f'%{name}%')
+    if cursor is not None:
+        where.append('id < ?')
+        params.append(cursor)
+    sql = 'SELECT id, submission_id, type, name, size, checksum, created_at FROM artifacts'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY id DESC LIMIT ?'
+    rows = [dict(row) for row in conn.execute(sql, params + [limit + 1]).fetchall()]
+    next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+    return rows[:limit], next_cursor
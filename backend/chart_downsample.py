@@ -0,0 +1,117 @@
+import os
+from typing import TYPE_CHECKING, Dict, Any, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Server-side downsampling of the emissions chart series.
+# Large submissions are reduced to a bounded number of points with
+# largest-triangle-three-buckets (LTTB) or per-bucket min/max, so the chart keeps
+# its shape and peaks instead of showing an arbitrary leading slice.
+
+CHART_POINTS = int(os.environ.get('CHART_POINTS', 500))
+CHART_METHOD = os.environ.get('CHART_METHOD', 'lttb')
+METHODS = ('lttb', 'minmax')
+
+
+def lttb_indices(y: 'np.ndarray', n_out: int) -> 'np.ndarray':
+    """Indices selected by largest-triangle-three-buckets (x is the row position)"""
+    import numpy as np
+    n = len(y)
+    n_out = max(n_out, 3)
+    if n <= n_out:
+        return np.arange(n)
+    x = np.arange(n, dtype=float)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    # Bucket edges over the interior points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        next_end = max(next_end, next_start + 1)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: 'np.ndarray', n_out: int) -> 'np.ndarray':
+    """Indices of the minimum and maximum of each bucket (two points per bucket)"""
+    import numpy as np
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    if n <= n_out:
+        return np.arange(n)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    picks = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        bucket = y[start:end]
+        picks.append(start + int(bucket.argmin()))
+        picks.append(start + int(bucket.argmax()))
+    return np.unique(np.array(picks, dtype=np.int64))
+
+
+def yearly_aggregates(years: 'pd.Series', values: 'pd.Series', anomalies: Optional['pd.Series'] = None) -> Dict[str, Any]:
+    """Per-year totals, means, extremes and anomaly counts"""
+    import pandas as pd
+    frame = pd.DataFrame({'year': years, 'value': values})
+    frame['anomaly'] = anomalies.astype(bool).to_numpy() if anomalies is not None else False
+    grouped = frame.dropna(subset=['year']).groupby('year')
+    agg = grouped['value'].agg(['sum', 'mean', 'min', 'max', 'count'])
+    agg['anomalies'] = grouped['anomaly'].sum()
+    agg = agg.astype(object).where(agg.notna(), None)
+    return {
+        "years": [int(y) if float(y).is_integer() else y for y in agg.index],
+        "total": agg['sum'].tolist(),
+        "mean": agg['mean'].tolist(),
+        "min": agg['min'].tolist(),
+        "max": agg['max'].tolist(),
+        "count": [int(c) for c in agg['count']],
+        "anomalies": [int(c) for c in agg['anomalies']]
+    }
+
+
+def downsample_series(years: 'pd.Series', values: 'pd.Series', anomalies: Optional['pd.Series'] = None,
+                      points: int = CHART_POINTS, method: str = CHART_METHOD) -> Dict[str, Any]:
+    """Downsample a per-row emissions series while keeping anomaly rows visible.
+
+    Anomalous rows are always kept; when there are more of them than a quarter of the
+    point budget, the largest emissions among them are kept.
+    """
+    import numpy as np
+    import pandas as pd
+    if method not in METHODS:
+        raise ValueError(f"Unsupported chart downsampling method '{method}'. Use one of: {', '.join(METHODS)}")
+    values = pd.to_numeric(values, errors='coerce').reset_index(drop=True)
+    years = pd.to_numeric(years, errors='coerce').reset_index(drop=True)
+    anomaly_flags = (anomalies.reset_index(drop=True) == True) if anomalies is not None else pd.Series(False, index=values.index)
+
+    valid = np.flatnonzero(values.notna().to_numpy())
+    y = values.to_numpy(dtype=float)[valid]
+    anomaly_positions = np.flatnonzero(anomaly_flags.to_numpy()[valid])
+    anomaly_budget = max(points // 4, 1)
+    if len(anomaly_positions) > anomaly_budget:
+        anomaly_positions = anomaly_positions[np.argsort(y[anomaly_positions])[-anomaly_budget:]]
+
+    base_points = max(points - len(anomaly_positions), 3)
+    base = lttb_indices(y, base_points) if method == 'lttb' else minmax_indices(y, base_points)
+    keep = valid[np.union1d(base, anomaly_positions)]
+
+    labels = years.iloc[keep]
+    return {
+        "labels": [int(v) if pd.notna(v) and float(v).is_integer() else (None if pd.isna(v) else float(v)) for v in labels],
+        "emissions": values.iloc[keep].tolist(),
+        "anomaly_indices": np.flatnonzero(anomaly_flags.iloc[keep].to_numpy()).tolist(),
+        "row_indices": keep.tolist(),
+        "method": method,
+        "source_points": int(len(values))
+    }
@@ -1,102 +1,105 @@
 import os
-import json
-from typing import Dict, Any, List, Optional
-from datetime import datetime
-import openai
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, Optional
 from dotenv import load_dotenv
+from llm_cache import cached_completion
+from llm_client import get_llm_client
+from prompt_digest import digest_from_records, render_digest
 
 # Load environment variables
 load_dotenv()
 
+# Summary generation limits: each OpenAI request times out after SUMMARY_REQUEST_TIMEOUT
+# seconds, and generate_summary returns the template fallback for whatever part is not
+# ready after SUMMARY_DEADLINE seconds
+SUMMARY_REQUEST_TIMEOUT = float(os.getenv('SUMMARY_REQUEST_TIMEOUT', 20))
+SUMMARY_DEADLINE = float(os.getenv('SUMMARY_DEADLINE', 25))
+SUMMARY_WORKERS = int(os.getenv('SUMMARY_WORKERS', 8))
+# Token budget of the data digest in the dashboard-card prompt (the full prompt uses PROMPT_TOKEN_BUDGET)
+SHORT_DIGEST_TOKENS = int(os.getenv('SHORT_DIGEST_TOKENS', 120))
+
+FULL_SYSTEM_PROMPT = "You are an expert energy data analyst specializing in emissions monitoring and anomaly detection. Generate clear, professional, and actionable summaries for energy data analysis reports."
+SHORT_SYSTEM_PROMPT = "You are an expert energy data analyst. Write a concise, business-friendly summary for a dashboard card."
+
 class ChatGPTSummaryGenerator:
+    # Shared by all generators so the full and short requests run side by side
+    _executor = ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix='summary')
+
     def __init__(self):
         """Initialize ChatGPT summary generator with OpenAI API key"""
-        print(f"[DEBUG] Initializing ChatGPTSummaryGenerator")
-        self.api_key = os.getenv('OPEN_AI_KEY')
-        print(f"[DEBUG] API key found: {'Yes' if self.api_key else 'No'}")
-        if not self.api_key:
-            raise ValueError("OPEN_AI_KEY not found in environment variables")
-        
-        # Configure OpenAI client
-        print(f"[DEBUG] Creating OpenAI client")
-        self.client = openai.OpenAI(api_key=self.api_key)
-        self.model = "gpt-4.1-nano"  # Using gpt-4o-mini as it's a valid model
-        print(f"[DEBUG] OpenAI client created successfully, model: {self.model}")
+        # Shared client: connection reuse, concurrency/rate limits, retries and circuit breaker
+        self.client = get_llm_client()
+        if self.client is None:
+            raise ValueError("OPEN_AI_KEY not found in environment variables or openai is not installed")
+        self.model = "gpt-4.1-nano"
+
+    def _complete(self, system_prompt: str, prompt: str, max_tokens: int, temperature: float) -> str:
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        params = {"max_tokens": max_tokens, "temperature": temperature}
+
+        # Prompts are fully determined by the anomaly statistics, so repeats come from the cache
+        return cached_completion(self.model, messages, params, lambda: self.client.chat(
+            self.model, messages, timeout=SUMMARY_REQUEST_TIMEOUT, **params
+        ))
         
-    def generate_summary(self, analysis_results: Dict[str, Any]) -> dict:
-        """Generate both a full and concise summary using ChatGPT"""
-        print(f"[DEBUG] ChatGPTSummaryGenerator.generate_summary called with: {analysis_results}")
+    def generate_summary(self, analysis_results: Dict[str, Any], deadline: Optional[float] = None) -> dict:
+        """Generate both a full and concise summary using ChatGPT.
+
+        The two requests run concurrently. Any part that fails or is not ready by the
+        deadline is replaced by the template summary, and "fallback" is set in the result.
+        """
+        deadline = SUMMARY_DEADLINE if deadline is None else deadline
         anomalies_found = analysis_results.get('anomalies_found', 0)
         total_records = analysis_results.get('total_records', 0)
         processing_time = analysis_results.get('processing_time', 0)
         anomalies_data = analysis_results.get('anomalies_data', [])
-        print(f"[DEBUG] Extracted data - anomalies_found: {anomalies_found}, total_records: {total_records}, processing_time: {processing_time}")
-        print(f"[DEBUG] Anomalies data length: {len(anomalies_data)}")
         anomaly_rate = (anomalies_found / total_records * 100) if total_records > 0 else 0
-        print(f"[DEBUG] Calculated anomaly_rate: {anomaly_rate}")
+        # Ground the prompts in the pipeline's data digest (older results only have the anomaly list)
+        digest = analysis_results.get('digest') or digest_from_records(anomalies_data, total_records)
         # Prepare the prompt for ChatGPT (full summary)
-        prompt = self._create_prompt(anomalies_found, total_records, anomaly_rate, processing_time, anomalies_data)
-        print(f"[DEBUG] Created prompt, length: {len(prompt)}")
+        prompt = self._create_prompt(anomalies_found, total_records, anomaly_rate, processing_time, render_digest(digest))
         # Prepare the prompt for concise summary
-        short_prompt = f"In 1-2 sentences, summarize the key findings of this energy data analysis: {anomalies_found} anomalies found out of {total_records} records (anomaly rate: {anomaly_rate:.2f}%). Processing time: {processing_time:.2f} seconds. Focus on actionable insight."
-        try:
-            print(f"[DEBUG] Making OpenAI API call with model: {self.model}")
-            # Full summary
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert energy data analyst specializing in emissions monitoring and anomaly detection. Generate clear, professional, and actionable summaries for energy data analysis reports."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.7
-            )
-            full_summary = response.choices[0].message.content.strip()
-            print(f"[DEBUG] OpenAI API call for full summary successful, length: {len(full_summary)}")
-            # Short summary
-            response_short = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert energy data analyst. Write a concise, business-friendly summary for a dashboard card."},
-                    {"role": "user", "content": short_prompt}
-                ],
-                max_tokens=120,
-                temperature=0.5
-            )
-            short_summary = response_short.choices[0].message.content.strip()
-            print(f"[DEBUG] OpenAI API call for short summary successful, length: {len(short_summary)}")
-            return {"summary_full": full_summary, "summary_short": short_summary}
-        except Exception as e:
-            print(f"[ERROR] Error generating ChatGPT summary: {e}")
-            print(f"[DEBUG] Exception type: {type(e).__name__}")
-            import traceback
-            print(f"[DEBUG] Full traceback: {traceback.format_exc()}")
-            # Fallback to template-based summary
-            fallback_full = self._generate_fallback_summary(analysis_results)
-            fallback_short = f"Analysis completed for {total_records:,} records. {anomalies_found} anomalies detected ({anomaly_rate:.2f}%)."
-            print(f"[DEBUG] Generated fallback summaries, full length: {len(fallback_full)}, short length: {len(fallback_short)}")
-            return {"summary_full": fallback_full, "summary_short": fallback_short}
+        short_prompt = f"In 1-2 sentences, summarize the key findings of this energy data analysis: {anomalies_found} anomalies found out of {total_records} records (anomaly rate: {anomaly_rate:.2f}%). Focus on actionable insight.\n\n{render_digest(digest, SHORT_DIGEST_TOKENS)}"
+        full_future = self._executor.submit(self._complete, FULL_SYSTEM_PROMPT, prompt, 1000, 0.7)
+        short_future = self._executor.submit(self._complete, SHORT_SYSTEM_PROMPT, short_prompt, 120, 0.5)
+        wait([full_future, short_future], timeout=deadline)
+        full_summary = self._result(full_future, 'full')
+        short_summary = self._result(short_future, 'short')
+        fallback = full_summary is None or short_summary is None
+        if full_summary is None:
+            full_summary = self._generate_fallback_summary(analysis_results)
+        if short_summary is None:
+            short_summary = f"Analysis completed for {total_records:,} records. {anomalies_found} anomalies detected ({anomaly_rate:.2f}%)."
+        return {"summary_full": full_summary, "summary_short": short_summary, "fallback": fallback}
+
+    @staticmethod
+    def _result(future, label: str) -> Optional[str]:
+        """Result of a finished summary request, or None if it failed or missed the deadline"""
+        if not future.done():
+            future.cancel()
+            print(f"[WARNING] {label} summary missed the deadline, using template fallback")
+            return None
+        error = future.exception()
+        if error is not None:
+            print(f"[ERROR] Error generating {label} ChatGPT summary: {type(error).__name__}: {error}")
+            return None
+        return future.result()
+
+    async def generate_summary_async(self, analysis_results: Dict[str, Any], deadline: Optional[float] = None) -> dict:
+        """generate_summary for async callers, without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.generate_summary, analysis_results, deadline))
     
     def _create_prompt(self, anomalies_found: int, total_records: int, 
                       anomaly_rate: float, processing_time: float, 
-                      anomalies_data: List[Dict]) -> str:
+                      data_digest: str) -> str:
         """Create a detailed prompt for ChatGPT"""
         
-        # Prepare anomaly details
-        anomaly_details = ""
-        if anomalies_data:
-            anomaly_details = "\n\n**Anomaly Details:**\n"
-            for i, anomaly in enumerate(anomalies_data[:5], 1):  # Limit to first 5
-                facility = anomaly.get('facility', 'Unknown')
-                year = anomaly.get('year', 'Unknown')
-                emission_value = anomaly.get('emission_value', 0)
-                severity = anomaly.get('severity', 'Unknown')
-                
-                anomaly_details += f"{i}. {facility} ({year}) - {emission_value:.2f} units ({severity} severity)\n"
-            
-            if len(anomalies_data) > 5:
-                anomaly_details += f"... and {len(anomalies_data) - 5} additional anomalies\n"
-        
         # Create the prompt
         prompt = f"""
 Please generate a comprehensive energy data analysis summary based on the following information:
@@ -107,7 +110,8 @@ Please generate a comprehensive energy data analysis summary based on the follow
 - Anomaly Rate: {anomaly_rate:.2f}%
 - Processing Time: {processing_time:.2f} seconds
 
-{anomaly_details}
+**Data Digest:**
+{data_digest}
 
 **Requirements:**
 1. Write a professional executive summary (2-3 sentences)
@@ -190,9 +194,9 @@ Keep the explanation clear and actionable (under 150 words).
 """
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            return self.client.chat(
+                self.model,
+                [
                     {
                         "role": "system",
                         "content": "You are an expert energy analyst. Provide clear, actionable explanations for emissions anomalies."
@@ -202,12 +206,10 @@ Keep the explanation clear and actionable (under 150 words).
                         "content": prompt
                     }
                 ],
+                timeout=SUMMARY_REQUEST_TIMEOUT,
                 max_tokens=300,
                 temperature=0.6
             )
-            
-            return response.choices[0].message.content.strip()
-            
         except Exception as e:
             print(f"Error generating anomaly explanation: {e}")
             return f"Anomaly detected at {facility} ({year}) with emission value of {emission_value:.2f} units. Severity level: {severity}. Requires investigation."
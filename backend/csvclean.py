@@ -5,6 +5,7 @@ import matplotlib.pyplot as plt
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 import numpy as np
+from manifest import record_artifacts
 
 def generate_mock_summary(df, co2_col):
     flagged = df[df['Flagged'] == 'Yes']
@@ -209,5 +210,16 @@ def main():
     df_flagged['summary'] = summary
     df_flagged.to_csv(f"deliverables/tables/final_output_with_summary{output_suffix}.csv", index=False)
 
+    record_artifacts(submission_id, {
+        'cleaned_emissions': f'deliverables/tables/cleaned_emissions_by_unit{output_suffix}.csv',
+        'plot_emissions_over_time': f'deliverables/plots/co2_emissions_over_time{output_suffix}.png',
+        'plot_emissions_by_industry': f'deliverables/plots/co2_emissions_by_industry{output_suffix}.png',
+        'plot_emissions_by_year': f'deliverables/plots/co2_emissions_by_year{output_suffix}.png',
+        'plot_methane_by_year': f'deliverables/plots/methane_emissions_by_year{output_suffix}.png',
+        'flagged_output': f'deliverables/tables/flagged_emissions_output{output_suffix}.csv',
+        'flagged_summary': f'deliverables/tables/weekly_summary{output_suffix}.txt',
+        'summary_table': f'deliverables/tables/final_output_with_summary{output_suffix}.csv',
+    })
+
 if __name__ == "__main__":
     main()
@@ -1,6 +1,7 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+from manifest import record_artifacts, require_artifact
 
 def main():
     os.makedirs('deliverables/tables', exist_ok=True)
@@ -13,10 +14,10 @@ def main():
     else:
         output_suffix = ''
     
-    # Load cleaned data with submission-specific path
-    cleaned_file = f'deliverables/tables/cleaned_emissions_by_unit{output_suffix}.csv'
-    if not os.path.exists(cleaned_file):
-        print(f"Warning: {cleaned_file} not found, trying fallback...")
+    # Load this submission's cleaned data through its manifest (no fallback to other runs' files)
+    if submission_id:
+        cleaned_file = require_artifact(submission_id, 'cleaned_emissions')
+    else:
         cleaned_file = 'deliverables/tables/cleaned_emissions_by_unit.csv'
     
     df_clean = pd.read_csv(cleaned_file)
@@ -86,5 +87,12 @@ def main():
     plt.savefig(f'deliverables/plots/methane_emissions_by_year{output_suffix}.png')
     plt.close()
 
+    record_artifacts(submission_id, {
+        'plot_emissions_over_time': f'deliverables/plots/co2_emissions_over_time{output_suffix}.png',
+        'plot_emissions_by_industry': f'deliverables/plots/co2_emissions_by_industry{output_suffix}.png',
+        'plot_emissions_by_year2': f'deliverables/plots/co2_emissions_by_year2{output_suffix}.png',
+        'plot_methane_by_year': f'deliverables/plots/methane_emissions_by_year{output_suffix}.png',
+    })
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
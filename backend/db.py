@@ -0,0 +1,93 @@
+import os
+import queue
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path as FilePath
+
+# SQLite database shared by the API and the pipeline scripts.
+# The path is made absolute here and passed to the pipeline scripts (RAYFIELD_DB),
+# so both resolve the same database file whatever their working directory.
+#
+# Connections are pooled: get_db() hands out an open connection in WAL mode with a
+# busy timeout and a statement cache, and close() returns it to the pool instead of
+# closing it. WAL lets readers proceed while an upload writes, and the busy timeout
+# makes concurrent writers wait for the lock instead of failing with "database is locked".
+
+DB_PATH = os.path.abspath(os.environ.get("RAYFIELD_DB", "rayfield.db"))
+DATABASE_URL = f"sqlite:///{DB_PATH}"
+
+POOL_SIZE = int(os.environ.get("RAYFIELD_DB_POOL_SIZE", 8))
+BUSY_TIMEOUT_MS = int(os.environ.get("RAYFIELD_DB_BUSY_TIMEOUT_MS", 10000))
+CACHED_STATEMENTS = 256
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+)
+
+_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=POOL_SIZE)
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        str(FilePath(DB_PATH)),
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=CACHED_STATEMENTS,
+        check_same_thread=False
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class PooledConnection:
+    """A pooled sqlite3 connection; close() rolls back unfinished work and returns it to the pool"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            _pool.put_nowait(conn)
+        except (sqlite3.Error, queue.Full):
+            conn.close()
+
+
+def get_db() -> PooledConnection:
+    """Connection from the pool (opened on demand); call close() to give it back"""
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _connect()
+    return PooledConnection(conn)
+
+
+@contextmanager
+def connection():
+    """Pooled connection for a block: commits on success, rolls back on error, then returns it to the pool"""
+    conn = get_db()
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
@@ -1,6 +1,7 @@
 import os
 import sys
 import pandas as pd
+from manifest import record_artifacts, require_artifact
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 
@@ -25,8 +26,9 @@ class EmissionsModel:
         if not input_csv and len(sys.argv) > 1:
             input_csv = sys.argv[1]
         if not input_csv:
-            input_csv = f"deliverables/tables/cleaned_emissions_by_unit{output_suffix}.csv"
-            if not os.path.exists(input_csv):
+            if submission_id:
+                input_csv = require_artifact(submission_id, 'cleaned_emissions')
+            else:
                 input_csv = "deliverables/tables/cleaned_emissions_by_unit.csv"
         
         print(f"[emissions_model.py] Using input file: {input_csv}")
@@ -46,6 +48,7 @@ class EmissionsModel:
         print(df[['Facility Id', 'Reporting Year', 'Unit CO2 emissions (non-biogenic)',
                   'Predicted CO2', 'Deviation (%)', 'Flagged']].head(10))
         df.to_csv(f"deliverables/tables/flagged_emissions_output{output_suffix}.csv", index=False)
+        record_artifacts(submission_id, {'flagged_output': f"deliverables/tables/flagged_emissions_output{output_suffix}.csv"})
 
 if __name__ == "__main__":
     model = EmissionsModel()
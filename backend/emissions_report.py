@@ -0,0 +1,279 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from db import connection
+from serialization import dumps, loads
+from storage import DATA_DIR, get_storage
+from manifest import ensure_manifest, resolve_artifact, require_artifact, record_artifacts
+import webhook_outbox
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Per-submission emissions workbooks, built on first request.
+# The pipeline only stores the CO2/CH4 sums per grouping (emissions_aggregates_{id}.json)
+# and queues the webhook notification for the default workbook. A workbook is rendered
+# from those aggregates when it is first downloaded (or when the webhook outbox is about
+# to post it), for the requested CH4 global warming potential and groupings, and cached
+# as emissions_report_{id}[_{params}].xlsx until the aggregates change. The default
+# workbook's GPT summary is written by the pipeline (emissions_report_summary_{id}.txt),
+# so building it for a webhook delivery never waits on the LLM. Concurrent
+# requests for the same workbook build it once. EXCEL_PREWARM=1 builds the default
+# workbook in the background when a pipeline completes. pandas is imported by the
+# functions that build frames, so importing this module (e.g. from main.py) stays cheap.
+
+DEFAULT_GWP_CH4 = 25.0
+PREWARM_ON_COMPLETE = os.environ.get("EXCEL_PREWARM", "0") == "1"
+PREWARM_WORKERS = int(os.environ.get("EXCEL_PREWARM_WORKERS", 1))
+TABLES_DIR = os.path.join(DATA_DIR, 'deliverables', 'tables')
+LOGS_DIR = os.path.join(DATA_DIR, 'deliverables', 'logs')
+SUMMARY_PLACEHOLDER = "GPT summary not generated for this report; see the summary sheets."
+
+# (column, sheet) for the optional groupings; By Facility and By Quarter are always built
+EXTRA_GROUPINGS = [
+    ('Unit Type', 'By Unit Type'),
+    ('Unit Name', 'By Unit Name'),
+    ('Industry Type (sectors)', 'By Industry Sector'),
+    ('Industry Type (subparts)', 'By Industry Subpart'),
+]
+
+_executor = ThreadPoolExecutor(max_workers=PREWARM_WORKERS, thread_name_prefix='excel-prewarm')
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def aggregates_name(submission_id) -> str:
+    return f'emissions_aggregates_{submission_id}.json'
+
+
+def report_path(submission_id, key: Optional[str] = None) -> str:
+    """Workbook path for a parameter key (None for the default workbook)"""
+    name = f'emissions_report_{submission_id}_{key}.xlsx' if key else f'emissions_report_{submission_id}.xlsx'
+    return os.path.join(TABLES_DIR, name)
+
+
+def prepare_frame(df: 'pd.DataFrame'):
+    """Find the CO2/CH4 columns and add Date and Quarter; returns (df, co2_col, ch4_col)"""
+    import pandas as pd
+    df.columns = df.columns.str.strip()
+    co2_col = next((c for c in df.columns if 'CO2' in c and ('tons' in c or 'emissions' in c or 'metric' in c)), None)
+    ch4_col = next((c for c in df.columns if ('CH4' in c and 'emissions' in c) or 'Methane' in c), None)
+    date_col = next((c for c in df.columns if 'Date' in c or 'date' in c), None)
+    year_col = next((c for c in df.columns if 'Year' in c or 'year' in c), None)
+    if not co2_col or not ch4_col:
+        print('Available columns:', df.columns.tolist())
+        raise ValueError(f"Missing required columns. Found: CO2={co2_col}, CH4={ch4_col}, Date={date_col}, Year={year_col}")
+    # If no date column, but year is present, create a pseudo-date
+    if not date_col and year_col:
+        print(f"No date column found, using year column '{year_col}' to create pseudo-dates.")
+        df['Date'] = pd.to_datetime(df[year_col].astype(str) + '-01-01')
+    elif date_col:
+        df['Date'] = pd.to_datetime(df[date_col])
+    else:
+        print('Available columns:', df.columns.tolist())
+        raise ValueError(f"Missing both Date and Year columns. Found: Date={date_col}, Year={year_col}")
+    df['Quarter'] = df['Date'].dt.to_period('Q').astype(str)
+    return df, co2_col, ch4_col
+
+
+def build_aggregates(df: 'pd.DataFrame', co2_col: str, ch4_col: str) -> Dict[str, Any]:
+    """CO2 and CH4 sums per grouping; CO2e for any GWP is derived from these"""
+    groupings = []
+    facility_col = next((c for c in df.columns if 'Facility' in c), None)
+    if facility_col:
+        groupings.append((facility_col, 'By Facility'))
+    groupings.append(('Quarter', 'By Quarter'))
+    for col, sheet_name in EXTRA_GROUPINGS:
+        if col in df.columns:
+            groupings.append((col, sheet_name))
+        else:
+            print(f"Column '{col}' not found, skipping {sheet_name}.")
+    tables = {}
+    for col, sheet_name in groupings:
+        sums = df.groupby(col)[[co2_col, ch4_col]].sum()
+        tables[sheet_name] = {
+            "column": col,
+            "keys": sums.index.tolist(),
+            "co2": sums[co2_col].tolist(),
+            "ch4": sums[ch4_col].tolist()
+        }
+    return {"co2_col": co2_col, "ch4_col": ch4_col, "rows": int(len(df)), "tables": tables}
+
+
+def write_aggregates(aggregates: Dict[str, Any], path: str) -> None:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(dumps(aggregates))
+    os.replace(tmp_path, path)
+
+
+def summary_tables(aggregates: Dict[str, Any], gwp_ch4: float = DEFAULT_GWP_CH4,
+                   groupings: Optional[List[str]] = None) -> Dict[str, 'pd.DataFrame']:
+    import pandas as pd
+    co2_col, ch4_col = aggregates['co2_col'], aggregates['ch4_col']
+    tables = {}
+    for sheet_name, table in aggregates['tables'].items():
+        if groupings and sheet_name not in groupings:
+            continue
+        frame = pd.DataFrame({table['column']: table['keys'], co2_col: table['co2'], ch4_col: table['ch4']})
+        frame['CO2e (tons)'] = frame[co2_col] + frame[ch4_col] * gwp_ch4
+        tables[sheet_name] = frame
+    return tables
+
+
+def generate_summary(tables: Dict[str, 'pd.DataFrame']) -> str:
+    """GPT compliance summary of the summary tables (an LLM call unless the prompt is cached)"""
+    # ai_module (scikit-learn) is only needed when a summary is actually generated
+    from ai_module import gpt_summary
+    from prompt_digest import render_tables
+    print("Generating GPT summary...")
+    summary_prompt = f"Generate a compliance summary for the emissions report. Include key findings from the summaries by facility, energy source, and quarter.\n\n{render_tables(tables, 'CO2e (tons)')}"
+    return gpt_summary(summary_prompt)
+
+
+def summary_path(submission_id) -> str:
+    return os.path.join(LOGS_DIR, f'emissions_report_summary_{submission_id}.txt')
+
+
+def write_summary(submission_id, summary: str) -> str:
+    path = summary_path(submission_id)
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(summary)
+    return path
+
+
+def render_workbook(path: str, tables: Dict[str, 'pd.DataFrame'], summary: str,
+                    raw: Optional['pd.DataFrame'] = None) -> Dict[str, str]:
+    """Write the workbook (summary sheet last); returns the extra files written for the raw data"""
+    # pandas and openpyxl are only needed when a workbook is actually built
+    import pandas as pd
+    from excel_stream import write_workbook, RAW_MODE
+    print(f"Writing Excel report to {path}")
+    # Raw data goes where EXCEL_RAW_DATA says (sheets, a side file or nowhere)
+    return write_workbook(path, raw if raw is not None else pd.DataFrame(),
+                          {**tables, 'Summary': pd.DataFrame({'Summary': [summary]})},
+                          raw_mode=RAW_MODE if raw is not None else 'none')
+
+
+def report_params(gwp_ch4: float = DEFAULT_GWP_CH4, groupings: Optional[List[str]] = None,
+                  include_raw: bool = False) -> Dict[str, Any]:
+    return {"gwp_ch4": float(gwp_ch4), "groupings": sorted(groupings) if groupings else None,
+            "include_raw": bool(include_raw)}
+
+
+def params_key(params: Dict[str, Any]) -> Optional[str]:
+    """Short hash of non-default parameters (None for the default workbook)"""
+    if params == report_params():
+        return None
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _lock(name: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(name, threading.Lock())
+
+
+def _upload_frame(submission_id) -> 'pd.DataFrame':
+    import pandas as pd
+    with connection() as conn:
+        row = conn.execute('SELECT csv_filename FROM upload_logs WHERE submission_id = ? ORDER BY id DESC LIMIT 1',
+                           (int(submission_id),)).fetchone()
+    if row is None:
+        raise FileNotFoundError(f"No upload recorded for submission {submission_id}")
+    path = get_storage().local_path(f"uploads/{submission_id}_{row['csv_filename']}")
+    return pd.read_csv(path, encoding='latin1')
+
+
+def build_report(submission_id, gwp_ch4: float = DEFAULT_GWP_CH4, groupings: Optional[List[str]] = None,
+                 include_raw: bool = False, live_summary: bool = True) -> str:
+    """Path of the submission's workbook for these parameters, building it if it is missing or stale.
+
+    The default workbook uses the summary the pipeline recorded. Without one, or for other
+    parameters, the summary is generated unless live_summary is False (webhook deliveries);
+    the workbook then carries a placeholder and is rebuilt on the next download.
+    """
+    params = report_params(gwp_ch4, groupings, include_raw)
+    key = params_key(params)
+    artifact = f'excel_report_{key}' if key else 'excel_report'
+    path = report_path(submission_id, key)
+    with _lock(f'{submission_id}:{artifact}'):
+        aggregates_path = require_artifact(submission_id, 'emissions_aggregates')
+        manifest = ensure_manifest(submission_id)
+        cached = resolve_artifact(manifest, artifact)
+        # Only the default workbook uses the pipeline's summary
+        recorded_summary = resolve_artifact(manifest, 'excel_summary') if key is None else None
+        recorded_summary = recorded_summary if recorded_summary and os.path.isfile(recorded_summary) else None
+        sources = [aggregates_path]
+        if recorded_summary:
+            sources.append(recorded_summary)
+        elif key is None and live_summary:
+            # Built for a delivery with the placeholder; generate the summary now
+            cached = None
+        if cached == path and os.path.isfile(path) and all(os.path.getmtime(path) >= os.path.getmtime(source)
+                                                           for source in sources):
+            return path
+        with open(aggregates_path, 'rb') as f:
+            aggregates = loads(f.read())
+        unknown = set(groupings or []) - set(aggregates['tables'])
+        if unknown:
+            raise ValueError(f"Unknown groupings: {', '.join(sorted(unknown))}")
+        raw = None
+        if include_raw:
+            raw, co2_col, ch4_col = prepare_frame(_upload_frame(submission_id))
+            raw['CO2e (tons)'] = raw[co2_col] + raw[ch4_col] * gwp_ch4
+        tables = summary_tables(aggregates, gwp_ch4, groupings)
+        recorded = {}
+        if recorded_summary:
+            with open(recorded_summary) as f:
+                summary = f.read()
+        elif live_summary:
+            summary = generate_summary(tables)
+            if key is None:
+                recorded['excel_summary'] = write_summary(submission_id, summary)
+        else:
+            summary = SUMMARY_PLACEHOLDER
+        extra_files = render_workbook(path, tables, summary, raw)
+        # Raw data overflow files of a parameterized workbook are recorded next to it
+        extra_files = {f'{name}_{key}' if key else name: extra for name, extra in extra_files.items()}
+        record_artifacts(submission_id, {artifact: path, **extra_files, **recorded})
+        print(f"[INFO] Built emissions report for submission {submission_id}: {os.path.basename(path)}")
+        return path
+
+
+def queue_notification(submission_id) -> int:
+    """Queue the Zapier notification for the default workbook (once per pipeline run); returns the outbox id"""
+    with connection() as conn:
+        return webhook_outbox.enqueue(conn, report_path(submission_id), submission_id)
+
+
+def prepare_delivery(delivery: Dict[str, Any]) -> None:
+    """Outbox hook: build (or refresh) the default workbook a delivery is about to post, without LLM calls"""
+    submission_id = delivery['submission_id']
+    if submission_id and delivery['file_path'] == report_path(submission_id):
+        build_report(submission_id, live_summary=False)
+
+
+def prewarm(submission_ids: List) -> None:
+    """Build the default workbooks in the background; builds already running are not repeated"""
+    def build(submission_id):
+        try:
+            build_report(submission_id)
+        except Exception as e:
+            print(f"[WARNING] Could not prewarm emissions report for submission {submission_id}: {e}")
+
+    for submission_id in submission_ids:
+        _executor.submit(build, submission_id)
+
+
+def likely_submissions(conn, limit: int = 5) -> List[int]:
+    """Most recently viewed and most recently created submissions"""
+    viewed = [row[0] for row in conn.execute(
+        'SELECT submission_id FROM submission_access ORDER BY last_access DESC LIMIT ?', (limit,))]
+    created = [row[0] for row in conn.execute('SELECT id FROM submissions ORDER BY id DESC LIMIT ?', (limit,))]
+    return list(dict.fromkeys(viewed + created))[:limit]
@@ -1,11 +1,12 @@
 import os
 import sys
 import pandas as pd
-import numpy as np
-import requests
-from datetime import datetime
-from dotenv import load_dotenv
-from ai_module import gpt_summary
+from manifest import record_artifacts
+from excel_stream import write_workbook
+from db import connection
+from webhook_outbox import enqueue as enqueue_delivery
+from emissions_report import (DEFAULT_GWP_CH4, aggregates_name, build_aggregates, generate_summary, prepare_frame,
+                              queue_notification, summary_tables, write_aggregates, write_summary)
 
 def main():
     # Use the environment variable or a command-line argument for the input file
@@ -16,103 +17,49 @@ def main():
         INPUT_CSV = 'emissions_by_unit.csv'  # fallback for legacy/manual runs
     OUTPUT_XLSX = 'deliverables/tables/emissions_report.xlsx'
     SUMMARY_TXT = 'deliverables/logs/emissions_report_summary.txt'
-    ZAPIER_WEBHOOK = 'https://zapier.com/editor/308521987/draft/308521987/setup'
     os.makedirs('deliverables/tables/', exist_ok=True)
     os.makedirs('deliverables/logs/', exist_ok=True)
     print(f"Loading data from {INPUT_CSV}")
     df = pd.read_csv(INPUT_CSV, encoding='latin1')
-    df.columns = df.columns.str.strip()
+    df, co2_col, ch4_col = prepare_frame(df)
+    aggregates = build_aggregates(df, co2_col, ch4_col)
 
-    # Try to find CO2, CH4, Date columns
-    possible_co2_cols = [
-        c for c in df.columns if (
-            ('CO2' in c and 'tons' in c) or ('CO2' in c and 'emissions' in c) or ('CO2' in c and 'metric' in c)
-        )
-    ]
-    possible_ch4_cols = [
-        c for c in df.columns if (
-            ('CH4' in c and 'emissions' in c) or ('Methane' in c)
-        )
-    ]
-    possible_date_cols = [
-        c for c in df.columns if (
-            'Date' in c or 'date' in c)
-    ]
-    possible_year_cols = [
-        c for c in df.columns if 'Year' in c or 'year' in c]
+    submission_id = os.environ.get('SUBMISSION_ID')
+    if submission_id:
+        # The workbook itself is built on first download from these sums (see emissions_report.py)
+        aggregates_path = os.path.join('deliverables/tables', aggregates_name(submission_id))
+        write_aggregates(aggregates, aggregates_path)
+        # The default workbook's summary is generated here, so the outbox never waits on the LLM
+        summary_path = write_summary(submission_id, generate_summary(summary_tables(aggregates)))
+        record_artifacts(submission_id, {'emissions_aggregates': aggregates_path, 'excel_summary': summary_path})
+        print(f"✅ Emissions aggregates ({len(aggregates['tables'])} groupings) saved to: {aggregates_path}")
+        print(f"✅ Summary saved to: {summary_path}")
+        # Zapier integration: the API's outbox worker builds and POSTs the workbook (see webhook_outbox.py)
+        delivery_id = queue_notification(submission_id)
+        print(f"Queued report for webhook delivery (outbox id {delivery_id})")
+        return
 
-    co2_col = possible_co2_cols[0] if possible_co2_cols else None
-    ch4_col = possible_ch4_cols[0] if possible_ch4_cols else None
-    date_col = possible_date_cols[0] if possible_date_cols else None
-    year_col = possible_year_cols[0] if possible_year_cols else None
-
-    if not co2_col or not ch4_col:
-        print('Available columns:', df.columns.tolist())
-        raise ValueError(f"Missing required columns. Found: CO2={co2_col}, CH4={ch4_col}, Date={date_col}, Year={year_col}")
-
-    # If no date column, but year is present, create a pseudo-date
-    if not date_col and year_col:
-        print(f"No date column found, using year column '{year_col}' to create pseudo-dates.")
-        df['Date'] = pd.to_datetime(df[year_col].astype(str) + '-01-01')
-        date_col = 'Date'
-    elif date_col:
-        print("Converting Date column to datetime...")
-        df['Date'] = pd.to_datetime(df[date_col])
-    else:
-        print('Available columns:', df.columns.tolist())
-        raise ValueError(f"Missing both Date and Year columns. Found: Date={date_col}, Year={year_col}")
-
-    # Calculate CO2e
+    # Manual runs: write the full report with the raw data
     print("Calculating CO2e (tons)...")
-    df['CO2e (tons)'] = df[co2_col] * 1 + df[ch4_col] * 25
-
-    # Create 'Quarter' column
-    df['Quarter'] = df['Date'].dt.to_period('Q').astype(str)
-
-    # Summaries
-    facility_col = next((c for c in df.columns if 'Facility' in c), None)
-    # Grouping columns for additional summaries
-    extra_groupings = [
-        ('Unit Type', 'By Unit Type'),
-        ('Unit Name', 'By Unit Name'),
-        ('Industry Type (sectors)', 'By Industry Sector'),
-        ('Industry Type (subparts)', 'By Industry Subpart'),
-    ]
-
-    # Build all summaries
-    summaries = {}
-    if facility_col:
-        summaries['By Facility'] = df.groupby(facility_col)[[co2_col, ch4_col, 'CO2e (tons)']].sum().reset_index()
-    summaries['By Quarter'] = df.groupby('Quarter')[[co2_col, ch4_col, 'CO2e (tons)']].sum().reset_index()
-
-    for col, sheet_name in extra_groupings:
-        if col in df.columns:
-            summaries[sheet_name] = df.groupby(col)[[co2_col, ch4_col, 'CO2e (tons)']].sum().reset_index()
-        else:
-            print(f"Column '{col}' not found, skipping {sheet_name}.")
+    df['CO2e (tons)'] = df[co2_col] * 1 + df[ch4_col] * DEFAULT_GWP_CH4
+    summaries = summary_tables(aggregates)
 
     # Write to Excel
     print(f"Writing Excel report to {OUTPUT_XLSX}")
     # Generate GPT summary before writing Excel
-    print("Generating GPT summary...")
-    summary_prompt = f"Generate a compliance summary for the emissions report. Include key findings from the summaries by facility, energy source, and quarter."
-    summary = gpt_summary(summary_prompt)
+    summary = generate_summary(summaries)
     print(summary)
     with open(SUMMARY_TXT, 'w') as f:
         f.write(summary)
 
-    with pd.ExcelWriter(OUTPUT_XLSX, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Raw Data', index=False)
-        for sheet_name, summary_df in summaries.items():
-            summary_df.to_excel(writer, sheet_name=sheet_name, index=False)
-        # Add summary as a new sheet
-        pd.DataFrame({'Summary': [summary]}).to_excel(writer, sheet_name='Summary', index=False)
+    # EXCEL_WRITER / EXCEL_RAW_DATA pick the writer and where raw data goes (see excel_stream.py)
+    extra_files = write_workbook(OUTPUT_XLSX, df, {**summaries, 'Summary': pd.DataFrame({'Summary': [summary]})})
+    record_artifacts(None, {'excel_report': OUTPUT_XLSX, 'excel_summary': SUMMARY_TXT, **extra_files})
 
-    # Zapier integration: POST the Excel file
-    print("Posting report to Zapier webhook...")
-    with open(OUTPUT_XLSX, 'rb') as f:
-        response = requests.post(ZAPIER_WEBHOOK, files={'file': f})
-        print(f"Zapier response: {response.status_code} {response.text}")
+    # Zapier integration: the API's outbox worker POSTs the Excel file (see webhook_outbox.py)
+    with connection() as conn:
+        delivery_id = enqueue_delivery(conn, OUTPUT_XLSX)
+    print(f"Queued report for webhook delivery (outbox id {delivery_id})")
 
     print(f"✅ Emissions report (CO2 + CH4 only) saved to: {OUTPUT_XLSX}")
     print(f"✅ Summary saved to: {SUMMARY_TXT}")
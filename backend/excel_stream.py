@@ -0,0 +1,126 @@
+import os
+from typing import TYPE_CHECKING, Dict
+
+from openpyxl import Workbook
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Constant-memory Excel output for large reports.
+# Workbooks are written with openpyxl's write-only mode, which streams rows to disk
+# instead of building every cell in memory, and rows are converted from the DataFrame
+# in fixed-size chunks. Raw data longer than an Excel sheet (1,048,576 rows) continues
+# on "Raw Data 2", "Raw Data 3", ... and after EXCEL_RAW_SHEETS_PER_FILE sheets in
+# additional "<report>_raw_partN.xlsx" workbooks. Alternatively the raw data can go to a
+# columnar side file (Parquet when pyarrow is installed, gzipped CSV otherwise).
+# write_workbook() applies the EXCEL_WRITER / EXCEL_RAW_DATA settings for every report.
+
+EXCEL_MAX_ROWS = 1_048_576
+ROWS_PER_SHEET = EXCEL_MAX_ROWS - 1  # one header row
+SHEETS_PER_FILE = int(os.environ.get('EXCEL_RAW_SHEETS_PER_FILE', 4))
+CHUNK_ROWS = 50_000
+RAW_MODES = ('sheet', 'side_file', 'none')
+WRITERS = ('streaming', 'pandas')
+# 'streaming' (write-only openpyxl) or 'pandas' (whole workbook in memory)
+WRITER = os.environ.get('EXCEL_WRITER', 'streaming')
+# Raw data: 'sheet' (rolls over past the sheet row limit), 'side_file' or 'none'
+RAW_MODE = os.environ.get('EXCEL_RAW_DATA', 'sheet')
+
+
+def append_frame(ws, df: 'pd.DataFrame', start: int = 0, stop: int = None) -> None:
+    """Append a header and df rows [start, stop) to a write-only worksheet, chunk by chunk"""
+    ws.append([str(c) for c in df.columns])
+    stop = len(df) if stop is None else stop
+    for chunk_start in range(start, stop, CHUNK_ROWS):
+        chunk = df.iloc[chunk_start:min(chunk_start + CHUNK_ROWS, stop)]
+        # Native Python values with NaN/NaT as empty cells
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+            ws.append(row)
+
+
+def write_side_file(df: 'pd.DataFrame', report_path: str) -> str:
+    """Write raw data next to the report as Parquet (or gzipped CSV without pyarrow)"""
+    stem = os.path.splitext(report_path)[0]
+    if pyarrow is not None:
+        path = f"{stem}_raw.parquet"
+        df.to_parquet(path, index=False)
+    else:
+        path = f"{stem}_raw.csv.gz"
+        df.to_csv(path, index=False, compression='gzip')
+    return path
+
+
+def _raw_sheet_name(part: int) -> str:
+    return 'Raw Data' if part == 0 else f'Raw Data {part + 1}'
+
+
+def write_report(path: str, raw: 'pd.DataFrame', sheets: Dict[str, 'pd.DataFrame'], raw_mode: str = 'sheet',
+                 rows_per_sheet: int = ROWS_PER_SHEET, sheets_per_file: int = SHEETS_PER_FILE) -> Dict[str, str]:
+    """Write raw data and summary sheets with write-only workbooks.
+
+    Returns the extra files written besides path, keyed by artifact name.
+    """
+    if raw_mode not in RAW_MODES:
+        raise ValueError(f"Unknown raw data mode {raw_mode!r}; expected one of {', '.join(RAW_MODES)}")
+    extra_files = {}
+    wb = Workbook(write_only=True)
+    if raw_mode == 'side_file':
+        side_path = write_side_file(raw, path)
+        extra_files['excel_raw_data'] = side_path
+        ws = wb.create_sheet('Raw Data')
+        ws.append(['Raw data file', 'Rows'])
+        ws.append([os.path.basename(side_path), len(raw)])
+    elif raw_mode == 'sheet':
+        parts = max(1, -(-len(raw) // rows_per_sheet))
+        stem = os.path.splitext(path)[0]
+        part_wb = wb
+        for part in range(parts):
+            file_index = part // sheets_per_file
+            if part and part % sheets_per_file == 0:
+                # Finish the previous overflow workbook before starting the next one
+                if part_wb is not wb:
+                    part_wb.save(extra_files[f'excel_raw_part_{file_index}'])
+                part_wb = Workbook(write_only=True)
+                extra_files[f'excel_raw_part_{file_index + 1}'] = f"{stem}_raw_part{file_index + 1}.xlsx"
+            start = part * rows_per_sheet
+            append_frame(part_wb.create_sheet(_raw_sheet_name(part)), raw, start, min(start + rows_per_sheet, len(raw)))
+        if part_wb is not wb:
+            part_wb.save(extra_files[f'excel_raw_part_{(parts - 1) // sheets_per_file + 1}'])
+        if parts > 1:
+            print(f"[INFO] Raw data ({len(raw):,} rows) split over {parts} sheets")
+    for name, df in sheets.items():
+        append_frame(wb.create_sheet(name[:31]), df)
+    wb.save(path)
+    return extra_files
+
+
+def write_workbook(path: str, raw: 'pd.DataFrame', sheets: Dict[str, 'pd.DataFrame'], raw_mode: str = RAW_MODE,
+                   writer: str = WRITER) -> Dict[str, str]:
+    """Write a report with the configured writer (EXCEL_WRITER, EXCEL_RAW_DATA).
+
+    Returns the extra files written besides path, keyed by artifact name.
+    """
+    import pandas as pd
+    if writer not in WRITERS:
+        raise ValueError(f"Unknown Excel writer {writer!r}; expected one of {', '.join(WRITERS)}")
+    if writer == 'streaming':
+        return write_report(path, raw, sheets, raw_mode=raw_mode)
+    if raw_mode not in RAW_MODES:
+        raise ValueError(f"Unknown raw data mode {raw_mode!r}; expected one of {', '.join(RAW_MODES)}")
+    extra_files = {}
+    with pd.ExcelWriter(path, engine='openpyxl') as xl:
+        if raw_mode == 'sheet':
+            raw.to_excel(xl, sheet_name='Raw Data', index=False)
+        elif raw_mode == 'side_file':
+            side_path = write_side_file(raw, path)
+            extra_files['excel_raw_data'] = side_path
+            pd.DataFrame({'Raw data file': [os.path.basename(side_path)], 'Rows': [len(raw)]}).to_excel(
+                xl, sheet_name='Raw Data', index=False)
+        for name, df in sheets.items():
+            df.to_excel(xl, sheet_name=name[:31], index=False)
+    return extra_files
@@ -0,0 +1,67 @@
+from typing import TYPE_CHECKING, Iterator, List, Optional
+
+from serialization import frame_to_records, dumps
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Streaming export of a submission's flagged output.
+# Rows are read and written chunk by chunk, so server memory stays constant
+# regardless of the size of the output file.
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_CHUNK_ROWS = 10000
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def iter_export(path: str, fmt: str = 'ndjson', columns: Optional[List[str]] = None,
+                anomalies_only: bool = False, year_from: Optional[int] = None,
+                year_to: Optional[int] = None, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Yield the selected rows and columns of an output file as NDJSON lines or CSV text"""
+    import pandas as pd
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    raw_columns = pd.read_csv(path, nrows=0).columns
+    by_name = {c.strip(): c for c in raw_columns}
+    columns = columns or list(by_name)
+    unknown = [c for c in columns if c not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    needed = set(columns)
+    if anomalies_only:
+        if 'Anomaly' not in by_name:
+            raise ValueError("Output file has no 'Anomaly' column")
+        needed.add('Anomaly')
+    if year_from is not None or year_to is not None:
+        if 'Reporting Year' not in by_name:
+            raise ValueError("Output file has no 'Reporting Year' column")
+        needed.add('Reporting Year')
+    usecols = [by_name[c] for c in by_name if c in needed]
+    return _iter_chunks(path, fmt, columns, usecols, anomalies_only, year_from, year_to, chunk_rows)
+
+
+def _iter_chunks(path, fmt, columns, usecols, anomalies_only, year_from, year_to, chunk_rows):
+    import pandas as pd
+    header = True
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunk_rows):
+        chunk.columns = chunk.columns.str.strip()
+        if anomalies_only:
+            chunk = chunk[chunk['Anomaly'] == True]
+        if year_from is not None or year_to is not None:
+            # Unparseable years never match a range
+            years = pd.to_numeric(chunk['Reporting Year'], errors='coerce')
+            if year_from is not None:
+                chunk, years = chunk[years >= year_from], years[years >= year_from]
+            if year_to is not None:
+                chunk = chunk[years <= year_to]
+        chunk = chunk[columns]
+        if fmt == 'ndjson':
+            if not chunk.empty:
+                yield b''.join(dumps(record) + b'\n' for record in frame_to_records(chunk))
+        else:
+            if header or not chunk.empty:
+                yield chunk.to_csv(index=False, header=header).encode('utf-8')
+                header = False
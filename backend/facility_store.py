@@ -0,0 +1,164 @@
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+
+from results_store import CO2_COL, anomaly_mask
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Cross-submission facility history.
+# The pipeline copies every scored row (submission, facility, unit, year, emissions,
+# prediction, score, flag) into one indexed table, so facility, sector and
+# recurrence queries never open the per-submission CSVs.
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS facility_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        submission_id INTEGER NOT NULL,
+        facility_id TEXT,
+        facility_name TEXT,
+        unit_name TEXT,
+        sector TEXT,
+        reporting_year INTEGER,
+        emissions REAL,
+        predicted REAL,
+        deviation REAL,
+        score REAL,
+        flagged INTEGER NOT NULL DEFAULT 0,
+        anomaly INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_facility_history_facility ON facility_history (facility_id, reporting_year)',
+    'CREATE INDEX IF NOT EXISTS idx_facility_history_name ON facility_history (facility_name, reporting_year)',
+    'CREATE INDEX IF NOT EXISTS idx_facility_history_sector ON facility_history (sector, reporting_year)',
+    'CREATE INDEX IF NOT EXISTS idx_facility_history_submission ON facility_history (submission_id)',
+    'CREATE INDEX IF NOT EXISTS idx_facility_history_anomalies ON facility_history (facility_id, submission_id) WHERE anomaly = 1',
+]
+
+_COLUMNS = [
+    'submission_id', 'facility_id', 'facility_name', 'unit_name', 'sector', 'reporting_year',
+    'emissions', 'predicted', 'deviation', 'score', 'flagged', 'anomaly'
+]
+_SOURCE_COLUMNS = {
+    'facility_id': 'Facility Id',
+    'facility_name': 'Facility Name',
+    'unit_name': 'Unit Name',
+    'sector': 'Industry Type (sectors)',
+    'reporting_year': 'Reporting Year',
+    'emissions': CO2_COL,
+    'predicted': 'Predicted CO2',
+    'deviation': 'Deviation (%)',
+    'score': 'Anomaly Score',
+}
+
+
+def init_facility_store(conn) -> None:
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+
+def text_column(series: 'pd.Series') -> 'pd.Series':
+    """Text values with NaN as None; integral floats (ids read next to missing values) keep their integer form"""
+    import pandas as pd
+    if pd.api.types.is_float_dtype(series) and (series.dropna() % 1 == 0).all():
+        series = series.astype('Int64')
+    return series.astype(str).where(series.notna(), None)
+
+
+def _history_rows(df: 'pd.DataFrame', submission_id) -> List[tuple]:
+    """Build insert tuples for every row of a flagged output in one vectorized pass"""
+    import pandas as pd
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+    rows = pd.DataFrame(index=df.index)
+    rows['submission_id'] = int(submission_id)
+    for col, source in _SOURCE_COLUMNS.items():
+        rows[col] = df[source] if source in df.columns else None
+    for col in ('facility_id', 'facility_name', 'unit_name', 'sector'):
+        rows[col] = text_column(rows[col])
+    rows['reporting_year'] = pd.to_numeric(rows['reporting_year'], errors='coerce').astype('Int64')
+    for col in ('emissions', 'predicted', 'deviation', 'score'):
+        rows[col] = pd.to_numeric(rows[col], errors='coerce')
+    rows['flagged'] = (df['Flagged'] == 'Yes').astype(int) if 'Flagged' in df.columns else 0
+    rows['anomaly'] = anomaly_mask(df).astype(int)
+    rows = rows[_COLUMNS].astype(object).where(rows[_COLUMNS].notna(), None)
+    return list(rows.itertuples(index=False, name=None))
+
+
+def record_submission(conn, submission_id, df: 'pd.DataFrame') -> int:
+    """Replace a submission's rows in the history table in a single transaction"""
+    init_facility_store(conn)
+    rows = _history_rows(df, submission_id)
+    with conn:
+        conn.execute('DELETE FROM facility_history WHERE submission_id = ?', (int(submission_id),))
+        conn.executemany(
+            f"INSERT INTO facility_history ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})",
+            rows
+        )
+    return len(rows)
+
+
+def facility_history(conn, facility: str, year_from: Optional[int] = None,
+                     year_to: Optional[int] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+    """Every recorded row for a facility across submissions (matched by facility id, then by exact name)"""
+    where = []
+    params = []
+    if year_from is not None:
+        where.append('reporting_year >= ?')
+        params.append(year_from)
+    if year_to is not None:
+        where.append('reporting_year <= ?')
+        params.append(year_to)
+    for key_column in ('facility_id', 'facility_name'):
+        conditions = ' AND '.join([f'{key_column} = ?'] + where)
+        cursor = conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM facility_history WHERE {conditions} "
+            f"ORDER BY reporting_year, submission_id LIMIT ?",
+            [facility] + params + [limit]
+        )
+        rows = cursor.fetchall()
+        if rows:
+            return [dict(row) for row in rows]
+    return []
+
+
+def sector_trends(conn, sector: Optional[str] = None, year_from: Optional[int] = None,
+                  year_to: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Per-sector, per-year emission totals and anomaly counts across all submissions"""
+    params = []
+    where = ['sector IS NOT NULL']
+    if sector:
+        where.append('sector = ?')
+        params.append(sector)
+    if year_from is not None:
+        where.append('reporting_year >= ?')
+        params.append(year_from)
+    if year_to is not None:
+        where.append('reporting_year <= ?')
+        params.append(year_to)
+    cursor = conn.execute(f'''
+        SELECT sector, reporting_year, SUM(emissions) AS total_emissions, AVG(emissions) AS mean_emissions,
+               COUNT(*) AS records, SUM(anomaly) AS anomalies, COUNT(DISTINCT submission_id) AS submissions
+        FROM facility_history
+        WHERE {' AND '.join(where)}
+        GROUP BY sector, reporting_year
+        ORDER BY sector, reporting_year
+    ''', params)
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def anomaly_recurrence(conn, min_submissions: int = 2, limit: int = 100) -> List[Dict[str, Any]]:
+    """Facilities flagged as anomalous in at least ``min_submissions`` different uploads"""
+    cursor = conn.execute('''
+        SELECT facility_id, MAX(facility_name) AS facility_name, COUNT(*) AS anomalies,
+               COUNT(DISTINCT submission_id) AS submissions, COUNT(DISTINCT reporting_year) AS years,
+               MIN(reporting_year) AS first_year, MAX(reporting_year) AS last_year
+        FROM facility_history
+        WHERE anomaly = 1 AND facility_id IS NOT NULL
+        GROUP BY facility_id
+        HAVING COUNT(DISTINCT submission_id) >= ?
+        ORDER BY anomalies DESC
+        LIMIT ?
+    ''', (min_submissions, limit))
+    return [dict(row) for row in cursor.fetchall()]
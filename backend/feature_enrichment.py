@@ -1,5 +1,6 @@
 import pandas as pd
 import os
+from manifest import record_artifacts, require_artifact
 
 # Get submission ID from environment
 submission_id = os.environ.get('SUBMISSION_ID', None)
@@ -15,11 +16,8 @@ TABLES = 'deliverables/tables/'
 # Ensure directory exists
 os.makedirs(TABLES, exist_ok=True)
 
-# Use submission-specific file path
-flagged_file = TABLES + f'flagged_emissions_output{output_suffix}.csv'
-if not os.path.exists(flagged_file):
-    print(f"Warning: {flagged_file} not found, trying fallback...")
-    flagged_file = TABLES + 'flagged_emissions_output.csv'
+# Resolve this submission's flagged output through its manifest (no fallback to other runs' files)
+flagged_file = require_artifact(submission_id, 'flagged_output') if submission_id else TABLES + 'flagged_emissions_output.csv'
 
 df = pd.read_csv(flagged_file, encoding='latin1')
 df.columns = df.columns.str.strip()  # Strip all column names to avoid trailing space issues
@@ -38,4 +36,5 @@ df["error_ratio"] = df["prediction_error"] / (df["Unit CO2 emissions (non-biogen
 
 # Save cleaned and enriched dataset with submission suffix
 df.to_csv(TABLES + f'cleaned_flagged_emissions{output_suffix}.csv', index=False)
+record_artifacts(submission_id, {'cleaned_flagged': TABLES + f'cleaned_flagged_emissions{output_suffix}.csv'})
 print(f"[feature_enrichment] Saved cleaned_flagged_emissions{output_suffix}.csv with new features.") 
\ No newline at end of file
@@ -0,0 +1,128 @@
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+
+# Submission history and upload log queries.
+# Both lists are served newest-first with keyset pagination on (created_at, id), so
+# each page is one index range scan no matter how many uploads have accumulated.
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_submissions_created ON submissions (created_at, id)',
+    'CREATE INDEX IF NOT EXISTS idx_submissions_category ON submissions (category, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS idx_upload_logs_created ON upload_logs (created_at, id)',
+    'CREATE INDEX IF NOT EXISTS idx_upload_logs_submission ON upload_logs (submission_id)',
+]
+
+
+def init_history_indexes(conn) -> None:
+    for statement in INDEXES:
+        conn.execute(statement)
+    conn.commit()
+
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return created_at, int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def _timestamp(value: str, end_of_day: bool = False) -> str:
+    """Normalize an ISO date or datetime to SQLite's CURRENT_TIMESTAMP format"""
+    value = value.strip().replace('T', ' ').rstrip('Z')
+    if len(value) == 10:
+        value += ' 23:59:59' if end_of_day else ' 00:00:00'
+    return value
+
+
+def _filters(prefix: str, category: Optional[str], title: Optional[str],
+             date_from: Optional[str], date_to: Optional[str]) -> Tuple[List[str], List[Any]]:
+    where = []
+    params = []
+    if category:
+        where.append('s.category = ?')
+        params.append(category)
+    if title:
+        where.append('s.title LIKE ?')
+        params.append(f'%{title}%')
+    if date_from:
+        where.append(f'{prefix}.created_at >= ?')
+        params.append(_timestamp(date_from))
+    if date_to:
+        where.append(f'{prefix}.created_at <= ?')
+        params.append(_timestamp(date_to, end_of_day=True))
+    return where, params
+
+
+def _page(conn, sql: str, where: List[str], params: List[Any], prefix: str,
+          cursor: Optional[str], limit: int):
+    """Rows newest first and the next page's cursor"""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    if cursor:
+        where = where + [f'({prefix}.created_at, {prefix}.id) < (?, ?)']
+        params = params + list(decode_cursor(cursor))
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += f' ORDER BY {prefix}.created_at DESC, {prefix}.id DESC LIMIT ?'
+    rows = [dict(row) for row in conn.execute(sql, params + [limit + 1]).fetchall()]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last['created_at'], last['_id'])
+    for row in rows:
+        row.pop('_id')
+    return rows[:limit], next_cursor
+
+
+def submission_history(conn, category: Optional[str] = None, title: Optional[str] = None,
+                       date_from: Optional[str] = None, date_to: Optional[str] = None,
+                       cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Newest-first page of submissions; returns (rows, next_cursor)"""
+    where, params = _filters('s', category, title, date_from, date_to)
+    sql = 'SELECT s.id, s.title, s.category, s.description, s.created_at, s.file_path, s.id AS _id FROM submissions s'
+    return _page(conn, sql, where, params, 's', cursor, limit)
+
+
+def upload_logs(conn, submission_id: Optional[int] = None, category: Optional[str] = None,
+                title: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Newest-first page of upload log entries; returns (rows, next_cursor)"""
+    where, params = _filters('l', category, title, date_from, date_to)
+    if submission_id is not None:
+        where.append('l.submission_id = ?')
+        params.append(submission_id)
+    sql = 'SELECT l.submission_id, l.csv_filename, l.anomaly_threshold, l.created_at, l.id AS _id FROM upload_logs l'
+    if category or title:
+        sql += ' JOIN submissions s ON s.id = l.submission_id'
+    return _page(conn, sql, where, params, 'l', cursor, limit)
+
+
+def count_submissions(conn, category: Optional[str] = None, title: Optional[str] = None,
+                      date_from: Optional[str] = None, date_to: Optional[str] = None) -> int:
+    where, params = _filters('s', category, title, date_from, date_to)
+    sql = 'SELECT COUNT(*) FROM submissions s'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    return conn.execute(sql, params).fetchone()[0]
+
+
+def count_upload_logs(conn, submission_id: Optional[int] = None, category: Optional[str] = None,
+                      title: Optional[str] = None, date_from: Optional[str] = None,
+                      date_to: Optional[str] = None) -> int:
+    where, params = _filters('l', category, title, date_from, date_to)
+    if submission_id is not None:
+        where.append('l.submission_id = ?')
+        params.append(submission_id)
+    sql = 'SELECT COUNT(*) FROM upload_logs l'
+    if category or title:
+        sql += ' JOIN submissions s ON s.id = l.submission_id'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    return conn.execute(sql, params).fetchone()[0]
@@ -0,0 +1,149 @@
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional
+
+from db import connection
+
+# Persistent cache of LLM completions, shared by the API and the pipeline scripts.
+# Entries are keyed on the model, the whitespace-normalized messages and the request
+# parameters, expire after LLM_CACHE_TTL_SECONDS and are evicted least-recently-used
+# once there are more than LLM_CACHE_MAX_ENTRIES. Hit, miss and eviction counts are
+# kept in SQLite so pipeline runs show up in /api/llm-cache/stats.
+# Only successful completions are stored; a failed request is retried next time.
+
+ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") != "0"
+TTL_SECONDS = float(os.environ.get("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 2000))
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS llm_cache (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_access REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)',
+    '''
+    CREATE TABLE IF NOT EXISTS llm_cache_stats (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+]
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def init_llm_cache(conn) -> None:
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+
+def normalize_prompt(text: str) -> str:
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def cache_key(model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+    normalized = [{"role": m["role"], "content": normalize_prompt(m["content"])} for m in messages]
+    payload = json.dumps({"model": model, "messages": normalized, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _count(conn, name: str, amount: int = 1) -> None:
+    conn.execute('''
+        INSERT INTO llm_cache_stats (name, value) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+    ''', (name, amount))
+
+
+def lookup(key: str, now: Optional[float] = None) -> Optional[str]:
+    now = now or time.time()
+    with connection() as conn:
+        row = conn.execute('SELECT response, created_at FROM llm_cache WHERE key = ?', (key,)).fetchone()
+        if row is not None and row['created_at'] + TTL_SECONDS < now:
+            conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+            _count(conn, 'expired')
+            row = None
+        if row is None:
+            _count(conn, 'misses')
+            return None
+        conn.execute('UPDATE llm_cache SET last_access = ?, hits = hits + 1 WHERE key = ?', (now, key))
+        _count(conn, 'hits')
+        return row['response']
+
+
+def store(key: str, model: str, response: str, now: Optional[float] = None) -> None:
+    now = now or time.time()
+    with connection() as conn:
+        conn.execute('''
+            INSERT INTO llm_cache (key, model, response, created_at, last_access) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET response = excluded.response,
+                created_at = excluded.created_at, last_access = excluded.last_access
+        ''', (key, model, response, now, now))
+        excess = conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0] - MAX_ENTRIES
+        if excess > 0:
+            conn.execute('''
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY last_access LIMIT ?
+                )
+            ''', (excess,))
+            _count(conn, 'evictions', excess)
+
+
+def cached_completion(model: str, messages: List[Dict[str, str]], params: Dict[str, Any],
+                      complete: Callable[[], str]) -> str:
+    """Cached response for a chat completion; complete() is only called on a miss.
+
+    Exceptions from complete() propagate and nothing is cached. Cache errors are
+    logged and treated as a miss, so the cache never breaks summary generation.
+    """
+    if not ENABLED:
+        return complete()
+    key = cache_key(model, messages, params)
+    try:
+        cached = lookup(key)
+    except sqlite3.Error as e:
+        print(f"[WARNING] LLM cache lookup failed: {e}")
+        cached = None
+    if cached is not None:
+        print(f"[DEBUG] LLM cache hit for {model} ({key[:12]})")
+        return cached
+    response = complete()
+    try:
+        store(key, model, response)
+    except sqlite3.Error as e:
+        print(f"[WARNING] LLM cache store failed: {e}")
+    return response
+
+
+def cache_stats(conn) -> Dict[str, Any]:
+    counters = dict(conn.execute('SELECT name, value FROM llm_cache_stats').fetchall())
+    entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(response)), 0) FROM llm_cache').fetchone()
+    hits = counters.get('hits', 0)
+    misses = counters.get('misses', 0)
+    return {
+        "enabled": ENABLED,
+        "entries": entries,
+        "response_bytes": size,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        "evictions": counters.get('evictions', 0),
+        "expired": counters.get('expired', 0),
+        "ttl_seconds": TTL_SECONDS,
+        "max_entries": MAX_ENTRIES
+    }
+
+
+def clear_cache(conn) -> int:
+    with conn:
+        return conn.execute('DELETE FROM llm_cache').rowcount
@@ -0,0 +1,315 @@
+import os
+import time
+import random
+import secrets
+import threading
+from typing import Any, Dict, List, Optional
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+from db import connection
+
+# Shared OpenAI client for every LLM call (pipeline summaries and the API's GPT summaries).
+# One client per process keeps HTTP connections alive between calls. Requests are
+# bounded by a concurrency semaphore and a token-bucket rate limit, retried with
+# jittered exponential backoff on rate limits, timeouts and server errors (honouring
+# Retry-After), and a circuit breaker stops calling the API after repeated failures
+# so callers switch to their template summaries until the cooldown has passed.
+# The semaphore, bucket and breaker keep their state in SQLite, so the API and the
+# pipeline scripts draw on the same limits instead of each process getting its own.
+# OPENAI_BASE_URL points the client at another endpoint, e.g. mock_llm_server.py.
+
+BASE_URL = os.environ.get("OPENAI_BASE_URL") or None
+TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 30))
+MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 4))
+RATE_PER_MINUTE = float(os.environ.get("LLM_RATE_PER_MINUTE", 60))
+BURST = int(os.environ.get("LLM_BURST", 5))
+MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 3))
+BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", 0.5))
+BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", 8))
+BREAKER_THRESHOLD = int(os.environ.get("LLM_BREAKER_THRESHOLD", 5))
+BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", 60))
+# Concurrency slots held by a process that died mid-request are reclaimed after the request timeout plus this
+SLOT_LEASE_MARGIN = 30
+SLOT_POLL_SECONDS = 0.05
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS llm_buckets (
+        name TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS llm_slots (
+        name TEXT NOT NULL,
+        slot INTEGER NOT NULL,
+        holder TEXT,
+        leased_at REAL,
+        PRIMARY KEY (name, slot)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS llm_breakers (
+        name TEXT PRIMARY KEY,
+        failures INTEGER NOT NULL DEFAULT 0,
+        opened_at REAL,
+        trial INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+]
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while the circuit breaker is open"""
+
+
+def init_llm_limits(conn) -> None:
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+
+class TokenBucket:
+    """Token bucket shared through SQLite: rate tokens per second, up to capacity banked"""
+
+    def __init__(self, rate: float, capacity: int, name: str = "default"):
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        with connection() as conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO llm_buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+                (name, float(capacity), time.time())
+            )
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take a token, waiting up to timeout seconds; returns False if none became available"""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            now = time.time()
+            # Refill and take a token in one statement so processes cannot overdraw the bucket
+            with connection() as conn:
+                taken = conn.execute(
+                    '''
+                    UPDATE llm_buckets SET tokens = MIN(?, tokens + (? - updated_at) * ?) - 1, updated_at = ?
+                    WHERE name = ? AND MIN(?, tokens + (? - updated_at) * ?) >= 1
+                    ''',
+                    (self.capacity, now, self.rate, now, self.name, self.capacity, now, self.rate)
+                ).rowcount
+                if taken:
+                    return True
+                row = conn.execute('SELECT tokens, updated_at FROM llm_buckets WHERE name = ?', (self.name,)).fetchone()
+            tokens = min(self.capacity, row["tokens"] + (now - row["updated_at"]) * self.rate)
+            wait = max(1 - tokens, 0) / self.rate
+            if deadline is not None:
+                if time.time() + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+
+class SharedSemaphore:
+    """Bounded semaphore shared through SQLite: slots are leased rows, expired leases are reclaimed"""
+
+    def __init__(self, value: int, lease_seconds: float, name: str = "default"):
+        self.value = value
+        self.lease_seconds = lease_seconds
+        self.name = name
+        self._held = threading.local()
+        with connection() as conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO llm_slots (name, slot) VALUES (?, ?)', [(name, slot) for slot in range(value)]
+            )
+
+    def __enter__(self):
+        holder = secrets.token_hex(8)
+        while True:
+            now = time.time()
+            with connection() as conn:
+                taken = conn.execute(
+                    '''
+                    UPDATE llm_slots SET holder = ?, leased_at = ?
+                    WHERE name = ? AND slot = (
+                        SELECT slot FROM llm_slots
+                        WHERE name = ? AND slot < ? AND (holder IS NULL OR leased_at < ?) LIMIT 1
+                    )
+                    ''',
+                    (holder, now, self.name, self.name, self.value, now - self.lease_seconds)
+                ).rowcount
+            if taken:
+                self._held.holder = holder
+                return self
+            time.sleep(SLOT_POLL_SECONDS)
+
+    def __exit__(self, *exc_info):
+        with connection() as conn:
+            conn.execute(
+                'UPDATE llm_slots SET holder = NULL, leased_at = NULL WHERE name = ? AND holder = ?',
+                (self.name, self._held.holder)
+            )
+        return False
+
+
+class CircuitBreaker:
+    """Opens after threshold consecutive failures; lets one trial call through after cooldown.
+    State lives in SQLite so every process sharing the database sees the same breaker."""
+
+    def __init__(self, threshold: int, cooldown: float, name: str = "default"):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.name = name
+        with connection() as conn:
+            conn.execute('INSERT OR IGNORE INTO llm_breakers (name) VALUES (?)', (name,))
+
+    def _row(self):
+        with connection() as conn:
+            return conn.execute(
+                'SELECT failures, opened_at, trial FROM llm_breakers WHERE name = ?', (self.name,)
+            ).fetchone()
+
+    @property
+    def failures(self) -> int:
+        return self._row()["failures"]
+
+    @property
+    def state(self) -> str:
+        opened_at = self._row()["opened_at"]
+        if opened_at is None:
+            return "closed"
+        return "half-open" if time.time() - opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        if self._row()["opened_at"] is None:
+            return True
+        # Only one caller, in any process, gets the half-open trial
+        with connection() as conn:
+            return conn.execute(
+                'UPDATE llm_breakers SET trial = 1 WHERE name = ? AND opened_at IS NOT NULL AND opened_at <= ? AND trial = 0',
+                (self.name, time.time() - self.cooldown)
+            ).rowcount == 1
+
+    def record_success(self) -> None:
+        with connection() as conn:
+            conn.execute(
+                'UPDATE llm_breakers SET failures = 0, opened_at = NULL, trial = 0 WHERE name = ?', (self.name,)
+            )
+
+    def record_failure(self) -> None:
+        now = time.time()
+        with connection() as conn:
+            # A failed trial call re-opens the breaker; failures of calls already in flight do not extend it
+            conn.execute(
+                '''
+                UPDATE llm_breakers SET failures = failures + 1, trial = 0,
+                    opened_at = CASE WHEN trial = 1 OR (opened_at IS NULL AND failures + 1 >= ?) THEN ? ELSE opened_at END
+                WHERE name = ?
+                ''',
+                (self.threshold, now, self.name)
+            )
+            row = conn.execute('SELECT failures, opened_at FROM llm_breakers WHERE name = ?', (self.name,)).fetchone()
+        if row["opened_at"] == now:
+            print(f"[WARNING] LLM circuit breaker opened after {row['failures']} consecutive failures")
+
+
+def _retryable(error: Exception) -> bool:
+    if openai is None:
+        return False
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, 'response', None)
+    value = response.headers.get('retry-after') if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LLMClient:
+    """Chat completions through the shared connection pool, limits, retries and breaker"""
+
+    def __init__(self, api_key: str, base_url: Optional[str] = BASE_URL, timeout: float = TIMEOUT):
+        # The SDK's own retries are disabled; chat() retries with the shared limits applied
+        self.client = openai.OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+        with connection() as conn:
+            init_llm_limits(conn)
+        self.semaphore = SharedSemaphore(MAX_CONCURRENCY, timeout + SLOT_LEASE_MARGIN)
+        self.bucket = TokenBucket(RATE_PER_MINUTE / 60, BURST)
+        self.breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+        # Request counters for this process (the limits above are shared)
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "short_circuited": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def chat(self, model: str, messages: List[Dict[str, str]], timeout: Optional[float] = None, **params) -> str:
+        """Content of a chat completion; raises CircuitOpenError while the breaker is open"""
+        for attempt in range(MAX_RETRIES + 1):
+            if not self.breaker.allow():
+                self._count("short_circuited")
+                raise CircuitOpenError("LLM circuit breaker is open")
+            self.bucket.acquire()
+            try:
+                with self.semaphore:
+                    self._count("requests")
+                    response = self.client.chat.completions.create(
+                        model=model, messages=messages, timeout=timeout or TIMEOUT, **params
+                    )
+            except Exception as e:
+                self.breaker.record_failure()
+                if not _retryable(e):
+                    # e.g. 400/401: retrying will not help, but it still counts towards the breaker
+                    self._count("failures")
+                    raise
+                if attempt == MAX_RETRIES:
+                    self._count("failures")
+                    raise
+                # Full jitter keeps a burst of throttled callers from retrying in lockstep
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+                delay = max(delay, _retry_after(e) or 0)
+                self._count("retries")
+                print(f"[WARNING] LLM request failed ({type(e).__name__}), retry {attempt + 1}/{MAX_RETRIES} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return response.choices[0].message.content.strip()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "base_url": BASE_URL or "https://api.openai.com/v1",
+            "breaker": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "max_concurrency": MAX_CONCURRENCY,
+            "rate_per_minute": RATE_PER_MINUTE,
+            **self.stats_snapshot()
+        }
+
+    def stats_snapshot(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self.stats)
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> Optional[LLMClient]:
+    """The process-wide client, or None when the openai package or an API key is missing"""
+    global _client
+    if _client is None:
+        api_key = os.getenv('OPEN_AI_KEY') or os.getenv('OPENAI_API_KEY')
+        if openai is None or not api_key:
+            return None
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient(api_key)
+    return _client
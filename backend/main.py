@@ -1,6 +1,7 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Path, Body
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Path, Body, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
@@ -8,64 +9,116 @@ from typing import List, Optional
 import os
 import json
 from datetime import datetime
-import pandas as pd
 import io
+import sys
 import sqlite3
-from pathlib import Path as FilePath
+import subprocess
+import threading
 import time
+import asyncio
+from contextlib import asynccontextmanager
+from serialization import dumps
+from workers import run_blocking
+from db import get_db, DB_PATH
+import facility_store
+import artifact_catalog
+import review_store
+import anomaly_store
+import retention
+import history_store
+import llm_cache
+import summary_jobs
+import webhook_outbox
+import emissions_report
+import services
+from storage import get_storage, storage_key, verify_signature, warn_unsigned_key, DATA_DIR, SIGNED_URL_TTL
+from manifest import ensure_manifest, resolve_artifact, record_artifacts, manifest_path
+from results_store import (
+    build_results_document, write_results_document, load_results_document,
+    results_document_name, http_validators, is_not_modified
+)
+from anomaly_index import (
+    build_anomaly_index, write_anomaly_index, load_anomaly_index, query_anomaly_index,
+    anomaly_index_name, DEFAULT_PAGE_SIZE
+)
+from exporter import iter_export, EXPORT_MEDIA_TYPES
+from progress import (
+    progress_broker, parse_progress_line, event_stream, init_progress_store, record_pipeline_status,
+    pipeline_status, terminal_event
+)
 
-# Import your existing modules
+# Brotli compression is optional; gzip is used when brotli-asgi is not installed
 try:
-    from emissions_model import EmissionsModel
+    from brotli_asgi import BrotliMiddleware
 except ImportError:
-    class EmissionsModel:
-        def generate_system_report(self):
-            return {"status": "mock_data", "emissions": 150.5}
+    BrotliMiddleware = None
 
-# Import or define DataAnalyzer
-try:
-    from data_analysis import DataAnalyzer
-except ImportError:
-    class DataAnalyzer:
-        def analyze_data(self, df):
-            return {"rows": len(df), "columns": len(df.columns)}
-        def generate_analytics_report(self):
-            return {"analytics": "mock_data"}
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered through the fast serialization path (orjson when available)"""
+    def render(self, content) -> bytes:
+        return dumps(content)
 
-# Import or define AIProcessor
-try:
-    from ai_module import AIProcessor
-except ImportError:
-    class AIProcessor:
-        def process_text(self, text):
-            return {"sentiment": "positive", "keywords": ["mock", "data"]}
+async def retention_loop():
+    """Background retention sweeps (see retention.py)"""
+    while True:
+        await asyncio.sleep(retention.INTERVAL_SECONDS)
+        try:
+            await run_blocking('reports', run_retention_sweep)
+        except Exception as e:
+            print(f"[WARNING] Retention sweep failed: {e}")
 
-# Import or define EnergySummaryGenerator
-try:
-    from summary_generator import EnergySummaryGenerator
-except ImportError:
-    class EnergySummaryGenerator:
-        def generate_summary(self, results):
-            return f"Analysis completed for {results.get('total_records', 0)} records. Found {results.get('anomalies_found', 0)} anomalies."
+def deliver_webhooks():
+    conn = get_db()
+    try:
+        # Emissions workbooks are built on demand: build one before it is posted
+        return webhook_outbox.deliver_due(conn, prepare=emissions_report.prepare_delivery)
+    finally:
+        conn.close()
 
-# Import or define ChatGPTSummaryGenerator
-try:
-    from chatgpt_summary import ChatGPTSummaryGenerator
-    print("[DEBUG] Imported real ChatGPTSummaryGenerator from chatgpt_summary.py")
-except ImportError:
-    print("[WARNING] Could not import real ChatGPTSummaryGenerator, using mock fallback.")
-    class ChatGPTSummaryGenerator:
-        def __init__(self):
-            print("[MOCK] Using mock ChatGPTSummaryGenerator")
-        def generate_summary(self, results):
-            print("[MOCK] Generating mock summary")
-            msg = f"[MOCK SUMMARY] Generate a compliance summary for {results.get('anomalies_found', 0)} flagged out of {results.get('total_records', 0)} records. Give 2 example facilities with their actual, predicted, and deviation."
-            return {"summary_short": msg, "summary_full": msg}
+async def webhook_loop():
+    """Drain the report notification outbox (see webhook_outbox.py)"""
+    while True:
+        try:
+            await run_blocking('webhooks', deliver_webhooks)
+        except Exception as e:
+            print(f"[WARNING] Webhook delivery run failed: {e}")
+        await asyncio.sleep(webhook_outbox.POLL_SECONDS)
+
+# Startup progress reported by /api/ready
+startup_state = {"ready": False, "started_at": time.time(), "startup_seconds": None, "warm_seconds": None,
+                 "error": None}
+
+async def warm_services():
+    """Load the analysis services after startup so the first requests do not pay for it"""
+    timings = await run_blocking('results', services.warm)
+    startup_state.update(ready=True, warm_seconds=round(time.time() - startup_state["started_at"], 3))
+    print(f"[INFO] Services loaded: {timings}")
+
+@asynccontextmanager
+async def lifespan(app):
+    warn_unsigned_key()
+    try:
+        await run_blocking('reports', init_db)
+    except Exception as e:
+        startup_state["error"] = f"{type(e).__name__}: {e}"
+        raise
+    startup_state["startup_seconds"] = round(time.time() - startup_state["started_at"], 3)
+    # Ready once the services are warm; with STARTUP_WARM=0 they load on first use instead
+    warm_task = asyncio.create_task(warm_services()) if services.WARM_ON_STARTUP else None
+    startup_state["ready"] = warm_task is None
+    retention_task = asyncio.create_task(retention_loop()) if retention.INTERVAL_SECONDS > 0 else None
+    webhook_task = asyncio.create_task(webhook_loop()) if webhook_outbox.POLL_SECONDS > 0 else None
+    yield
+    for task in (warm_task, retention_task, webhook_task):
+        if task:
+            task.cancel()
 
 app = FastAPI(
     title="Rayfield Systems API",
     description="Backend API for Rayfield Systems data analysis and anomaly detection",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 frontend_url = os.environ.get("FRONTEND_URL", "*")
@@ -77,39 +130,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
+# Compress large JSON payloads (results, listings); progress streams are sent uncompressed
+# so events are not buffered by the compressor
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=1024, excluded_handlers=[r'/progress$'])
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Security
 security = HTTPBearer(auto_error=False)
 
-# Initialize your existing modules
-emissions_model = EmissionsModel()
-data_analyzer = DataAnalyzer()
-ai_processor = AIProcessor()
-summary_generator = EnergySummaryGenerator()
-
-# Initialize ChatGPT summary generator (with fallback)
-try:
-    print(f"[DEBUG] Attempting to initialize ChatGPTSummaryGenerator")
-    chatgpt_generator = ChatGPTSummaryGenerator()
-    use_chatgpt = True
-    print(f"[INFO] ChatGPTSummaryGenerator initialized successfully")
-except Exception as e:
-    print(f"[WARNING] ChatGPT not available: {e}")
-    print(f"[DEBUG] Exception type: {type(e).__name__}")
-    import traceback
-    print(f"[DEBUG] Full traceback: {traceback.format_exc()}")
-    chatgpt_generator = None
-    use_chatgpt = False
-
-# SQLite database setup
-DATABASE_URL = "sqlite:///./rayfield.db"
-
-def get_db():
-    db_path = FilePath("rayfield.db")
-    conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row
-    return conn
+# SQLite database setup (see db.py)
+def report_dirs():
+    return {
+        "tables": os.path.join(DATA_DIR, "deliverables", "tables"),
+        "logs": os.path.join(DATA_DIR, "deliverables", "logs"),
+        "plots": os.path.join(DATA_DIR, "deliverables", "plots"),
+    }
 
 def init_db():
     """Initialize SQLite database with tables"""
@@ -169,26 +209,22 @@ def init_db():
         VALUES (?, ?, ?)
     ''', ('admin@rayfield.com', 'hashed_password_here', 'Admin User'))
     
-    # Insert sample anomalies
-    sample_anomalies = [
-        ('Unusual Traffic Pattern', 'High', 'Detected abnormal network traffic from IP 192.168.1.45'),
-        ('System Resource Spike', 'Medium', 'CPU usage exceeded 95% for extended period'),
-        ('Authentication Failure', 'High', 'Multiple failed login attempts from unknown location'),
-        ('Database Query Anomaly', 'Low', 'Slow query detected affecting response times')
-    ]
-    
-    for anomaly in sample_anomalies:
-        cursor.execute('''
-            INSERT OR IGNORE INTO anomalies (title, severity, description)
-            VALUES (?, ?, ?)
-        ''', anomaly)
-    
     conn.commit()
+    init_progress_store(conn)
+    facility_store.init_facility_store(conn)
+    artifact_catalog.init_artifact_catalog(conn)
+    review_store.init_review_store(conn)
+    anomaly_store.init_anomaly_store(conn)
+    retention.init_retention(conn)
+    history_store.init_history_indexes(conn)
+    llm_cache.init_llm_cache(conn)
+    webhook_outbox.init_webhook_outbox(conn)
+    summary_jobs.init_summary_jobs(conn)
+    # Catalog files produced before the catalog existed
+    if artifact_catalog.catalog_is_empty(conn):
+        artifact_catalog.sync_from_disk(conn, report_dirs())
     conn.close()
 
-# Initialize database on startup
-init_db()
-
 # Pydantic models for API
 class UserLogin(BaseModel):
     email: str
@@ -236,6 +272,67 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
 async def root():
     return {"message": "Rayfield Systems API is running", "status": "healthy"}
 
+@app.get("/api/ready")
+async def readiness():
+    """Readiness probe: 503 until the analysis services are warmed up; also reports which ones are loaded"""
+    content = {**startup_state, "services": services.status()}
+    return FastJSONResponse(status_code=200 if startup_state["ready"] else 503, content=content)
+
+def create_submission(title: str, category: str, description: str, submission_type: str) -> int:
+    """Insert a submission row and return its id"""
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO submissions (title, category, description, submission_type)
+        VALUES (?, ?, ?, ?)
+    ''', (title, category, description, submission_type))
+    submission_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return submission_id
+
+def store_test_upload(submission_id: int, filename: str, content: bytes) -> dict:
+    """Save a test upload and run the quick CSV analysis (blocking; runs on a worker thread)"""
+    try:
+        # Save file to the configured storage backend
+        file_path = f"uploads/{submission_id}_{filename}"
+        get_storage().write_bytes(file_path, content)
+        
+        # Example: Process CSV files
+        if filename.endswith('.csv'):
+            try:
+                import pandas as pd
+                df = pd.read_csv(io.StringIO(content.decode('utf-8')))
+                df.columns = df.columns.str.strip()
+                # Use your existing data analysis
+                analysis_result = services.get_data_analyzer().analyze_data(df)
+                return {
+                    "filename": filename,
+                    "size": len(content),
+                    "analysis": analysis_result,
+                    "file_path": file_path
+                }
+            except Exception as csv_error:
+                print(f"CSV processing error: {csv_error}")
+                return {
+                    "filename": filename,
+                    "size": len(content),
+                    "analysis": {"error": "CSV processing failed"},
+                    "file_path": file_path
+                }
+        return {
+            "filename": filename,
+            "size": len(content),
+            "file_path": file_path
+        }
+    except Exception as file_error:
+        print(f"File processing error: {file_error}")
+        return {
+            "filename": filename,
+            "size": 0,
+            "error": str(file_error)
+        }
+
 # Test endpoint without authentication
 @app.post("/api/upload/test")
 async def upload_files_test(
@@ -248,67 +345,12 @@ async def upload_files_test(
     try:
         uploaded_files = []
         
-        # Create uploads directory if it doesn't exist
-        os.makedirs("uploads", exist_ok=True)
-        
         # Save submission to database
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO submissions (title, category, description, submission_type)
-            VALUES (?, ?, ?, ?)
-        ''', (title, category, description, 'file'))
-        
-        submission_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        submission_id = await run_blocking('upload', create_submission, title, category, description, 'file')
         
         for file in files:
-            try:
-                # Process file with your existing modules
-                content = await file.read()
-                
-                # Save file to disk (in production, use cloud storage)
-                file_path = f"uploads/{submission_id}_{file.filename}"
-                
-                with open(file_path, "wb") as f:
-                    f.write(content)
-                
-                # Example: Process CSV files
-                if file.filename.endswith('.csv'):
-                    try:
-                        df = pd.read_csv(io.StringIO(content.decode('utf-8')))
-                        df.columns = df.columns.str.strip()
-                        # Use your existing data analysis
-                        analysis_result = data_analyzer.analyze_data(df)
-                        uploaded_files.append({
-                            "filename": file.filename,
-                            "size": len(content),
-                            "analysis": analysis_result,
-                            "file_path": file_path
-                        })
-                    except Exception as csv_error:
-                        print(f"CSV processing error: {csv_error}")
-                        uploaded_files.append({
-                            "filename": file.filename,
-                            "size": len(content),
-                            "analysis": {"error": "CSV processing failed"},
-                            "file_path": file_path
-                        })
-                else:
-                    uploaded_files.append({
-                        "filename": file.filename,
-                        "size": len(content),
-                        "file_path": file_path
-                    })
-            except Exception as file_error:
-                print(f"File processing error: {file_error}")
-                uploaded_files.append({
-                    "filename": file.filename,
-                    "size": 0,
-                    "error": str(file_error)
-                })
+            content = await file.read()
+            uploaded_files.append(await run_blocking('upload', store_test_upload, submission_id, file.filename, content))
         
         return {
             "message": "Files uploaded successfully",
@@ -319,9 +361,9 @@ async def upload_files_test(
         print(f"Upload error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Authentication endpoints
+# Authentication endpoints (plain def: SQLite work runs on FastAPI's thread pool)
 @app.post("/api/auth/login")
-async def login(user_data: UserLogin):
+def login(user_data: UserLogin):
     conn = get_db()
     cursor = conn.cursor()
     
@@ -342,7 +384,7 @@ async def login(user_data: UserLogin):
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
 @app.post("/api/auth/register")
-async def register(user_data: UserRegister):
+def register(user_data: UserRegister):
     conn = get_db()
     cursor = conn.cursor()
     
@@ -371,30 +413,50 @@ async def get_profile(current_user: dict = Depends(get_current_user)):
         "role": "admin"
     }
 
-# Anomaly detection endpoints
+# Anomaly detection endpoints (plain def: SQLite work runs on FastAPI's thread pool)
 @app.get("/api/anomalies")
-async def get_anomalies(current_user: dict = Depends(get_current_user)):
+def get_anomalies(
+    submission_id: Optional[int] = None,
+    severity: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    status: Optional[str] = None,
+    facility: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: int = anomaly_store.DEFAULT_PAGE_SIZE,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Anomalies detected by the pipeline, newest first.
+    Filter by submission, severity (comma-separated), year range, status or facility.
+    Pages hold up to limit anomalies; the next page's cursor is returned in X-Next-Cursor.
+    """
     conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM anomalies ORDER BY created_at DESC')
-    anomalies = cursor.fetchall()
+    anomalies, next_cursor = anomaly_store.list_anomalies(
+        conn,
+        submission_id=submission_id,
+        severity=severity.split(",") if severity else None,
+        year_from=year_from,
+        year_to=year_to,
+        status=status,
+        facility=facility,
+        cursor=cursor,
+        limit=limit
+    )
     conn.close()
-    
-    return [
-        {
-            "id": row['id'],
-            "title": row['title'],
-            "severity": row['severity'],
-            "timestamp": row['created_at'],
-            "description": row['description'],
-            "status": row['status']
-        }
-        for row in anomalies
-    ]
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else {}
+    return FastJSONResponse(content=anomalies, headers=headers)
+
+@app.get("/api/anomalies/counts")
+def count_anomalies(submission_id: Optional[int] = None, current_user: dict = Depends(get_current_user)):
+    """Number of anomalies per severity (of one submission, or of all)"""
+    conn = get_db()
+    counts = anomaly_store.severity_counts(conn, submission_id)
+    conn.close()
+    return counts
 
 @app.get("/api/anomalies/{anomaly_id}")
-async def get_anomaly(anomaly_id: int, current_user: dict = Depends(get_current_user)):
+def get_anomaly(anomaly_id: int, current_user: dict = Depends(get_current_user)):
     conn = get_db()
     cursor = conn.cursor()
     
@@ -405,17 +467,10 @@ async def get_anomaly(anomaly_id: int, current_user: dict = Depends(get_current_
     if not anomaly:
         raise HTTPException(status_code=404, detail="Anomaly not found")
     
-    return {
-        "id": anomaly['id'],
-        "title": anomaly['title'],
-        "severity": anomaly['severity'],
-        "timestamp": anomaly['created_at'],
-        "description": anomaly['description'],
-        "status": anomaly['status']
-    }
+    return anomaly_store.anomaly_record(anomaly)
 
 @app.put("/api/anomalies/{anomaly_id}/status")
-async def update_anomaly_status(
+def update_anomaly_status(
     anomaly_id: int, 
     status: str, 
     current_user: dict = Depends(get_current_user)
@@ -433,13 +488,152 @@ async def update_anomaly_status(
     if not anomaly:
         raise HTTPException(status_code=404, detail="Anomaly not found")
     
-    return {
-        "id": anomaly['id'],
-        "title": anomaly['title'],
-        "severity": anomaly['severity'],
-        "timestamp": anomaly['created_at'],
-        "description": anomaly['description'],
-        "status": anomaly['status']
+    return anomaly_store.anomaly_record(anomaly)
+
+PIPELINE_SCRIPTS = [
+    "csvclean.py",
+    "main_pipeline.py",
+    "yearly_regression.py",
+    "yearly_anomaly_alerts.py",
+    "excel_emissions_report.py"
+]
+
+def set_pipeline_status(submission_id, status: str, message: Optional[str] = None):
+    conn = get_db()
+    try:
+        record_pipeline_status(conn, submission_id, status, message)
+    finally:
+        conn.close()
+
+def load_pipeline_status(submission_id):
+    conn = get_db()
+    try:
+        return pipeline_status(conn, submission_id)
+    finally:
+        conn.close()
+
+def run_pipeline(submission_id: int, file_path: str, anomaly_threshold: str):
+    """Run the pipeline scripts for a submission; returns (pipeline_logs, failed_script, stderr)
+
+    Script output is read line by line and published as progress events for
+    /api/submissions/{id}/progress.
+    """
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    pipeline_logs = []
+    env = os.environ.copy()
+    env["ANOMALY_THRESHOLD"] = anomaly_threshold
+    env["SUBMISSION_ID"] = str(submission_id)
+    env["SUBMISSION_CSV"] = os.path.abspath(file_path)
+    # Scripts write relative deliverables/ paths: run them in the data directory
+    env["RAYFIELD_DATA_DIR"] = DATA_DIR
+    env["RAYFIELD_DB"] = DB_PATH
+    env["PYTHONUNBUFFERED"] = "1"
+    stages = len(PIPELINE_SCRIPTS)
+    set_pipeline_status(submission_id, 'running')
+    for index, script in enumerate(PIPELINE_SCRIPTS):
+        script_path = os.path.join(backend_dir, script)
+        progress_broker.publish(submission_id, 'stage_start', stage=script, stage_index=index + 1,
+                                stages=stages, percent=round(100 * index / stages, 1))
+        proc = subprocess.Popen([sys.executable, script_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                text=True, env=env, cwd=DATA_DIR)
+        # Drain stderr on a helper thread so a chatty script cannot block on a full pipe
+        stderr_lines = []
+        stderr_reader = threading.Thread(target=lambda: stderr_lines.extend(proc.stderr), daemon=True)
+        stderr_reader.start()
+        stdout_lines = []
+        for line in proc.stdout:
+            stdout_lines.append(line)
+            update = parse_progress_line(line)
+            if update:
+                if update.get('total_steps'):
+                    update['percent'] = round(100 * (index + update['step'] / update['total_steps']) / stages, 1)
+                progress_broker.publish(submission_id, update.pop('type'), stage=script, **update)
+        returncode = proc.wait()
+        stderr_reader.join()
+        stdout, stderr = ''.join(stdout_lines), ''.join(stderr_lines)
+        if returncode != 0:
+            pipeline_logs.append({"script": script, "stdout": stdout, "stderr": stderr, "status": "error"})
+            message = stderr.strip().split('\n')[-1][:500]
+            set_pipeline_status(submission_id, 'error', f"{script}: {message}")
+            progress_broker.publish(submission_id, 'error', stage=script, message=message)
+            return pipeline_logs, script, stderr
+        pipeline_logs.append({"script": script, "stdout": stdout, "stderr": stderr, "status": "success"})
+        progress_broker.publish(submission_id, 'stage_finish', stage=script, stage_index=index + 1,
+                                stages=stages, percent=round(100 * (index + 1) / stages, 1))
+    set_pipeline_status(submission_id, 'complete')
+    progress_broker.publish(submission_id, 'complete', percent=100.0)
+    # Summarize off the request path so the first results view does not wait for the LLM
+    schedule_gpt_summary(submission_id)
+    if emissions_report.PREWARM_ON_COMPLETE:
+        emissions_report.prewarm([submission_id])
+    return pipeline_logs, None, None
+
+def process_csv_upload(filename: str, content: bytes, title: str, category: str,
+                       description: str, anomaly_threshold: str):
+    """Store, validate and run the pipeline for one uploaded CSV (blocking; runs on a worker thread).
+
+    Returns the entries for the response's "files" list and the "results" entry, if any.
+    """
+    entries = []
+    # Save submission to database
+    submission_id = create_submission(title, category, description, 'file')
+    file_path = f"uploads/{submission_id}_{filename}"
+    storage = get_storage()
+    storage.write_bytes(file_path, content)
+    local_csv = storage.local_path(file_path)
+    # Validate CSV columns (header only; the pipeline parses the rows)
+    try:
+        import pandas as pd
+        columns = pd.read_csv(local_csv, encoding='latin1', nrows=0).columns.str.strip()
+        required_columns = [
+            'Unit CO2 emissions (non-biogenic)',
+            'Reporting Year'
+        ]
+        missing_cols = [col for col in required_columns if col not in columns]
+        if missing_cols:
+            entries.append({
+                "filename": filename,
+                "size": len(content),
+                "error": f"Missing columns: {', '.join(missing_cols)}",
+                "submission_id": submission_id
+            })
+            return entries, None
+    except Exception as e:
+        entries.append({
+            "filename": filename,
+            "size": len(content),
+            "error": str(e),
+            "submission_id": submission_id
+        })
+        return entries, None
+    # Log upload
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO upload_logs (submission_id, csv_filename, anomaly_threshold)
+        VALUES (?, ?, ?)
+    ''', (submission_id, filename, anomaly_threshold))
+    conn.commit()
+    conn.close()
+    # Run pipeline
+    pipeline_logs, failed_script, stderr = run_pipeline(submission_id, local_csv, anomaly_threshold)
+    if failed_script:
+        entries.append({
+            "filename": filename,
+            "size": len(content),
+            "error": f"Pipeline failed at {failed_script}: {stderr}",
+            "submission_id": submission_id
+        })
+    entries.append({
+        "filename": filename,
+        "size": len(content),
+        "file_path": file_path,
+        "submission_id": submission_id,
+        "pipeline_logs": pipeline_logs
+    })
+    return entries, {
+        "submission_id": submission_id,
+        "filename": filename
     }
 
 # File upload endpoints
@@ -455,99 +649,17 @@ async def upload_files(
     try:
         uploaded_files = []
         results = []
-        os.makedirs("uploads", exist_ok=True)
         for file in files:
             if not file.filename.endswith('.csv'):
                 continue  # Only process CSVs
             content = await file.read()
-            # Save submission to database
-            conn = get_db()
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO submissions (title, category, description, submission_type)
-                VALUES (?, ?, ?, ?)
-            ''', (title, category, description, 'file'))
-            submission_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            file_path = f"uploads/{submission_id}_{file.filename}"
-            with open(file_path, "wb") as f:
-                f.write(content)
-            # Validate CSV columns
-            try:
-                df = pd.read_csv(file_path, encoding='latin1')
-                df.columns = df.columns.str.strip()
-                required_columns = [
-                    'Unit CO2 emissions (non-biogenic)',
-                    'Reporting Year'
-                ]
-                missing_cols = [col for col in required_columns if col not in df.columns]
-                if missing_cols:
-                    uploaded_files.append({
-                        "filename": file.filename,
-                        "size": len(content),
-                        "error": f"Missing columns: {', '.join(missing_cols)}",
-                        "submission_id": submission_id
-                    })
-                    continue
-            except Exception as e:
-                uploaded_files.append({
-                    "filename": file.filename,
-                    "size": len(content),
-                    "error": str(e),
-                    "submission_id": submission_id
-                })
-                continue
-            # Log upload
-            conn = get_db()
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO upload_logs (submission_id, csv_filename, anomaly_threshold)
-                VALUES (?, ?, ?)
-            ''', (submission_id, file.filename, anomaly_threshold))
-            conn.commit()
-            conn.close()
-            # Run pipeline
-            import subprocess
-            import sys
-            backend_dir = os.path.dirname(os.path.abspath(__file__))
-            pipeline_scripts = [
-                "csvclean.py",
-                "main_pipeline.py",
-                "yearly_regression.py",
-                "yearly_anomaly_alerts.py",
-                "excel_emissions_report.py"
-            ]
-            pipeline_logs = []
-            env = os.environ.copy()
-            env["ANOMALY_THRESHOLD"] = anomaly_threshold
-            env["SUBMISSION_ID"] = str(submission_id)
-            env["SUBMISSION_CSV"] = os.path.abspath(file_path)
-            for script in pipeline_scripts:
-                script_path = os.path.join(backend_dir, script)
-                try:
-                    result = subprocess.run([sys.executable, script_path], capture_output=True, text=True, check=True, env=env)
-                    pipeline_logs.append({"script": script, "stdout": result.stdout, "stderr": result.stderr, "status": "success"})
-                except subprocess.CalledProcessError as e:
-                    pipeline_logs.append({"script": script, "stdout": e.stdout, "stderr": e.stderr, "status": "error"})
-                    uploaded_files.append({
-                        "filename": file.filename,
-                        "size": len(content),
-                        "error": f"Pipeline failed at {script}: {e.stderr}",
-                        "submission_id": submission_id
-                    })
-                    break
-            uploaded_files.append({
-                "filename": file.filename,
-                "size": len(content),
-                "file_path": file_path,
-                "submission_id": submission_id,
-                "pipeline_logs": pipeline_logs
-            })
-            results.append({
-                "submission_id": submission_id,
-                "filename": file.filename
-            })
+            entries, result = await run_blocking(
+                'upload', process_csv_upload,
+                file.filename, content, title, category, description, anomaly_threshold
+            )
+            uploaded_files.extend(entries)
+            if result:
+                results.append(result)
         return {
             "message": "Files uploaded and processed.",
             "files": uploaded_files,
@@ -558,7 +670,7 @@ async def upload_files(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/upload/text")
-async def submit_text(
+def submit_text(
     title: str = Form(...),
     content: str = Form(...),
     category: str = Form(...),
@@ -579,7 +691,7 @@ async def submit_text(
         conn.close()
         
         # Process text with AI module
-        ai_result = ai_processor.process_text(content)
+        ai_result = services.get_ai_processor().process_text(content)
         
         return {
             "message": "Text submitted successfully",
@@ -597,6 +709,7 @@ async def generate_system_report(
 ):
     try:
         # Use your existing emissions model
+        emissions_model = await run_blocking('reports', services.get_emissions_model)
         report_data = emissions_model.generate_system_report()
         return {
             "report_type": "system",
@@ -613,6 +726,7 @@ async def generate_analytics_report(
 ):
     try:
         # Use your existing data analysis
+        data_analyzer = await run_blocking('reports', services.get_data_analyzer)
         report_data = data_analyzer.generate_analytics_report()
         return {
             "report_type": "analytics",
@@ -651,148 +765,156 @@ async def process_energy_data(
         "message": "This endpoint is deprecated. Results are available after upload."
     })
 
-# In-memory storage for thresholds and feedback (for demo; replace with DB in production)
-THRESHOLDS = {}
-ANOMALY_FEEDBACK = {}
-
+# Thresholds and anomaly feedback are persisted per submission (see review_store.py).
+# Plain def handlers: FastAPI runs them on its thread pool, so a write waiting on the
+# SQLite busy timeout does not block the event loop.
 @app.get("/api/thresholds/{submission_id}")
-async def get_thresholds(submission_id: str, current_user: dict = Depends(get_current_user)):
-    return THRESHOLDS.get(submission_id, {"anomaly": "auto", "flagged": 15})
+def get_thresholds(submission_id: str, current_user: dict = Depends(get_current_user)):
+    conn = get_db()
+    thresholds = review_store.get_thresholds(conn, submission_id)
+    conn.close()
+    return thresholds
 
 @app.post("/api/thresholds/{submission_id}")
-async def set_thresholds(submission_id: str, thresholds: dict = Body(...), current_user: dict = Depends(get_current_user)):
-    THRESHOLDS[submission_id] = thresholds
+def set_thresholds(submission_id: str, thresholds: dict = Body(...), current_user: dict = Depends(get_current_user)):
+    conn = get_db()
+    review_store.set_thresholds(conn, submission_id, thresholds)
+    conn.close()
     return {"status": "ok", "thresholds": thresholds}
 
 @app.post("/api/anomaly-feedback/{submission_id}/{anomaly_id}")
-async def submit_anomaly_feedback(submission_id: str, anomaly_id: int, feedback: dict = Body(...), current_user: dict = Depends(get_current_user)):
-    key = f"{submission_id}:{anomaly_id}"
-    ANOMALY_FEEDBACK[key] = feedback
+def submit_anomaly_feedback(submission_id: str, anomaly_id: int, feedback: dict = Body(...), current_user: dict = Depends(get_current_user)):
+    conn = get_db()
+    review_store.set_feedback(conn, submission_id, anomaly_id, feedback)
+    conn.close()
     return {"status": "ok", "feedback": feedback}
 
 @app.get("/api/anomaly-feedback/{submission_id}/{anomaly_id}")
-async def get_anomaly_feedback(submission_id: str, anomaly_id: int, current_user: dict = Depends(get_current_user)):
-    key = f"{submission_id}:{anomaly_id}"
-    return ANOMALY_FEEDBACK.get(key, {})
+def get_anomaly_feedback(submission_id: str, anomaly_id: int, current_user: dict = Depends(get_current_user)):
+    conn = get_db()
+    feedback = review_store.get_feedback(conn, submission_id, anomaly_id)
+    conn.close()
+    return feedback
 
-@app.get("/api/submissions/{submission_id}/results")
-async def get_submission_results(
-    submission_id: str,
-    current_user: dict = Depends(get_current_user)
-):
-    import os
-    import pandas as pd
-    import time
-    # Check both possible locations for the files
-    results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deliverables', 'tables')
-    summary_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deliverables', 'logs')
-    # Also check the nested backend/deliverables location
-    results_dir_nested = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'deliverables', 'tables')
-    summary_dir_nested = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'deliverables', 'logs')
-    # Try primary location first, then nested location
-    anomalies_path = os.path.join(results_dir, f'final_output_with_anomalies_{submission_id}.csv')
-    summary_path = os.path.join(summary_dir, f'weekly_summary_{submission_id}.txt')
-    chart_path = os.path.join(results_dir, f'features_{submission_id}.csv')
-    
-    # If not found in primary location, try nested location
-    if not os.path.exists(anomalies_path):
-        anomalies_path = os.path.join(results_dir_nested, f'final_output_with_anomalies_{submission_id}.csv')
-    if not os.path.exists(summary_path):
-        summary_path = os.path.join(summary_dir_nested, f'weekly_summary_{submission_id}.txt')
-    if not os.path.exists(chart_path):
-        chart_path = os.path.join(results_dir_nested, f'features_{submission_id}.csv')
-    
-    # Check for per-submission files only; do not fallback to global
+@app.get("/api/anomaly-feedback/{submission_id}")
+def list_anomaly_feedback(submission_id: str, current_user: dict = Depends(get_current_user)):
+    """All feedback recorded for a submission, keyed by anomaly id"""
+    conn = get_db()
+    feedback = review_store.submission_feedback(conn, submission_id)
+    conn.close()
+    return FastJSONResponse(content=feedback)
+
+def touch_submission(submission_id: str) -> None:
+    """Mark a submission as recently used for retention"""
+    conn = get_db()
+    retention.touch(conn, submission_id)
+    conn.close()
+
+def generate_gpt_summary(submission_id: str) -> str:
+    """Generate and persist a submission's GPT summary (summary job; runs on a summary worker thread)"""
+    manifest = ensure_manifest(submission_id)
+    if resolve_artifact(manifest, 'gpt_summary'):
+        return summary_jobs.READY
+    results_doc_path = resolve_artifact(manifest, 'results_document')
+    summary_path = resolve_artifact(manifest, 'weekly_summary')
+    if not results_doc_path or not summary_path:
+        raise FileNotFoundError(f"Results for submission {submission_id} are not recorded")
+    doc = load_results_document(results_doc_path)
+    analysis_results = {
+        "anomalies_found": doc["anomalies_found"],
+        "total_records": doc["total_records"],
+        "processing_time": doc["processing_time"],
+        "anomalies_data": doc["anomalies_data"],
+        "digest": doc.get("digest")
+    }
+    summary_dict = services.get_chatgpt_generator().generate_summary(analysis_results)
+    if "[MOCK SUMMARY]" in summary_dict.get("summary_short", ""):
+        print(f"[WARNING] Mock summary generated. Not persisting summary for submission {submission_id}.")
+        return summary_jobs.FALLBACK
+    if summary_dict.get("fallback"):
+        # OpenAI failed or missed the deadline; keep serving the pipeline summary and retry later
+        print(f"[WARNING] Template summary generated for submission {submission_id}; not persisting it.")
+        return summary_jobs.FALLBACK
+    summary_full = summary_dict.get("summary_full") or summary_dict.get("summary_short", "")
+    # Persist the full summary next to the weekly summary
+    gpt_summary_path = os.path.join(os.path.dirname(summary_path), f'summary_gpt_{submission_id}.txt')
+    with open(gpt_summary_path, 'w') as f:
+        f.write(summary_full)
+    record_artifacts(submission_id, {'gpt_summary': gpt_summary_path})
+    print(f"[INFO] Generated and persisted ChatGPT summary for submission {submission_id}")
+    return summary_jobs.READY
+
+def schedule_gpt_summary(submission_id, force: bool = False) -> str:
+    """Start background summary generation (single-flight per submission); returns the summary status"""
+    if services.get_chatgpt_generator() is None:
+        return "unavailable"
+    return summary_jobs.schedule(submission_id, lambda: generate_gpt_summary(str(submission_id)), force=force)
+
+def results_validators(submission_id, paths, summary_status: Optional[str]):
+    """Results validators; summary status changes alter the ETag and advance Last-Modified so polls see them"""
+    validators = http_validators(paths, modified_at=summary_jobs.changed_at(submission_id) or 0.0)
+    if summary_status and summary_status != "ready":
+        validators["ETag"] = f'{validators["ETag"][:-1]}-{summary_status}"'
+    return validators
+
+def load_submission_results(submission_id: str, request_headers) -> Response:
+    """Build the results response for a submission (blocking; runs on a worker thread)"""
+    touch_submission(submission_id)
+    # Resolve every artifact through the submission's manifest; no directory probing
+    manifest = ensure_manifest(submission_id)
+    results_doc_path = resolve_artifact(manifest, 'results_document')
+    anomalies_path = resolve_artifact(manifest, 'anomalies')
+    summary_path = resolve_artifact(manifest, 'weekly_summary')
+    gpt_summary_path = resolve_artifact(manifest, 'gpt_summary')
     missing = []
-    if not os.path.exists(anomalies_path):
-        print(f"[ERROR] Per-submission anomalies file not found: {anomalies_path}")
+    if not results_doc_path and not anomalies_path:
+        print(f"[ERROR] Per-submission results not recorded for submission {submission_id}")
         missing.append('anomalies')
-    if not os.path.exists(summary_path):
-        print(f"[ERROR] Per-submission summary file not found: {summary_path}")
+    if not summary_path:
+        print(f"[ERROR] Per-submission summary not recorded for submission {submission_id}")
         missing.append('summary')
-    if not os.path.exists(chart_path):
-        print(f"[ERROR] Per-submission chart file not found: {chart_path}")
-        missing.append('chart')
     if missing:
         return JSONResponse(status_code=404, content={
             "message": f"Analysis results not available for submission {submission_id}. Missing: {', '.join(missing)}. Please check your upload or contact support.",
             "missing": missing
         })
-    start_time = time.time()
+    # The manifest changes whenever an artifact (e.g. the GPT summary) is recorded
+    validated_paths = [results_doc_path, summary_path, manifest_path(submission_id)]
+    # Answer dashboard polls from the file validators without touching the document
+    summary_status = "ready" if gpt_summary_path else None
+    if results_doc_path:
+        summary_status = summary_status or schedule_gpt_summary(submission_id)
+        validators = results_validators(submission_id, validated_paths, summary_status)
+        if is_not_modified(request_headers, validators):
+            return Response(status_code=304, headers=validators)
     try:
-        anomalies_data = []
-        total_records = 0
-        anomalies_found = 0
-        df = pd.read_csv(anomalies_path)
-        df.columns = df.columns.str.strip()
-        print(f"[DEBUG] Loaded anomalies file: {anomalies_path}, shape={df.shape}")
-        total_records = int(len(df))
-        if 'Anomaly' in df.columns:
-            anomalies_found = int((df['Anomaly'] == True).sum())
+        if results_doc_path:
+            doc = load_results_document(results_doc_path)
         else:
-            print(f"[DEBUG] 'Anomaly' column not found in {anomalies_path}")
-        max_anomalies = 100
-        anomaly_rows = [row for idx, row in df.iterrows() if row.get('Anomaly', False) == True]
-        for idx, row in enumerate(anomaly_rows[:max_anomalies]):
-            facility = row.get("Facility Name", "Unknown")
-            year = row.get("Reporting Year", "Unknown")
-            try:
-                year = int(year)
-            except Exception:
-                year = str(year)
-            # Handle column name with or without trailing space
-            co2_col = None
-            for col in row.index:
-                if col.strip() == "Unit CO2 emissions (non-biogenic)":
-                    co2_col = col
-                    break
-            emission_value = row.get(co2_col, 0) if co2_col else 0
-            try:
-                emission_value = float(emission_value)
-            except Exception:
-                emission_value = 0.0
-            deviation = None
-            try:
-                deviation = float(row.get("Deviation (%)", row.get("Deviation (%) ", 0)))
-            except Exception:
-                deviation = None
-            if deviation is not None:
-                if abs(deviation) >= 30:
-                    severity = "High"
-                elif abs(deviation) >= 15:
-                    severity = "Medium"
-                else:
-                    severity = "Low"
-            else:
-                severity = "High"
-            anomaly_dict = {
-                "id": int(idx),
-                "facility": str(facility),
-                "year": year,
-                "emission_value": emission_value,
-                "severity": severity,
-                "timestamp": f"{year}-01-01T00:00:00Z"
-            }
-            for k, v in row.items():
-                if k not in anomaly_dict:
-                    # Handle nan values for JSON serialization
-                    if pd.isna(v):
-                        anomaly_dict[k] = None
-                    elif isinstance(v, (int, float)):
-                        # Convert to native Python types to avoid numpy/pandas serialization issues
-                        anomaly_dict[k] = float(v) if isinstance(v, float) else int(v)
-                    else:
-                        anomaly_dict[k] = str(v) if v is not None else None
-            anomalies_data.append(anomaly_dict)
-        # Calculate processing time before summary generation
-        processing_time = time.time() - start_time
+            # Submissions processed before results documents existed: materialize once
+            import pandas as pd
+            from prompt_digest import build_digest
+            start_time = time.time()
+            df = pd.read_csv(anomalies_path)
+            doc = build_results_document(df, submission_id)
+            doc["digest"] = build_digest(df)
+            doc["processing_time"] = time.time() - start_time
+            results_doc_path = os.path.join(os.path.dirname(anomalies_path), results_document_name(submission_id))
+            write_results_document(doc, results_doc_path)
+            record_artifacts(submission_id, {'results_document': results_doc_path})
+            validated_paths[0] = results_doc_path
+            print(f"[INFO] Materialized results document for submission {submission_id}")
+            # The summary job reads the results document, so start it once that exists
+            summary_status = summary_status or schedule_gpt_summary(submission_id)
+        anomalies_data = doc["anomalies_data"]
+        anomalies_found = doc["anomalies_found"]
+        total_records = doc["total_records"]
+        processing_time = doc["processing_time"]
         
-        # Generate summary using ChatGPT if available, otherwise use file
+        # Serve the persisted GPT summary if there is one; otherwise it is generated in the background
         summary = None
         summary_full = None
-        gpt_summary_path = os.path.join(summary_dir, f'summary_gpt_{submission_id}.txt')
-        # 1. Try to load persisted GPT summary
-        if os.path.exists(gpt_summary_path):
+        if gpt_summary_path:
             try:
                 with open(gpt_summary_path, 'r') as f:
                     summary_full = f.read()
@@ -800,53 +922,11 @@ async def get_submission_results(
                 summary = next((line for line in summary_full.split('\n') if line.strip()), "")
                 if not summary and summary_full:
                     summary = summary_full[:200]
-                print(f"[DEBUG] Returning summary: {summary[:100]}")
-                print(f"[DEBUG] Returning summary_full: {summary_full[:100]}")
-                print(f"[INFO] Loaded persisted GPT summary for submission {submission_id}")
             except Exception as e:
                 print(f"[WARNING] Could not read persisted GPT summary: {e}")
                 summary = None
                 summary_full = None
-        # 2. If not found, generate and persist using ChatGPT
-        if summary is None and use_chatgpt and chatgpt_generator:
-            try:
-                print(f"[DEBUG] Attempting ChatGPT summary generation for submission {submission_id}")
-                print(f"[DEBUG] ChatGPT available: {use_chatgpt}, generator: {chatgpt_generator}")
-                analysis_results = {
-                    "anomalies_found": anomalies_found,
-                    "total_records": total_records,
-                    "processing_time": processing_time,
-                    "anomalies_data": anomalies_data
-                }
-                print(f"[DEBUG] Analysis results for ChatGPT: {analysis_results}")
-                summary_dict = chatgpt_generator.generate_summary(analysis_results)
-                # Check if this is a mock summary
-                is_mock = False
-                if summary_dict and isinstance(summary_dict, dict):
-                    short = summary_dict.get("summary_short", "")
-                    if "[MOCK SUMMARY]" in short:
-                        is_mock = True
-                if is_mock:
-                    print(f"[WARNING] Mock summary generated. Not persisting summary for submission {submission_id}.")
-                    summary = None
-                    summary_full = None
-                else:
-                    summary = summary_dict.get("summary_short", "")
-                    summary_full = summary_dict.get("summary_full", summary)
-                    print(f"[DEBUG] ChatGPT summary generated successfully, short length: {len(summary) if summary else 0}, full length: {len(summary_full) if summary_full else 0}")
-                    # Persist the full summary
-                    os.makedirs(summary_dir, exist_ok=True)
-                    with open(gpt_summary_path, 'w') as f:
-                        f.write(summary_full)
-                    print(f"[INFO] Generated and persisted ChatGPT summary for submission {submission_id}")
-            except Exception as e:
-                print(f"[WARNING] ChatGPT summary generation failed: {e}")
-                print(f"[DEBUG] Exception type: {type(e).__name__}")
-                print(f"[DEBUG] Exception details: {str(e)}")
-                import traceback
-                print(f"[DEBUG] Full traceback: {traceback.format_exc()}")
-                summary = None
-                summary_full = None
+                summary_status = "failed"
         # 3. Fallback to file-based summary
         if summary is None:
             try:
@@ -857,79 +937,19 @@ async def get_submission_results(
                 print(f"[ERROR] Could not read summary file: {e}")
                 summary = f"Analysis completed for {total_records} records. Found {anomalies_found} anomalies."
                 summary_full = summary
-        chart_data = None
-        chart_df = pd.read_csv(chart_path)
-        chart_df.columns = chart_df.columns.str.strip()
-        labels_raw = chart_df["Reporting Year"].tolist()[:100]
-        # Handle nan values in labels list
-        labels = []
-        for val in labels_raw:
-            if pd.isna(val):
-                labels.append(None)
-            elif isinstance(val, (int, float)):
-                labels.append(int(val) if isinstance(val, float) and val.is_integer() else val)
-            else:
-                labels.append(str(val) if val is not None else None)
-        # Handle column name with or without trailing space
-        co2_col = None
-        for col in chart_df.columns:
-            if col.strip() == "Unit CO2 emissions (non-biogenic)":
-                co2_col = col
-                break
-        emissions_raw = chart_df[co2_col].tolist()[:100] if co2_col else []
-        # Handle nan values in emissions list
-        emissions = []
-        for val in emissions_raw:
-            if pd.isna(val):
-                emissions.append(None)
-            elif isinstance(val, (int, float)):
-                emissions.append(float(val) if isinstance(val, float) else int(val))
-            else:
-                emissions.append(str(val) if val is not None else None)
-        anomaly_years = set(a["year"] for a in anomalies_data)
-        anomaly_indices = [i for i, y in enumerate(labels) if y in anomaly_years]
-        chart_data = {
-            "labels": labels,
-            "emissions": emissions,
-            "anomaly_indices": anomaly_indices
-        }
-        metrics = None
-        anomaly_warning = ''
-        if 'R2' in df.columns and 'RMSE' in df.columns:
-            r2_val = df['R2'].iloc[0]
-            rmse_val = df['RMSE'].iloc[0]
-            # Handle nan values in metrics
-            metrics = {
-                "r2": float(r2_val) if not pd.isna(r2_val) else None,
-                "rmse": float(rmse_val) if not pd.isna(rmse_val) else None
-            }
-        if 'Anomaly Explanation' in df.columns:
-            for a in anomalies_data:
-                idx = a.get('id', None)
-                if idx is not None and idx < len(df):
-                    explanation = df.iloc[idx].get('Anomaly Explanation', '')
-                    # Handle nan values in explanation
-                    if pd.isna(explanation):
-                        a['explanation'] = ''
-                    else:
-                        a['explanation'] = str(explanation)
-        anomaly_count = int((df['Anomaly'] == True).sum()) if 'Anomaly' in df.columns else 0
-        if anomaly_count == 0:
-            anomaly_warning = 'No anomalies detected. Consider lowering the threshold.'
-        elif anomaly_count == len(df):
-            anomaly_warning = 'All points flagged as anomalies. Consider raising the threshold.'
-        return {
+        return FastJSONResponse(content={
             "submission_id": str(submission_id),
-            "anomalies_found": int(anomalies_found),
-            "total_records": int(total_records),
-            "processing_time": float(processing_time),
+            "anomalies_found": anomalies_found,
+            "total_records": total_records,
+            "processing_time": processing_time,
             "anomalies_data": anomalies_data,
             "summary": summary,
             "summary_full": summary_full,
-            "chart_data": chart_data,
-            "metrics": metrics,
-            "anomaly_warning": anomaly_warning
-        }
+            "summary_status": summary_status,
+            "chart_data": doc["chart_data"],
+            "metrics": doc["metrics"],
+            "anomaly_warning": doc["anomaly_warning"]
+        }, headers=results_validators(submission_id, validated_paths, summary_status))
     except Exception as e:
         print(f"[DEBUG] Exception in get_submission_results: {e}")
         return JSONResponse(status_code=500, content={
@@ -937,41 +957,356 @@ async def get_submission_results(
             "error": str(e)
         })
 
+@app.post("/api/submissions/{submission_id}/summary")
+def retry_submission_summary(submission_id: str, current_user: dict = Depends(get_current_user)):
+    """Retry background GPT summary generation now instead of after the retry delay"""
+    return {"submission_id": submission_id, "summary_status": schedule_gpt_summary(submission_id, force=True)}
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@app.get("/api/submissions/{submission_id}/progress")
+async def stream_submission_progress(
+    submission_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Server-Sent Events with a submission's pipeline progress: stage start/finish,
+    step markers with row counts and percentages, and warnings. Events already
+    published are replayed first; the stream ends after the complete or error event.
+    A submission whose pipeline already finished gets its stored final status as
+    the only event; unknown submissions are a 404.
+    """
+    if await run_blocking('results', load_pipeline_status, submission_id) is None:
+        raise HTTPException(status_code=404, detail=f"Submission {submission_id} not found")
+
+    async def finished():
+        status = await run_blocking('results', load_pipeline_status, submission_id)
+        return terminal_event(submission_id, status) if status is not None else None
+
+    return StreamingResponse(event_stream(progress_broker, submission_id, finished=finished),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.get("/api/pipeline/progress")
+async def stream_pipeline_progress(current_user: dict = Depends(get_current_user)):
+    """Server-Sent Events with the progress of every running submission (e.g. for an upload started elsewhere)"""
+    return StreamingResponse(event_stream(progress_broker), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.get("/api/submissions/{submission_id}/results")
+async def get_submission_results(
+    submission_id: str,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    return await run_blocking('results', load_submission_results, submission_id, request.headers)
+
+def load_submission_anomaly_index(submission_id: str):
+    """Load a submission's anomaly index, building it for older submissions; None if unavailable"""
+    touch_submission(submission_id)
+    manifest = ensure_manifest(submission_id)
+    index_path = resolve_artifact(manifest, 'anomaly_index')
+    if not index_path:
+        anomalies_path = resolve_artifact(manifest, 'anomalies')
+        if not anomalies_path:
+            return None
+        # Submissions processed before anomaly indexes existed: build it once
+        import pandas as pd
+        index_path = os.path.join(os.path.dirname(anomalies_path), anomaly_index_name(submission_id))
+        write_anomaly_index(build_anomaly_index(pd.read_csv(anomalies_path), submission_id), index_path)
+        record_artifacts(submission_id, {'anomaly_index': index_path})
+        print(f"[INFO] Built anomaly index for submission {submission_id}")
+    return load_anomaly_index(index_path)
+
+@app.get("/api/submissions/{submission_id}/anomalies")
+async def list_submission_anomalies(
+    submission_id: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    sort: str = "row",
+    order: str = "asc",
+    facility: Optional[str] = None,
+    year: Optional[int] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    severity: Optional[str] = None,
+    min_deviation: Optional[float] = None,
+    max_deviation: Optional[float] = None,
+    min_abs_deviation: Optional[float] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Page through every anomaly of a submission, with filters and sorting.
+    Served from the per-submission anomaly index written by the pipeline.
+    """
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    rows = await run_blocking('results', load_submission_anomaly_index, submission_id)
+    if rows is None:
+        raise HTTPException(status_code=404, detail=f"Anomalies not available for submission {submission_id}")
+    try:
+        page = query_anomaly_index(
+            rows,
+            facility=facility,
+            year=year,
+            year_from=year_from,
+            year_to=year_to,
+            severity=severity.split(",") if severity else None,
+            min_deviation=min_deviation,
+            max_deviation=max_deviation,
+            min_abs_deviation=min_abs_deviation,
+            sort=sort,
+            order=order,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(content={"submission_id": str(submission_id), **page})
+
+@app.get("/api/submissions/{submission_id}/export")
+async def export_submission_rows(
+    submission_id: str,
+    format: str = "ndjson",
+    columns: Optional[str] = None,
+    anomalies_only: bool = False,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream a submission's flagged output as NDJSON or CSV.
+    Supports column selection, anomalies-only and reporting-year range filters.
+    """
+    await run_blocking('export', touch_submission, submission_id)
+    anomalies_path = resolve_artifact(await run_blocking('export', ensure_manifest, submission_id), 'anomalies')
+    if not anomalies_path:
+        raise HTTPException(status_code=404, detail=f"Output not available for submission {submission_id}")
+    try:
+        rows = await run_blocking(
+            'export', iter_export,
+            anomalies_path,
+            fmt=format,
+            columns=[c.strip() for c in columns.split(",") if c.strip()] if columns else None,
+            anomalies_only=anomalies_only,
+            year_from=year_from,
+            year_to=year_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = f"submission_{submission_id}{'_anomalies' if anomalies_only else ''}.{format}"
+    return StreamingResponse(rows, media_type=EXPORT_MEDIA_TYPES[format], headers={
+        "Content-Disposition": f'attachment; filename="{filename}"'
+    })
+
+@app.get("/api/submissions/{submission_id}/report.xlsx")
+async def download_emissions_report(
+    submission_id: int,
+    gwp_ch4: float = emissions_report.DEFAULT_GWP_CH4,
+    groupings: Optional[str] = None,
+    include_raw: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Emissions workbook for a submission, built on first request and cached per parameter set.
+    groupings is a comma-separated list of sheet names (e.g. "By Facility,By Quarter").
+    """
+    if gwp_ch4 <= 0:
+        raise HTTPException(status_code=400, detail="gwp_ch4 must be positive")
+    selected = [g.strip() for g in groupings.split(",") if g.strip()] if groupings else None
+    await run_blocking('reports', touch_submission, submission_id)
+    try:
+        path = await run_blocking('reports', emissions_report.build_report, submission_id,
+                                  gwp_ch4=gwp_ch4, groupings=selected, include_raw=include_raw)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    storage = get_storage()
+    if storage.name == "s3":
+        return RedirectResponse(storage.download_url(storage_key(path)), status_code=307)
+    return FileResponse(path, filename=os.path.basename(path))
+
+@app.post("/api/reports/excel/prewarm")
+def prewarm_emissions_reports(
+    submission_ids: Optional[List[int]] = Body(None, embed=True),
+    limit: int = 5,
+    current_user: dict = Depends(get_current_user)
+):
+    """Build default emissions workbooks in the background (recently viewed and created submissions if none are given)"""
+    if not submission_ids:
+        conn = get_db()
+        submission_ids = emissions_report.likely_submissions(conn, limit=max(1, min(limit, 50)))
+        conn.close()
+    emissions_report.prewarm(submission_ids)
+    return {"status": "scheduled", "submission_ids": submission_ids}
+
+# Retention endpoints
+def run_retention_sweep() -> dict:
+    conn = get_db()
+    try:
+        return retention.run_retention(conn)
+    finally:
+        conn.close()
+
+@app.post("/api/retention/run")
+async def run_retention_now(current_user: dict = Depends(get_current_user)):
+    """Run a retention sweep now and report what was evicted"""
+    return await run_blocking('reports', run_retention_sweep)
+
+@app.get("/api/retention/evictions")
+def list_retention_evictions(
+    submission_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = retention.DEFAULT_PAGE_SIZE,
+    current_user: dict = Depends(get_current_user)
+):
+    """Files removed by retention, newest first; the next page cursor is returned in X-Next-Cursor"""
+    conn = get_db()
+    rows, next_cursor = retention.list_evictions(conn, submission_id=submission_id, cursor=cursor, limit=limit)
+    conn.close()
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else {}
+    return FastJSONResponse(content=rows, headers=headers)
+
+@app.post("/api/submissions/{submission_id}/pin")
+def pin_submission(submission_id: int, current_user: dict = Depends(get_current_user)):
+    """Protect a submission's files from retention"""
+    conn = get_db()
+    retention.pin(conn, submission_id)
+    conn.close()
+    return {"status": "ok", "submission_id": submission_id, "pinned": True}
+
+@app.delete("/api/submissions/{submission_id}/pin")
+def unpin_submission(submission_id: int, current_user: dict = Depends(get_current_user)):
+    conn = get_db()
+    retention.unpin(conn, submission_id)
+    conn.close()
+    return {"status": "ok", "submission_id": submission_id, "pinned": False}
+
+# Cross-submission facility history endpoints
+@app.get("/api/facilities/anomaly-recurrence")
+def get_anomaly_recurrence(
+    min_submissions: int = 2,
+    limit: int = 100,
+    current_user: dict = Depends(get_current_user)
+):
+    """Facilities flagged as anomalous in at least min_submissions different uploads"""
+    conn = get_db()
+    rows = facility_store.anomaly_recurrence(conn, min_submissions=min_submissions, limit=min(limit, 1000))
+    conn.close()
+    return FastJSONResponse(content=rows)
+
+@app.get("/api/facilities/{facility}/history")
+def get_facility_history(
+    facility: str,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    limit: int = 1000,
+    current_user: dict = Depends(get_current_user)
+):
+    """All recorded rows for a facility (by facility id or exact name) across every upload"""
+    conn = get_db()
+    rows = facility_store.facility_history(conn, facility, year_from=year_from, year_to=year_to, limit=min(limit, 10000))
+    conn.close()
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"No history found for facility {facility}")
+    return FastJSONResponse(content={"facility": facility, "records": rows})
+
+@app.get("/api/sectors/trends")
+def get_sector_trends(
+    sector: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Per-sector, per-year emission totals and anomaly counts across every upload"""
+    conn = get_db()
+    rows = facility_store.sector_trends(conn, sector=sector, year_from=year_from, year_to=year_to)
+    conn.close()
+    return FastJSONResponse(content=rows)
+
 @app.get("/api/submissions/history")
-async def get_submission_history(current_user: dict = Depends(get_current_user)):
+def get_submission_history(
+    category: Optional[str] = None,
+    title: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = history_store.DEFAULT_PAGE_SIZE,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Submissions newest first, filtered by category, title (substring) and created date range.
+    Pages hold up to limit rows; the next page's cursor is returned in X-Next-Cursor.
+    """
     conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, title, category, description, created_at, file_path FROM submissions ORDER BY created_at DESC')
-    submissions = cursor.fetchall()
+    try:
+        submissions, next_cursor = history_store.submission_history(
+            conn, category=category, title=title, date_from=date_from, date_to=date_to, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        conn.close()
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return FastJSONResponse(content=submissions, headers=headers)
+
+@app.get("/api/submissions/count")
+def count_submissions(
+    category: Optional[str] = None,
+    title: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Number of submissions matching the history filters"""
+    conn = get_db()
+    count = history_store.count_submissions(conn, category=category, title=title, date_from=date_from, date_to=date_to)
     conn.close()
-    history = []
-    for row in submissions:
-        history.append({
-            "id": row[0],
-            "title": row[1],
-            "category": row[2],
-            "description": row[3],
-            "created_at": row[4],
-            "file_path": row[5],
-        })
-    return history
+    return {"count": count}
 
 @app.get("/api/upload/logs")
-async def get_upload_logs(current_user: dict = Depends(get_current_user)):
+def get_upload_logs(
+    submission_id: Optional[int] = None,
+    category: Optional[str] = None,
+    title: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = history_store.DEFAULT_PAGE_SIZE,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Upload log entries newest first, filtered by submission, its category or title, and date range.
+    Pages hold up to limit rows; the next page's cursor is returned in X-Next-Cursor.
+    """
     conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute('SELECT submission_id, csv_filename, anomaly_threshold, created_at FROM upload_logs ORDER BY created_at DESC')
-    logs = cursor.fetchall()
+    try:
+        logs, next_cursor = history_store.upload_logs(
+            conn, submission_id=submission_id, category=category, title=title,
+            date_from=date_from, date_to=date_to, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        conn.close()
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return FastJSONResponse(content=logs, headers=headers)
+
+@app.get("/api/upload/logs/count")
+def count_upload_logs(
+    submission_id: Optional[int] = None,
+    category: Optional[str] = None,
+    title: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Number of upload log entries matching the upload log filters"""
+    conn = get_db()
+    count = history_store.count_upload_logs(
+        conn, submission_id=submission_id, category=category, title=title, date_from=date_from, date_to=date_to
+    )
     conn.close()
-    return [
-        {
-            "submission_id": row[0],
-            "csv_filename": row[1],
-            "anomaly_threshold": row[2],
-            "created_at": row[3],
-        }
-        for row in logs
-    ]
+    return {"count": count}
 
 # Serve static files for frontend
 @app.get("/static/{path:path}")
@@ -979,35 +1314,40 @@ async def serve_static(path: str):
     return FileResponse(f"static/{path}")
 
 @app.get("/api/reports/list")
-async def list_reports(current_user: dict = Depends(get_current_user)):
+def list_reports(
+    type: Optional[str] = None,
+    submission_id: Optional[int] = None,
+    name: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: int = artifact_catalog.DEFAULT_PAGE_SIZE,
+    current_user: dict = Depends(get_current_user)
+):
     """
-    List available report files from deliverables/tables, deliverables/logs, and deliverables/plots.
-    Returns metadata: name, type, size, modified date, and download path.
+    List report files registered in the artifact catalog, newest first.
+    Returns metadata: name, type, size, modified date, checksum and download path.
+    Filter by type, submission_id or name; pass the X-Next-Cursor header value as cursor for the next page.
     """
-    base_dirs = {
-        "tables": os.path.join(os.path.dirname(os.path.abspath(__file__)), "deliverables", "tables"),
-        "logs": os.path.join(os.path.dirname(os.path.abspath(__file__)), "deliverables", "logs"),
-        "plots": os.path.join(os.path.dirname(os.path.abspath(__file__)), "deliverables", "plots"),
-    }
-    report_files = []
-    for rtype, dir_path in base_dirs.items():
-        if not os.path.exists(dir_path):
-            continue
-        for fname in os.listdir(dir_path):
-            if fname.startswith("."):
-                continue
-            fpath = os.path.join(dir_path, fname)
-            if not os.path.isfile(fpath):
-                continue
-            stat = os.stat(fpath)
-            report_files.append({
-                "name": fname,
-                "type": rtype,
-                "size": stat.st_size,
-                "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                "download_url": f"/api/reports/download/{rtype}/{fname}"
-            })
-    return report_files
+    if type is not None and type not in artifact_catalog.ARTIFACT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid report type")
+    conn = get_db()
+    rows, next_cursor = artifact_catalog.list_artifacts(
+        conn, rtype=type, submission_id=submission_id, name=name, cursor=cursor, limit=limit
+    )
+    conn.close()
+    report_files = [
+        {
+            "name": row["name"],
+            "type": row["type"],
+            "size": row["size"],
+            "modified": row["created_at"],
+            "submission_id": row["submission_id"],
+            "checksum": row["checksum"],
+            "download_url": f"/api/reports/download/{row['type']}/{row['name']}"
+        }
+        for row in rows
+    ]
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else {}
+    return FastJSONResponse(content=report_files, headers=headers)
 
 @app.get("/api/reports/download/{rtype}/{filename:path}")
 async def download_report(
@@ -1017,19 +1357,103 @@ async def download_report(
 ):
     """
     Download a report file from deliverables/tables, deliverables/logs, or deliverables/plots.
+    With object storage the client is redirected to a presigned URL.
     """
-    base_dirs = {
-        "tables": os.path.join(os.path.dirname(os.path.abspath(__file__)), "deliverables", "tables"),
-        "logs": os.path.join(os.path.dirname(os.path.abspath(__file__)), "deliverables", "logs"),
-        "plots": os.path.join(os.path.dirname(os.path.abspath(__file__)), "deliverables", "plots"),
-    }
-    if rtype not in base_dirs:
-        raise HTTPException(status_code=400, detail="Invalid report type")
-    dir_path = base_dirs[rtype]
-    file_path = os.path.join(dir_path, filename)
-    if not os.path.isfile(file_path):
+    storage = get_storage()
+    key = f"deliverables/{rtype}/{filename}"
+    try:
+        exists = await run_blocking('reports', storage.exists, key)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid file name")
+    if not exists:
+        raise HTTPException(status_code=404, detail="File not found")
+    if storage.name == "s3":
+        return RedirectResponse(storage.download_url(key), status_code=307)
+    return FileResponse(storage.local_path(key), filename=os.path.basename(filename))
+
+@app.get("/api/reports/url/{rtype}/{filename:path}")
+async def report_download_url(
+    rtype: str = Path(..., pattern="^(tables|logs|plots)$"),
+    filename: str = Path(...),
+    current_user: dict = Depends(get_current_user)
+):
+    """Time-limited download URL for a report file that works without the bearer token"""
+    storage = get_storage()
+    key = f"deliverables/{rtype}/{filename}"
+    try:
+        exists = await run_blocking('reports', storage.exists, key)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid file name")
+    if not exists:
         raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(file_path, filename=filename)
+    return {"url": storage.download_url(key), "expires_in": SIGNED_URL_TTL}
+
+@app.get("/api/storage/{key:path}")
+async def signed_download(key: str, expires: int, signature: str):
+    """Serve a file from local storage for a URL signed by /api/reports/url"""
+    if not verify_signature(key, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+    storage = get_storage()
+    try:
+        path = storage.local_path(key)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid file name")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    return FileResponse(path, filename=os.path.basename(key))
+
+@app.get("/api/webhooks/deliveries")
+def list_webhook_deliveries(
+    status: Optional[str] = None,
+    submission_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = webhook_outbox.DEFAULT_PAGE_SIZE,
+    current_user: dict = Depends(get_current_user)
+):
+    """Report notification deliveries, newest first; the next page cursor is returned in X-Next-Cursor"""
+    if status is not None and status not in webhook_outbox.STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(webhook_outbox.STATUSES)}")
+    conn = get_db()
+    rows, next_cursor = webhook_outbox.list_deliveries(conn, status=status, submission_id=submission_id,
+                                                       cursor=cursor, limit=limit)
+    conn.close()
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else {}
+    return FastJSONResponse(content=rows, headers=headers)
+
+@app.post("/api/webhooks/deliveries/{delivery_id}/retry")
+def retry_webhook_delivery(delivery_id: int, current_user: dict = Depends(get_current_user)):
+    """Queue a failed delivery again"""
+    conn = get_db()
+    queued = webhook_outbox.retry(conn, delivery_id)
+    conn.close()
+    if not queued:
+        raise HTTPException(status_code=404, detail="No failed delivery with this id")
+    return {"status": "ok", "id": delivery_id}
+
+@app.get("/api/llm/status")
+def llm_status(current_user: dict = Depends(get_current_user)):
+    """State of the shared LLM client: circuit breaker, limits and request counters (see llm_client.py)"""
+    from llm_client import get_llm_client
+    client = get_llm_client()
+    if client is None:
+        return {"available": False}
+    return {"available": True, **client.status()}
+
+@app.get("/api/llm-cache/stats")
+def llm_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Hit/miss counts and size of the LLM response cache (see llm_cache.py)"""
+    conn = get_db()
+    stats = llm_cache.cache_stats(conn)
+    conn.close()
+    return stats
+
+@app.delete("/api/llm-cache")
+def clear_llm_cache(current_user: dict = Depends(get_current_user)):
+    """Drop every cached LLM response"""
+    conn = get_db()
+    removed = llm_cache.clear_cache(conn)
+    conn.close()
+    return {"status": "ok", "removed": removed}
 
 @app.post("/api/chatgpt/test")
 async def test_chatgpt_integration(
@@ -1038,7 +1462,8 @@ async def test_chatgpt_integration(
     """
     Test ChatGPT integration with sample data
     """
-    if not use_chatgpt or not chatgpt_generator:
+    chatgpt_generator = await run_blocking('results', services.get_chatgpt_generator)
+    if chatgpt_generator is None:
         return JSONResponse(status_code=503, content={
             "message": "ChatGPT not available",
             "error": "OPEN_AI_KEY not configured or ChatGPT service unavailable"
@@ -1076,7 +1501,7 @@ async def test_chatgpt_integration(
         }
         
         # Generate summary using ChatGPT
-        summary = chatgpt_generator.generate_summary(sample_results)
+        summary = await run_blocking('results', chatgpt_generator.generate_summary, sample_results)
         
         return {
             "message": "ChatGPT integration test successful",
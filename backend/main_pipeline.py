@@ -4,13 +4,23 @@ import matplotlib.pyplot as plt
 import joblib
 from ai_module import add_features, train_regression, predict, tune_regression, train_anomaly_detector, predict_anomalies, gpt_summary, regression_metrics, explain_anomaly
 import numpy as np
+import time
 from sklearn.preprocessing import StandardScaler
+from results_store import build_results_document, write_results_document, results_document_name
+from anomaly_index import build_anomaly_index, write_anomaly_index, anomaly_index_name
+from db import get_db
+from facility_store import record_submission
+from anomaly_store import record_anomalies
+from manifest import record_artifacts
+from prompt_digest import build_digest, render_digest
 
 # Output directories
 TABLES = 'deliverables/tables/'
 PLOTS = 'deliverables/plots/'
 LOGS = 'deliverables/logs/'
 
+pipeline_start = time.time()
+
 # Debug: Print environment variables and output paths
 submission_id = os.environ.get('SUBMISSION_ID', None)
 submission_csv = os.environ.get('SUBMISSION_CSV', None)
@@ -109,12 +119,13 @@ print(f"[Anomaly Detection] Using contamination: {anomaly_threshold}")
 anomaly_features = features[['Unit CO2 emissions (non-biogenic)', 'rolling_7d', 'pct_change']]
 scaler = StandardScaler()
 anomaly_features_scaled = scaler.fit_transform(anomaly_features)
-from ai_module import train_anomaly_detector, predict_anomalies
+from ai_module import train_anomaly_detector, predict_anomalies, anomaly_scores
 if anomaly_threshold == 'auto':
     anom_model = train_anomaly_detector(anomaly_features_scaled, contamination='auto')
 else:
     anom_model = train_anomaly_detector(anomaly_features_scaled, contamination=anomaly_threshold)
 features['Anomaly'] = predict_anomalies(anom_model, anomaly_features_scaled)
+features['Anomaly Score'] = anomaly_scores(anom_model, anomaly_features_scaled)
 
 # Add anomaly explanations
 features['Anomaly Explanation'] = features.apply(lambda row: explain_anomaly(row) if row['Anomaly'] else '', axis=1)
@@ -124,6 +135,26 @@ anomaly_path = TABLES + f'final_output_with_anomalies{output_suffix}.csv'
 features.to_csv(anomaly_path, index=False)
 print(f"[Anomaly Detection] Saved anomaly output to {anomaly_path}.")
 
+# Bounded-size statistics for the summary prompts (see prompt_digest.py)
+digest = build_digest(features)
+
+# Precompute the results document served by /api/submissions/{id}/results
+if submission_id:
+    results_doc = build_results_document(features, submission_id, metrics=metrics, processing_time=time.time() - pipeline_start)
+    results_doc["digest"] = digest
+    results_doc_path = TABLES + results_document_name(submission_id)
+    write_results_document(results_doc, results_doc_path)
+    print(f"[Results] Saved results document to {results_doc_path}.")
+    anomaly_index_path = TABLES + anomaly_index_name(submission_id)
+    write_anomaly_index(build_anomaly_index(features, submission_id), anomaly_index_path)
+    print(f"[Results] Saved anomaly index to {anomaly_index_path}.")
+    # Add this submission's rows to the cross-submission facility history
+    conn = get_db()
+    recorded = record_submission(conn, submission_id, features)
+    stored_anomalies = record_anomalies(conn, submission_id, features)
+    conn.close()
+    print(f"[Results] Recorded {recorded} rows in facility history and {stored_anomalies} anomalies.")
+
 # Warnings for all/no anomalies
 anomaly_count = features['Anomaly'].sum()
 anomaly_warning = ''
@@ -150,7 +181,7 @@ flagged = features[features['Flagged'] == 'Yes']
 total = len(features)
 flagged_count = len(flagged)
 # Generate summary using GPT or mock
-summary_prompt = f"Generate a compliance summary for {flagged_count} flagged out of {total} records. Give 2 example facilities with their actual, predicted, and deviation."  # You can customize this prompt
+summary_prompt = f"Generate a compliance summary for {flagged_count} flagged out of {total} records. Give 2 example facilities with their actual, predicted, and deviation.\n\n{render_digest(digest)}"
 summary = gpt_summary(summary_prompt)
 # Save summary with per-submission suffix
 summary_path = LOGS + f'weekly_summary_{submission_id}.txt' if submission_id else LOGS + 'weekly_summary.txt'
@@ -163,6 +194,18 @@ features['summary'] = summary
 features.to_csv(summary_csv_path, index=False)
 print(f"[Summary] Saved summary CSV to {summary_csv_path}.")
 
+record_artifacts(submission_id, {
+    'cleaned_emissions': cleaned_path,
+    'features': features_path,
+    'flagged_output': flagged_path,
+    'anomalies': anomaly_path,
+    'results_document': TABLES + results_document_name(submission_id) if submission_id else '',
+    'anomaly_index': TABLES + anomaly_index_name(submission_id) if submission_id else '',
+    'plot_emissions_over_time': PLOTS + f'co2_emissions_over_time{output_suffix}.png',
+    'weekly_summary': summary_path,
+    'summary_table': summary_csv_path,
+})
+
 # After computing metrics, add them as columns to the features DataFrame for API access
 features['R2'] = metrics['r2']
 features['RMSE'] = metrics['rmse']
@@ -0,0 +1,178 @@
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from serialization import dumps, loads
+from db import connection
+from storage import get_storage, storage_key, DATA_DIR, ClientError
+from artifact_catalog import init_artifact_catalog, register_artifact, file_checksum
+
+# Per-submission artifact manifest.
+# Every stage records the exact files it wrote (path, format, size, checksum) under a
+# logical key in deliverables/manifests/manifest_{id}.json. The API and later stages
+# resolve inputs through the manifest instead of probing directories, and a missing
+# artifact is an error rather than a silent fallback to another submission's file.
+# Recorded files are copied to the storage backend (a no-op for local storage), and
+# the manifest itself lives in storage, so any node can resolve a submission's artifacts.
+# Updates hold an exclusive lock on manifest_{id}.json.lock, because the pipeline
+# scripts, the API and retention all update the same manifest from separate processes.
+
+MANIFEST_DIR = os.path.join(DATA_DIR, 'deliverables', 'manifests')
+
+# Canonical names of the artifacts written before manifests existed, used once to
+# build the manifest of an older submission
+LEGACY_ARTIFACTS = {
+    'cleaned_emissions': ('tables', 'cleaned_emissions_by_unit_{id}.csv'),
+    'features': ('tables', 'features_{id}.csv'),
+    'flagged_output': ('tables', 'flagged_emissions_output_{id}.csv'),
+    'anomalies': ('tables', 'final_output_with_anomalies_{id}.csv'),
+    'summary_table': ('tables', 'final_output_with_summary_{id}.csv'),
+    'results_document': ('tables', 'results_{id}.json'),
+    'anomaly_index': ('tables', 'anomalies_{id}.json'),
+    'alerts': ('tables', 'alerts_today_{id}.csv'),
+    'weekly_summary': ('logs', 'weekly_summary_{id}.txt'),
+    'gpt_summary': ('logs', 'summary_gpt_{id}.txt'),
+    'anomaly_summary': ('logs', 'weekly_summary_anomalies_{id}.txt'),
+}
+
+_lock = threading.Lock()
+
+
+def manifest_path(submission_id) -> str:
+    return os.path.join(MANIFEST_DIR, f'manifest_{submission_id}.json')
+
+
+@contextmanager
+def _manifest_lock(submission_id):
+    """Exclusive lock for a manifest's read-modify-write, across threads and processes"""
+    with _lock:
+        if fcntl is None:
+            # No flock (Windows): only this process is serialized
+            yield
+            return
+        os.makedirs(MANIFEST_DIR, exist_ok=True)
+        with open(f'{manifest_path(submission_id)}.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_manifest(submission_id) -> Optional[Dict[str, Any]]:
+    """A submission's manifest, or None if it has none"""
+    try:
+        return loads(get_storage().read_bytes(storage_key(manifest_path(submission_id))))
+    except (FileNotFoundError, ClientError):
+        return None
+
+
+def _write_manifest(manifest: Dict[str, Any]) -> None:
+    path = manifest_path(manifest['submission_id'])
+    os.makedirs(MANIFEST_DIR, exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(dumps(manifest))
+    os.replace(tmp_path, path)
+    get_storage().put_file(path, storage_key(path))
+
+
+def _artifact_entry(path: str) -> Dict[str, Any]:
+    st = os.stat(path)
+    try:
+        key = storage_key(path)
+    except ValueError:
+        # Written outside the data directory (manual runs): catalogued but not stored
+        key = None
+    return {
+        'path': path,
+        'key': key,
+        'name': os.path.basename(path),
+        'format': os.path.splitext(path)[1].lstrip('.').lower(),
+        'size': st.st_size,
+        'checksum': file_checksum(path),
+        'created_at': datetime.fromtimestamp(st.st_mtime).isoformat()
+    }
+
+
+def record_artifacts(submission_id, artifacts: Dict[str, str]) -> Dict[str, Any]:
+    """Record the files a stage wrote under their keys and register them in the artifact catalog.
+
+    Missing files are skipped. Without a submission id (manual runs) only the catalog is updated.
+    """
+    entries = {key: _artifact_entry(os.path.abspath(path))
+               for key, path in artifacts.items() if path and os.path.isfile(path)}
+    storage = get_storage()
+    for entry in entries.values():
+        if entry['key']:
+            storage.put_file(entry['path'], entry['key'])
+    with connection() as conn:
+        init_artifact_catalog(conn)
+        for entry in entries.values():
+            register_artifact(conn, entry['path'], submission_id, checksum=entry['checksum'])
+    if not submission_id:
+        return {}
+    with _manifest_lock(submission_id):
+        manifest = load_manifest(submission_id) or {'submission_id': str(submission_id), 'artifacts': {}}
+        manifest['artifacts'].update(entries)
+        manifest['updated_at'] = datetime.now().isoformat()
+        _write_manifest(manifest)
+    return manifest
+
+
+def forget_artifacts(submission_id, paths) -> None:
+    """Drop entries whose files were deleted (retention) so lookups report them as missing"""
+    paths = {os.path.abspath(path) for path in paths}
+    with _manifest_lock(submission_id):
+        manifest = load_manifest(submission_id)
+        if manifest is None:
+            return
+        manifest['artifacts'] = {key: entry for key, entry in manifest['artifacts'].items()
+                                 if entry['path'] not in paths}
+        manifest['updated_at'] = datetime.now().isoformat()
+        _write_manifest(manifest)
+
+
+def ensure_manifest(submission_id) -> Optional[Dict[str, Any]]:
+    """Load a submission's manifest, building it once from the canonical file names for older submissions"""
+    manifest = load_manifest(submission_id)
+    if manifest is not None:
+        return manifest
+    deliverables = os.path.join(DATA_DIR, 'deliverables')
+    legacy = {key: os.path.join(deliverables, rtype, template.format(id=submission_id))
+              for key, (rtype, template) in LEGACY_ARTIFACTS.items()}
+    if not any(os.path.isfile(path) for path in legacy.values()):
+        return None
+    print(f"[INFO] Building artifact manifest for submission {submission_id}")
+    return record_artifacts(submission_id, legacy)
+
+
+def resolve_artifact(manifest: Optional[Dict[str, Any]], key: str) -> Optional[str]:
+    """Local path of a recorded artifact (fetched from storage if another node wrote or rewrote it), or None if not recorded"""
+    if not manifest:
+        return None
+    entry = manifest['artifacts'].get(key)
+    if not entry:
+        return None
+    if not entry.get('key'):
+        return entry['path']
+    try:
+        # Through storage so an S3 working copy is refreshed when the object was rewritten
+        return get_storage().local_path(entry['key'])
+    except ClientError:
+        return entry['path'] if os.path.isfile(entry['path']) else None
+
+
+def require_artifact(submission_id, key: str) -> str:
+    """Recorded path of an artifact a pipeline stage needs; raises instead of falling back to another file"""
+    path = resolve_artifact(load_manifest(submission_id), key)
+    if path is None or not os.path.isfile(path):
+        raise FileNotFoundError(f"Artifact '{key}' not recorded for submission {submission_id}")
+    return path
@@ -0,0 +1,87 @@
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the OpenAI chat completions API, for exercising llm_client.py
+# without an API key:
+#
+#   python mock_llm_server.py --port 8089 --fail-first 3 --delay 0.5
+#   OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPEN_AI_KEY=test uvicorn main:app
+#
+# --fail-first answers the first N requests with 429 (Retry-After: 1) and
+# --fail-status picks another error status, e.g. 503 to trip the circuit breaker.
+
+
+class MockState:
+    def __init__(self, fail_first: int, fail_status: int, delay: float):
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.delay = delay
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: dict, headers=None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            with state.lock:
+                state.requests += 1
+                number = state.requests
+            time.sleep(state.delay)
+            if not self.path.endswith("/chat/completions"):
+                return self._reply(404, {"error": {"message": f"Unknown path {self.path}"}})
+            if number <= state.fail_first:
+                return self._reply(state.fail_status, {"error": {"message": "Mock failure", "type": "mock"}},
+                                   {"Retry-After": "1"})
+            prompt = request.get("messages", [{}])[-1].get("content", "")
+            self._reply(200, {
+                "id": f"chatcmpl-mock-{number}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": f"Mock summary #{number}: {prompt[:200]}"},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": 8, "total_tokens": len(prompt.split()) + 8}
+            })
+
+        def log_message(self, format, *args):
+            print(f"[MOCK LLM] {self.address_string()} {format % args}")
+
+    return Handler
+
+
+def serve(port: int = 8089, fail_first: int = 0, fail_status: int = 429, delay: float = 0.0) -> ThreadingHTTPServer:
+    """Start the mock server on a background thread and return it (call shutdown() to stop)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(MockState(fail_first, fail_status, delay)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat completions server")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--fail-first", type=int, default=0)
+    parser.add_argument("--fail-status", type=int, default=429)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port),
+                                 make_handler(MockState(args.fail_first, args.fail_status, args.delay)))
+    print(f"[INFO] Mock LLM server on http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
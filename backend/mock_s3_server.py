@@ -0,0 +1,188 @@
+import re
+import time
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate
+from urllib.parse import urlsplit, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for an S3-compatible object store (MinIO), for exercising the S3
+# storage backend in storage.py without a bucket:
+#
+#   python mock_s3_server.py --port 9000 --bucket rayfield
+#   STORAGE_BACKEND=s3 S3_BUCKET=rayfield S3_ENDPOINT_URL=http://127.0.0.1:9000 \
+#       AWS_ACCESS_KEY_ID=test AWS_SECRET_ACCESS_KEY=test AWS_DEFAULT_REGION=us-east-1 uvicorn main:app
+#
+# Objects live in memory. It answers the calls storage.py makes (put, get, head and
+# delete object, plus multipart uploads for large files); signatures are not checked.
+# Presigned GET URLs work as long as the browser can reach the server.
+
+_CHUNK_HEADER = re.compile(rb'^([0-9a-fA-F]+)(;[^\r\n]*)?$')
+
+
+class MockState:
+    def __init__(self, bucket: str):
+        self.bucket = bucket
+        self.objects = {}
+        self.uploads = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.md5(data).hexdigest()}"'
+
+
+def _decode_aws_chunked(body: bytes) -> bytes:
+    """Payload of an aws-chunked body (streaming uploads with trailing checksums)"""
+    data, rest = b"", body
+    while rest:
+        header, _, rest = rest.partition(b"\r\n")
+        match = _CHUNK_HEADER.match(header)
+        if not match:
+            break
+        size = int(match.group(1), 16)
+        if size == 0:
+            break
+        data, rest = data + rest[:size], rest[size + 2:]
+    return data
+
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _target(self):
+            """(key, query) of the request; accepts path-style and virtual-host-style addressing"""
+            url = urlsplit(self.path)
+            path = unquote(url.path).lstrip("/")
+            host = self.headers.get("Host", "").split(":")[0]
+            if not host.startswith(f"{state.bucket}."):
+                bucket, _, path = path.partition("/")
+                if bucket != state.bucket:
+                    return None, {}
+            return path, {name: values[0] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+
+        def _body(self) -> bytes:
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                body = b""
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                    if size == 0:
+                        while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                            pass
+                        break
+                    body += self.rfile.read(size)
+                    self.rfile.readline()
+            else:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if "x-amz-decoded-content-length" in self.headers or "aws-chunked" in self.headers.get("Content-Encoding", ""):
+                body = _decode_aws_chunked(body)
+            return body
+
+        def _reply(self, status: int, body: bytes = b"", headers=None, content_type: str = "application/xml"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _error(self, status: int, code: str):
+            body = f"<?xml version=\"1.0\"?><Error><Code>{code}</Code><Message>{code}</Message></Error>".encode()
+            self._reply(status, body)
+
+        def _count(self):
+            with state.lock:
+                state.requests += 1
+
+        def do_PUT(self):
+            self._count()
+            key, query = self._target()
+            body = self._body()
+            if not key:
+                return self._error(404, "NoSuchBucket")
+            if "uploadId" in query:
+                with state.lock:
+                    parts = state.uploads.get(query["uploadId"])
+                    if parts is None:
+                        return self._error(404, "NoSuchUpload")
+                    parts[int(query["partNumber"])] = body
+                return self._reply(200, headers={"ETag": _etag(body)})
+            with state.lock:
+                state.objects[key] = (body, time.time())
+            self._reply(200, headers={"ETag": _etag(body)})
+
+        def do_POST(self):
+            self._count()
+            key, query = self._target()
+            self._body()
+            if not key:
+                return self._error(404, "NoSuchBucket")
+            if "uploads" in query:
+                upload_id = hashlib.sha1(f"{key}{time.time()}".encode()).hexdigest()
+                with state.lock:
+                    state.uploads[upload_id] = {}
+                body = (f"<?xml version=\"1.0\"?><InitiateMultipartUploadResult><Bucket>{state.bucket}</Bucket>"
+                        f"<Key>{key}</Key><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>")
+                return self._reply(200, body.encode())
+            if "uploadId" in query:
+                with state.lock:
+                    parts = state.uploads.pop(query["uploadId"], None)
+                    if parts is None:
+                        return self._error(404, "NoSuchUpload")
+                    data = b"".join(parts[number] for number in sorted(parts))
+                    state.objects[key] = (data, time.time())
+                etag = f'"{hashlib.md5(data).hexdigest()}-{len(parts)}"'
+                body = (f"<?xml version=\"1.0\"?><CompleteMultipartUploadResult><Bucket>{state.bucket}</Bucket>"
+                        f"<Key>{key}</Key><ETag>{etag}</ETag></CompleteMultipartUploadResult>")
+                return self._reply(200, body.encode())
+            self._error(400, "InvalidRequest")
+
+        def do_GET(self):
+            self._count()
+            key, _ = self._target()
+            with state.lock:
+                entry = state.objects.get(key) if key else None
+            if entry is None:
+                return self._error(404, "NoSuchKey")
+            data, modified = entry
+            self._reply(200, data, {"ETag": _etag(data), "Last-Modified": formatdate(modified, usegmt=True)},
+                        content_type="application/octet-stream")
+
+        do_HEAD = do_GET
+
+        def do_DELETE(self):
+            self._count()
+            key, query = self._target()
+            with state.lock:
+                if "uploadId" in query:
+                    state.uploads.pop(query["uploadId"], None)
+                elif key:
+                    state.objects.pop(key, None)
+            self._reply(204)
+
+        def log_message(self, format, *args):
+            print(f"[MOCK S3] {self.address_string()} {format % args}")
+
+    return Handler
+
+
+def serve(port: int = 9000, bucket: str = "rayfield") -> ThreadingHTTPServer:
+    """Start the mock server on a background thread and return it (call shutdown() to stop)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(MockState(bucket)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock S3-compatible object store")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--bucket", default="rayfield")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(MockState(args.bucket)))
+    print(f"[INFO] Mock S3 server on http://127.0.0.1:{args.port} (bucket {args.bucket})")
+    server.serve_forever()
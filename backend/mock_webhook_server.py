@@ -0,0 +1,90 @@
+import time
+import argparse
+import threading
+from email import message_from_bytes
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the Zapier webhook, for exercising webhook_outbox.py:
+#
+#   python mock_webhook_server.py --port 8090 --fail-first 2
+#   WEBHOOK_URL=http://127.0.0.1:8090/hook uvicorn main:app
+#
+# It logs the files and submission ids of every multipart delivery. --fail-first
+# answers the first N requests with --fail-status (default 503) to exercise the
+# outbox's retries and backoff, and --delay slows every answer down.
+
+
+class MockState:
+    def __init__(self, fail_first: int, fail_status: int, delay: float):
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.delay = delay
+        self.requests = 0
+        self.deliveries = []
+        self.lock = threading.Lock()
+
+
+def parse_multipart(content_type: str, body: bytes):
+    """(form fields, [(filename, size)]) of a multipart/form-data body"""
+    message = message_from_bytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body, policy=HTTP)
+    fields, files = {}, []
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        payload = part.get_payload(decode=True) or b""
+        if part.get_filename():
+            files.append((part.get_filename(), len(payload)))
+        elif name:
+            fields[name] = payload.decode(errors="replace")
+    return fields, files
+
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, text: str):
+            payload = text.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with state.lock:
+                state.requests += 1
+                number = state.requests
+            time.sleep(state.delay)
+            if number <= state.fail_first:
+                return self._reply(state.fail_status, "Mock failure")
+            fields, files = parse_multipart(self.headers.get("Content-Type", ""), body)
+            with state.lock:
+                state.deliveries.append({"fields": fields, "files": files})
+            print(f"[MOCK WEBHOOK] Delivery #{number}: submissions {fields.get('submission_ids') or '-'}, "
+                  + ", ".join(f"{name} ({size} bytes)" for name, size in files))
+            self._reply(200, "ok")
+
+        def log_message(self, format, *args):
+            print(f"[MOCK WEBHOOK] {self.address_string()} {format % args}")
+
+    return Handler
+
+
+def serve(port: int = 8090, fail_first: int = 0, fail_status: int = 503, delay: float = 0.0) -> ThreadingHTTPServer:
+    """Start the mock server on a background thread and return it (call shutdown() to stop)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(MockState(fail_first, fail_status, delay)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock webhook receiver")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--fail-first", type=int, default=0)
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port),
+                                 make_handler(MockState(args.fail_first, args.fail_status, args.delay)))
+    print(f"[INFO] Mock webhook server on http://127.0.0.1:{args.port}/hook")
+    server.serve_forever()
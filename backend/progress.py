@@ -0,0 +1,192 @@
+import re
+import time
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from serialization import dumps
+
+# Live pipeline progress.
+# The upload worker thread publishes stage start/finish, step, row-count and warning
+# events parsed from the pipeline scripts' output; the broker fans each event out to
+# the SSE subscribers of that submission (and to subscribers of all submissions).
+# Publishing with no subscribers only appends to a short replay history.
+# The pipeline status is also stored on the submission (pipeline_status), so a stream
+# for a finished submission whose history is gone (or that ran in another worker) ends
+# with one terminal event instead of waiting forever.
+
+HISTORY_EVENTS = 200
+HISTORY_SUBMISSIONS = 64
+SUBSCRIBER_QUEUE_SIZE = 256
+KEEPALIVE_SECONDS = 15
+TERMINAL_EVENTS = ('complete', 'error')
+# Stored pipeline statuses; a submission without one never ran the pipeline here
+RUNNING_STATUSES = ('running',)
+
+_STEP_MARKER = re.compile(r'^\[(\d+)/(\d+)\]\s*(.*)')
+_SHAPE = re.compile(r'shape=\((\d+),')
+_WARNING = re.compile(r'^\[?warning\]?:?', re.IGNORECASE)
+
+
+def parse_progress_line(line: str) -> Optional[Dict[str, Any]]:
+    """Progress fields of one line of script output: step markers ([n/12]), row counts and warnings"""
+    line = line.strip()
+    match = _STEP_MARKER.match(line)
+    if match:
+        step, total, message = int(match.group(1)), int(match.group(2)), match.group(3)
+        rows = _SHAPE.search(message)
+        return {
+            'type': 'step',
+            'step': step,
+            'total_steps': total,
+            'rows': int(rows.group(1)) if rows else None,
+            'message': message.split('\n')[0][:200]
+        }
+    if _WARNING.match(line):
+        return {'type': 'warning', 'message': line[:500]}
+    return None
+
+
+class ProgressBroker:
+    """Fan-out of pipeline progress events to asyncio subscribers, safe to publish from worker threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._history: 'OrderedDict[str, Deque[Dict[str, Any]]]' = OrderedDict()
+        # topic (submission id, or None for every submission) -> [(loop, queue)]
+        self._subscribers: Dict[Optional[str], List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def publish(self, submission_id, event_type: str, **fields) -> Dict[str, Any]:
+        key = str(submission_id)
+        with self._lock:
+            self._seq += 1
+            event = {'type': event_type, 'submission_id': key, 'seq': self._seq, 'ts': time.time(), **fields}
+            history = self._history.get(key)
+            if history is None:
+                history = self._history[key] = deque(maxlen=HISTORY_EVENTS)
+                while len(self._history) > HISTORY_SUBMISSIONS:
+                    self._history.popitem(last=False)
+            history.append(event)
+            targets = self._subscribers.get(key, []) + self._subscribers.get(None, [])
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # Subscriber's event loop already closed
+                pass
+        return event
+
+    def history(self, submission_id) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._history.get(str(submission_id), ()))
+
+    def subscribe(self, submission_id=None) -> asyncio.Queue:
+        """Queue receiving the events of one submission (or of all submissions when None); call from the event loop"""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        key = str(submission_id) if submission_id is not None else None
+        with self._lock:
+            self._subscribers.setdefault(key, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, submission_id, queue: asyncio.Queue) -> None:
+        key = str(submission_id) if submission_id is not None else None
+        with self._lock:
+            subscribers = [s for s in self._subscribers.get(key, []) if s[1] is not queue]
+            if subscribers:
+                self._subscribers[key] = subscribers
+            else:
+                self._subscribers.pop(key, None)
+
+
+def _offer(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+    """Enqueue an event, dropping the oldest one for a subscriber that is not keeping up"""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+def sse_message(event: Dict[str, Any]) -> bytes:
+    return f"id: {event['seq']}\nevent: {event['type']}\n".encode() + b'data: ' + dumps(event) + b'\n\n'
+
+
+def init_progress_store(conn) -> None:
+    """Add the pipeline status columns to the submissions table"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(submissions)')}
+    for column in ('pipeline_status', 'pipeline_message'):
+        if column not in existing:
+            conn.execute(f'ALTER TABLE submissions ADD COLUMN {column} TEXT')
+    conn.commit()
+
+
+def record_pipeline_status(conn, submission_id, status: str, message: Optional[str] = None) -> None:
+    with conn:
+        conn.execute('UPDATE submissions SET pipeline_status = ?, pipeline_message = ? WHERE id = ?',
+                     (status, message, int(submission_id)))
+
+
+def pipeline_status(conn, submission_id) -> Optional[Dict[str, Any]]:
+    """Stored pipeline status of a submission ({'status', 'message'}), or None for an unknown submission"""
+    try:
+        submission_id = int(submission_id)
+    except (TypeError, ValueError):
+        return None
+    row = conn.execute('SELECT pipeline_status, pipeline_message FROM submissions WHERE id = ?',
+                       (submission_id,)).fetchone()
+    if row is None:
+        return None
+    return {'status': row['pipeline_status'], 'message': row['pipeline_message']}
+
+
+def terminal_event(submission_id, status: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Closing event for a submission whose pipeline is not running (None while it runs)"""
+    if status['status'] in RUNNING_STATUSES:
+        return None
+    event_type = 'error' if status['status'] == 'error' else 'complete'
+    return {'type': event_type, 'submission_id': str(submission_id), 'seq': 0, 'ts': time.time(),
+            'status': status['status'] or 'not_run', 'message': status['message'], 'stored': True}
+
+
+async def event_stream(broker: ProgressBroker, submission_id=None,
+                       finished: Optional[Callable[[], Awaitable[Optional[Dict[str, Any]]]]] = None):
+    """Server-Sent Events for a submission: replay of the events so far, then live events until it finishes.
+
+    finished returns the submission's terminal event once its stored status says the
+    pipeline is not running; it is checked when there is nothing to replay and at
+    every keepalive, so streams for finished or evicted submissions close.
+    """
+    queue = broker.subscribe(submission_id)
+    replayed = 0
+    try:
+        if submission_id is not None:
+            for event in broker.history(submission_id):
+                replayed = event['seq']
+                yield sse_message(event)
+                if event['type'] in TERMINAL_EVENTS:
+                    return
+        if finished is not None and not replayed:
+            event = await finished()
+            if event is not None:
+                yield sse_message(event)
+                return
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                event = await finished() if finished is not None else None
+                if event is not None:
+                    yield sse_message(event)
+                    return
+                yield b': keepalive\n\n'
+                continue
+            if event['seq'] <= replayed:
+                continue
+            yield sse_message(event)
+            if submission_id is not None and event['type'] in TERMINAL_EVENTS:
+                return
+    finally:
+        broker.unsubscribe(submission_id, queue)
+
+
+progress_broker = ProgressBroker()
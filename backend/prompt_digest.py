@@ -0,0 +1,198 @@
+import os
+import math
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from results_store import CO2_COL, anomaly_mask
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Compact statistical digests for LLM prompts.
+# build_digest() summarizes a flagged output in a few vectorized passes: overall
+# counts, the largest deviations among anomalies, per-sector and per-year breakdowns
+# and year-over-year trend deltas. render_digest() turns a digest into prompt text
+# that fits a token budget, shortening the longest list first, so prompts stay small
+# however many rows a submission has. The digest is stored in the results document,
+# so the API's GPT summaries are grounded in the full data, not the first anomalies.
+
+TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", 600))
+TOP_DEVIATIONS = 10
+TOP_SECTORS = 8
+SECTOR_COLUMNS = ('Industry Type (sectors)', 'Industry Type (subparts)', 'Unit Type')
+# Rough English average; close enough to keep prompts inside their budget
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _numeric(df: 'pd.DataFrame', column: str) -> 'pd.Series':
+    import numpy as np
+    import pandas as pd
+    if column not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    return pd.to_numeric(df[column], errors='coerce')
+
+
+def _round(value, digits: int = 2):
+    import pandas as pd
+    return None if value is None or pd.isna(value) else round(float(value), digits)
+
+
+def _facility(df: 'pd.DataFrame') -> 'pd.Series':
+    import pandas as pd
+    for column in ('Facility Name', 'Facility Id'):
+        if column in df.columns:
+            return df[column].astype(str)
+    return pd.Series('Unknown', index=df.index)
+
+
+def build_digest(df: 'pd.DataFrame', top_n: int = TOP_DEVIATIONS) -> Dict[str, Any]:
+    """Bounded-size statistics of a flagged output for prompt grounding"""
+    import numpy as np
+    import pandas as pd
+    df = df.rename(columns=lambda c: c.strip())
+    anomalies = anomaly_mask(df).to_numpy(dtype=bool)
+    co2 = _numeric(df, CO2_COL)
+    deviation = _numeric(df, 'Deviation (%)')
+    year = _numeric(df, 'Reporting Year')
+    facility = _facility(df)
+    records = int(len(df))
+    digest = {
+        "records": records,
+        "anomalies": int(anomalies.sum()),
+        "anomaly_rate": round(100 * anomalies.sum() / records, 2) if records else 0.0,
+        "facilities": int(facility.nunique()),
+        "years": [int(year.min()), int(year.max())] if year.notna().any() else None,
+    }
+    if 'Flagged' in df.columns:
+        digest["flagged"] = int((df['Flagged'] == 'Yes').sum())
+
+    # Largest absolute deviations among anomalies
+    top = deviation[anomalies].abs().nlargest(top_n).index
+    digest["top_deviations"] = [
+        {"facility": f, "year": None if pd.isna(y) else int(y), "actual": _round(a),
+         "predicted": _round(p), "deviation": _round(d, 1)}
+        for f, y, a, p, d in zip(facility[top], year[top], co2[top], _numeric(df, 'Predicted CO2')[top], deviation[top])
+    ]
+
+    sector_column = next((c for c in SECTOR_COLUMNS if c in df.columns), None)
+    if sector_column:
+        frame = pd.DataFrame({'sector': df[sector_column].astype(str), 'anomaly': anomalies,
+                              'deviation': deviation.abs().where(anomalies)})
+        sectors = frame.groupby('sector').agg(records=('anomaly', 'size'), anomalies=('anomaly', 'sum'),
+                                              mean_deviation=('deviation', 'mean'))
+        sectors = sectors.sort_values(['anomalies', 'records'], ascending=False).head(TOP_SECTORS)
+        digest["sector_column"] = sector_column
+        digest["by_sector"] = [
+            {"sector": name, "records": int(r.records), "anomalies": int(r.anomalies),
+             "mean_deviation": _round(r.mean_deviation, 1)}
+            for name, r in sectors.iterrows()
+        ]
+
+    if year.notna().any():
+        frame = pd.DataFrame({'year': year, 'co2': co2, 'anomaly': anomalies}).dropna(subset=['year'])
+        yearly = frame.groupby('year').agg(records=('anomaly', 'size'), anomalies=('anomaly', 'sum'),
+                                           co2=('co2', 'sum'))
+        change = yearly['co2'].pct_change().replace([np.inf, -np.inf], np.nan) * 100
+        digest["by_year"] = [
+            {"year": int(y), "records": int(r.records), "anomalies": int(r.anomalies),
+             "co2": _round(r.co2, 1), "change_pct": _round(c, 1)}
+            for (y, r), c in zip(yearly.iterrows(), change)
+        ]
+        if len(yearly) > 1:
+            first, last = yearly['co2'].iloc[0], yearly['co2'].iloc[-1]
+            largest = change.abs().idxmax() if change.notna().any() else None
+            digest["trend"] = {
+                "first_year": int(yearly.index[0]),
+                "last_year": int(yearly.index[-1]),
+                "total_change_pct": _round((last - first) / first * 100, 1) if first else None,
+                "last_change_pct": _round(change.iloc[-1], 1),
+                "largest_change": {"year": int(largest), "change_pct": _round(change[largest], 1)} if largest is not None else None
+            }
+    return digest
+
+
+def digest_from_records(anomalies_data: List[Dict[str, Any]], total_records: int) -> Dict[str, Any]:
+    """Digest from a results document's anomaly list (documents written before digests existed)"""
+    import pandas as pd
+    frame = pd.DataFrame(anomalies_data)
+    if frame.empty:
+        return {"records": total_records, "anomalies": 0, "anomaly_rate": 0.0}
+    frame = frame.assign(**{
+        'Facility Name': frame.get('facility'),
+        'Reporting Year': frame.get('year'),
+        CO2_COL: frame.get('emission_value'),
+        'Anomaly': True
+    })
+    digest = build_digest(frame)
+    # Only the listed anomalies are known: drop statistics that describe the whole data
+    for key in ("trend", "by_year", "flagged", "facilities"):
+        digest.pop(key, None)
+    digest.update(records=total_records, anomaly_rate=round(100 * len(frame) / total_records, 2) if total_records else 0.0)
+    return digest
+
+
+def _render(digest: Dict[str, Any], limits: Dict[str, int]) -> str:
+    years = digest.get("years")
+    lines = [
+        f"Records: {digest['records']:,}; anomalies: {digest['anomalies']:,} ({digest['anomaly_rate']}%)"
+        + (f"; flagged: {digest['flagged']:,}" if 'flagged' in digest else "")
+        + (f"; facilities: {digest['facilities']:,}" if 'facilities' in digest else "")
+        + (f"; years {years[0]}-{years[1]}" if years else "")
+    ]
+    trend = digest.get("trend")
+    if trend:
+        line = f"CO2 trend {trend['first_year']}-{trend['last_year']}: {trend['total_change_pct']}% overall, {trend['last_change_pct']}% in the last year"
+        if trend.get("largest_change"):
+            line += f", largest swing {trend['largest_change']['change_pct']}% in {trend['largest_change']['year']}"
+        lines.append(line)
+    top = digest.get("top_deviations", [])[:limits.get("top_deviations", 0)]
+    if top:
+        lines.append("Largest deviations (facility, year, actual/predicted CO2, deviation %):")
+        lines += [f"- {t['facility']}, {t['year']}, {t['actual']}/{t['predicted']}, {t['deviation']}%" for t in top]
+    by_year = digest.get("by_year", [])
+    by_year = by_year[len(by_year) - limits.get("by_year", 0):] if limits.get("by_year") else []
+    if by_year:
+        lines.append("By year (records, anomalies, total CO2, change %):")
+        lines += [f"- {y['year']}: {y['records']}, {y['anomalies']}, {y['co2']}, {y['change_pct']}" for y in by_year]
+    sectors = digest.get("by_sector", [])[:limits.get("by_sector", 0)]
+    if sectors:
+        lines.append(f"By {digest.get('sector_column', 'sector')} (records, anomalies, mean |deviation| %):")
+        lines += [f"- {s['sector']}: {s['records']}, {s['anomalies']}, {s['mean_deviation']}" for s in sectors]
+    return "\n".join(lines)
+
+
+def render_digest(digest: Dict[str, Any], token_budget: int = TOKEN_BUDGET) -> str:
+    """Prompt text for a digest within token_budget (estimated), trimming the longest list first"""
+    limits = {key: len(digest.get(key, [])) for key in ("top_deviations", "by_year", "by_sector")}
+    while True:
+        text = _render(digest, limits)
+        if estimate_tokens(text) <= token_budget or not any(limits.values()):
+            return text
+        longest = max(limits, key=limits.get)
+        limits[longest] //= 2
+
+
+def render_tables(tables: Dict[str, 'pd.DataFrame'], value_column: str, rows: int = 10,
+                  token_budget: int = TOKEN_BUDGET, ordered: tuple = ('By Quarter',)) -> str:
+    """Prompt text for summary tables: each table's largest rows by value_column
+    (the latest rows for tables in ordered), within token_budget"""
+    def render(limit: int) -> str:
+        lines = []
+        for name, table in tables.items():
+            if value_column not in table.columns or table.empty:
+                continue
+            shown = table.tail(limit) if name in ordered else table.nlargest(limit, value_column)
+            label = table.columns[0]
+            lines.append(f"{name} ({value_column}, {len(table)} groups):")
+            lines += [f"- {key}: {value:,.1f}" for key, value in zip(shown[label], shown[value_column])]
+        return "\n".join(lines)
+
+    while True:
+        text = render(rows)
+        if estimate_tokens(text) <= token_budget or rows <= 1:
+            return text
+        rows //= 2
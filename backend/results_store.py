@@ -0,0 +1,180 @@
+import os
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import TYPE_CHECKING, Dict, Any, Optional, List
+
+from serialization import frame_to_records, dumps, loads
+from chart_downsample import downsample_series, yearly_aggregates, CHART_POINTS, CHART_METHOD
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Precomputed results documents.
+# The pipeline writes results_{submission_id}.json once processing is done, so
+# /api/submissions/{id}/results can serve it without re-parsing the output CSVs.
+# pandas and numpy are imported inside the builders, so the API can serve documents
+# and their HTTP validators without loading either.
+
+CO2_COL = 'Unit CO2 emissions (non-biogenic)'
+MAX_ANOMALIES = 100
+
+
+def results_document_name(submission_id) -> str:
+    return f'results_{submission_id}.json'
+
+
+def severity_for_deviation(deviation: 'pd.Series') -> 'np.ndarray':
+    """Map deviation percentages to High/Medium/Low (missing deviation counts as High)"""
+    import numpy as np
+    abs_dev = deviation.abs()
+    return np.select(
+        [abs_dev >= 30, abs_dev >= 15, deviation.isna()],
+        ['High', 'Medium', 'High'],
+        default='Low'
+    )
+
+
+def anomaly_mask(df: 'pd.DataFrame') -> 'pd.Series':
+    import pandas as pd
+    if 'Anomaly' not in df.columns:
+        return pd.Series(False, index=df.index)
+    return df['Anomaly'] == True
+
+
+def build_anomalies_data(df: 'pd.DataFrame', limit: int = MAX_ANOMALIES) -> List[Dict[str, Any]]:
+    """Build the anomaly list served to the dashboard from the flagged output"""
+    import numpy as np
+    import pandas as pd
+    anom = df.loc[anomaly_mask(df)].head(limit)
+    if anom.empty:
+        return []
+    facility = anom['Facility Name'].astype(str) if 'Facility Name' in anom.columns else pd.Series('Unknown', index=anom.index)
+    years = pd.to_numeric(anom['Reporting Year'], errors='coerce') if 'Reporting Year' in anom.columns else pd.Series(np.nan, index=anom.index)
+    emissions = pd.to_numeric(anom[CO2_COL], errors='coerce').fillna(0.0) if CO2_COL in anom.columns else pd.Series(0.0, index=anom.index)
+    deviation = pd.to_numeric(anom['Deviation (%)'], errors='coerce') if 'Deviation (%)' in anom.columns else pd.Series(np.nan, index=anom.index)
+    severity = severity_for_deviation(deviation)
+
+    anomalies_data = []
+    for idx, (fac, year, emission, sev, row) in enumerate(zip(facility, years, emissions, severity, frame_to_records(anom))):
+        year = int(year) if pd.notna(year) else str(row.get('Reporting Year', 'Unknown'))
+        anomaly_dict = {
+            "id": idx,
+            "facility": fac,
+            "year": year,
+            "emission_value": float(emission),
+            "severity": str(sev),
+            "timestamp": f"{year}-01-01T00:00:00Z"
+        }
+        for k, v in row.items():
+            if k not in anomaly_dict:
+                anomaly_dict[k] = v
+        if 'Anomaly Explanation' in row:
+            anomaly_dict['explanation'] = row['Anomaly Explanation'] or ''
+        anomalies_data.append(anomaly_dict)
+    return anomalies_data
+
+
+def build_chart_data(df: 'pd.DataFrame', points: int = CHART_POINTS, method: str = CHART_METHOD) -> Dict[str, Any]:
+    """Build the downsampled emissions chart series plus per-year aggregates"""
+    import pandas as pd
+    if 'Reporting Year' not in df.columns or CO2_COL not in df.columns:
+        return {"labels": [], "emissions": [], "anomaly_indices": []}
+    anomalies = anomaly_mask(df)
+    chart_data = downsample_series(df['Reporting Year'], df[CO2_COL], anomalies, points=points, method=method)
+    chart_data["yearly"] = yearly_aggregates(
+        pd.to_numeric(df['Reporting Year'], errors='coerce'),
+        pd.to_numeric(df[CO2_COL], errors='coerce'),
+        anomalies
+    )
+    return chart_data
+
+
+def anomaly_warning_for(anomaly_count: int, total_records: int) -> str:
+    if anomaly_count == 0:
+        return 'No anomalies detected. Consider lowering the threshold.'
+    if anomaly_count == total_records:
+        return 'All points flagged as anomalies. Consider raising the threshold.'
+    return ''
+
+
+def build_results_document(df: 'pd.DataFrame', submission_id, metrics: Optional[Dict[str, float]] = None,
+                           processing_time: float = 0.0, chart_points: int = CHART_POINTS,
+                           chart_method: str = CHART_METHOD) -> Dict[str, Any]:
+    """Build the compact results document for a submission's flagged output"""
+    import pandas as pd
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+    total_records = int(len(df))
+    anomalies_found = int(anomaly_mask(df).sum())
+    anomalies_data = build_anomalies_data(df)
+
+    if metrics is None and 'R2' in df.columns and 'RMSE' in df.columns and total_records:
+        metrics = {"r2": df['R2'].iloc[0], "rmse": df['RMSE'].iloc[0]}
+    if metrics is not None:
+        metrics = {
+            "r2": float(metrics['r2']) if pd.notna(metrics.get('r2')) else None,
+            "rmse": float(metrics['rmse']) if pd.notna(metrics.get('rmse')) else None
+        }
+
+    return {
+        "submission_id": str(submission_id),
+        "anomalies_found": anomalies_found,
+        "total_records": total_records,
+        "processing_time": float(processing_time),
+        "anomalies_data": anomalies_data,
+        "chart_data": build_chart_data(df, points=chart_points, method=chart_method),
+        "metrics": metrics,
+        "anomaly_warning": anomaly_warning_for(anomalies_found, total_records),
+        "generated_at": formatdate(usegmt=True)
+    }
+
+
+def write_results_document(doc: Dict[str, Any], path: str) -> None:
+    """Atomically write a results document so readers never see a partial file"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(dumps(doc))
+    os.replace(tmp_path, path)
+
+
+def load_results_document(path: str) -> Dict[str, Any]:
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def http_validators(paths: List[str], modified_at: float = 0.0) -> Dict[str, str]:
+    """ETag and Last-Modified headers derived from the stat of the files a response is built from.
+
+    modified_at is a change time not reflected in the files (Last-Modified is at least that).
+    """
+    digest = hashlib.sha1()
+    latest = modified_at
+    for path in paths:
+        if path and os.path.exists(path):
+            st = os.stat(path)
+            digest.update(f"{path}:{st.st_mtime_ns}:{st.st_size};".encode())
+            latest = max(latest, st.st_mtime)
+    return {
+        "ETag": f'"{digest.hexdigest()[:20]}"',
+        "Last-Modified": formatdate(latest, usegmt=True)
+    }
+
+
+def is_not_modified(request_headers, validators: Dict[str, str]) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the current validators.
+
+    If-Modified-Since is ignored when If-None-Match is present (RFC 7232, section 6).
+    """
+    if_none_match = request_headers.get('if-none-match')
+    if if_none_match:
+        tags = [t.strip() for t in if_none_match.split(',')]
+        return '*' in tags or validators["ETag"] in tags or f'W/{validators["ETag"]}' in tags
+    if_modified_since = request_headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(validators["Last-Modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
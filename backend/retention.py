@@ -0,0 +1,219 @@
+import os
+import re
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from storage import get_storage, storage_key, DATA_DIR
+from manifest import forget_artifacts
+
+# Retention for deliverables and uploads.
+# A periodic sweep evicts bulky per-submission files (intermediate CSVs, plots,
+# Excel reports, raw uploads) that are older than the age limit, and then evicts
+# least-recently-used submissions' files until the total size is under the byte
+# limit. Compact result documents (results/anomaly index JSON, summaries) are always
+# kept so the results page keeps working, and pinned submissions are never touched.
+# Every eviction is logged in retention_evictions.
+
+MAX_BYTES = int(os.environ.get("RETENTION_MAX_BYTES", 5 * 1024 ** 3))
+MAX_AGE_DAYS = float(os.environ.get("RETENTION_MAX_AGE_DAYS", 30))
+INTERVAL_SECONDS = int(os.environ.get("RETENTION_INTERVAL_SECONDS", 3600))
+TOUCH_INTERVAL_SECONDS = 60
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Small documents served by the results endpoints, and the aggregates and summary every
+# emissions workbook is rebuilt from (see emissions_report.py); never evicted
+COMPACT_ARTIFACT = re.compile(r'^(results_\d+\.json|anomalies_\d+\.json|weekly_summary_\d+\.txt|summary_gpt_\d+\.txt'
+                              r'|emissions_aggregates_\d+\.json|emissions_report_summary_\d+\.txt)$')
+_UPLOAD_SUBMISSION = re.compile(r'^(\d+)_')
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS retention_pins (
+        submission_id INTEGER PRIMARY KEY,
+        pinned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS submission_access (
+        submission_id INTEGER PRIMARY KEY,
+        last_access REAL NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS retention_evictions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        submission_id INTEGER,
+        path TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        reason TEXT NOT NULL,
+        evicted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_retention_evictions_submission ON retention_evictions (submission_id, id)',
+]
+
+_touched: Dict[int, float] = {}
+_touch_lock = threading.Lock()
+
+
+def init_retention(conn) -> None:
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+
+def touch(conn, submission_id) -> None:
+    """Record that a submission was read (written at most once a minute per submission and process)"""
+    try:
+        submission_id = int(submission_id)
+    except (TypeError, ValueError):
+        return
+    now = time.time()
+    with _touch_lock:
+        if now - _touched.get(submission_id, 0) < TOUCH_INTERVAL_SECONDS:
+            return
+        _touched[submission_id] = now
+    with conn:
+        conn.execute('''
+            INSERT INTO submission_access (submission_id, last_access) VALUES (?, ?)
+            ON CONFLICT(submission_id) DO UPDATE SET last_access = excluded.last_access
+        ''', (submission_id, now))
+
+
+def pin(conn, submission_id: int) -> None:
+    with conn:
+        conn.execute('INSERT OR IGNORE INTO retention_pins (submission_id) VALUES (?)', (submission_id,))
+
+
+def unpin(conn, submission_id: int) -> None:
+    with conn:
+        conn.execute('DELETE FROM retention_pins WHERE submission_id = ?', (submission_id,))
+
+
+def _upload_files() -> List[Dict[str, Any]]:
+    uploads_dir = os.path.join(DATA_DIR, 'uploads')
+    if not os.path.isdir(uploads_dir):
+        return []
+    files = []
+    for entry in os.scandir(uploads_dir):
+        if not entry.is_file() or entry.name.endswith('.tmp'):
+            continue
+        match = _UPLOAD_SUBMISSION.match(entry.name)
+        st = entry.stat()
+        files.append({
+            'artifact_id': None,
+            'submission_id': int(match.group(1)) if match else None,
+            'path': entry.path,
+            'name': entry.name,
+            'size': st.st_size,
+            'created': st.st_mtime
+        })
+    return files
+
+
+def _stored_files(conn) -> List[Dict[str, Any]]:
+    """Every catalogued artifact plus the raw uploads"""
+    files = []
+    for row in conn.execute('SELECT id, submission_id, name, path, size, created_at FROM artifacts'):
+        files.append({
+            'artifact_id': row['id'],
+            'submission_id': row['submission_id'],
+            'path': row['path'],
+            'name': row['name'],
+            'size': row['size'],
+            'created': datetime.fromisoformat(row['created_at']).timestamp()
+        })
+    return files + _upload_files()
+
+
+def _evict(conn, files: List[Dict[str, Any]], reason: str) -> None:
+    storage = get_storage()
+    for f in files:
+        try:
+            storage.delete(storage_key(f['path']))
+        except ValueError:
+            pass
+        if os.path.exists(f['path']):
+            os.remove(f['path'])
+    with conn:
+        conn.executemany('DELETE FROM artifacts WHERE id = ?',
+                         [(f['artifact_id'],) for f in files if f['artifact_id'] is not None])
+        conn.executemany(
+            'INSERT INTO retention_evictions (submission_id, path, size, reason) VALUES (?, ?, ?, ?)',
+            [(f['submission_id'], f['path'], f['size'], reason) for f in files]
+        )
+    by_submission: Dict[int, List[str]] = {}
+    for f in files:
+        if f['submission_id'] is not None:
+            by_submission.setdefault(f['submission_id'], []).append(f['path'])
+    for submission_id, paths in by_submission.items():
+        forget_artifacts(submission_id, paths)
+
+
+def run_retention(conn, max_bytes: int = MAX_BYTES, max_age_days: float = MAX_AGE_DAYS,
+                  now: Optional[float] = None) -> Dict[str, Any]:
+    """One retention sweep; returns what was evicted and the remaining total size"""
+    now = now or time.time()
+    files = _stored_files(conn)
+    pinned = {row[0] for row in conn.execute('SELECT submission_id FROM retention_pins')}
+    last_access = dict(conn.execute('SELECT submission_id, last_access FROM submission_access').fetchall())
+
+    def last_used(f):
+        return max(f['created'], last_access.get(f['submission_id'], 0))
+
+    total = sum(f['size'] for f in files)
+    candidates = [f for f in files
+                  if f['submission_id'] not in pinned and not COMPACT_ARTIFACT.match(f['name'])]
+    evicted = {'age': [], 'size': []}
+    if max_age_days:
+        cutoff = now - timedelta(days=max_age_days).total_seconds()
+        evicted['age'] = [f for f in candidates if last_used(f) < cutoff]
+        total -= sum(f['size'] for f in evicted['age'])
+    if max_bytes and total > max_bytes:
+        aged = {f['path'] for f in evicted['age']}
+        # Least recently used submissions first, then oldest files
+        remaining = sorted((f for f in candidates if f['path'] not in aged),
+                           key=lambda f: (last_access.get(f['submission_id'], f['created']), f['created']))
+        for f in remaining:
+            if total <= max_bytes:
+                break
+            evicted['size'].append(f)
+            total -= f['size']
+    for reason, batch in evicted.items():
+        if batch:
+            _evict(conn, batch, reason)
+    result = {
+        'evicted_files': sum(len(batch) for batch in evicted.values()),
+        'evicted_bytes': sum(f['size'] for batch in evicted.values() for f in batch),
+        'by_reason': {reason: len(batch) for reason, batch in evicted.items()},
+        'total_bytes': total,
+        'max_bytes': max_bytes,
+        'max_age_days': max_age_days
+    }
+    if result['evicted_files']:
+        print(f"[INFO] Retention evicted {result['evicted_files']} files ({result['evicted_bytes']} bytes)")
+    return result
+
+
+def list_evictions(conn, submission_id: Optional[int] = None, cursor: Optional[int] = None,
+                   limit: int = DEFAULT_PAGE_SIZE):
+    """Newest-first page of evictions; returns (rows, next_cursor) with keyset pagination on id"""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    where = []
+    params = []
+    if submission_id is not None:
+        where.append('submission_id = ?')
+        params.append(submission_id)
+    if cursor is not None:
+        where.append('id < ?')
+        params.append(cursor)
+    sql = 'SELECT id, submission_id, path, size, reason, evicted_at FROM retention_evictions'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY id DESC LIMIT ?'
+    rows = [dict(row) for row in conn.execute(sql, params + [limit + 1]).fetchall()]
+    next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+    return rows[:limit], next_cursor
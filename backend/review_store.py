@@ -0,0 +1,125 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from serialization import dumps, loads
+
+# Per-submission review state: anomaly thresholds and analyst feedback on anomalies.
+# Stored in SQLite so it survives restarts and every uvicorn worker reads the same
+# state. Reads go through a small per-process cache; writes invalidate the local
+# entry, and entries written by other workers are picked up within CACHE_TTL seconds.
+
+DEFAULT_THRESHOLDS = {"anomaly": "auto", "flagged": 15}
+CACHE_TTL = float(os.environ.get("REVIEW_CACHE_TTL", 5))
+CACHE_SIZE = 1024
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS submission_thresholds (
+        submission_id TEXT PRIMARY KEY,
+        thresholds TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS anomaly_feedback (
+        submission_id TEXT NOT NULL,
+        anomaly_id INTEGER NOT NULL,
+        feedback TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (submission_id, anomaly_id)
+    )
+    ''',
+]
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time"""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[Any, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+_cache = TTLCache(CACHE_TTL, CACHE_SIZE)
+
+
+def init_review_store(conn) -> None:
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+
+def get_thresholds(conn, submission_id: str) -> Dict[str, Any]:
+    key = ('thresholds', submission_id)
+    thresholds = _cache.get(key)
+    if thresholds is None:
+        row = conn.execute('SELECT thresholds FROM submission_thresholds WHERE submission_id = ?',
+                           (submission_id,)).fetchone()
+        thresholds = loads(row['thresholds']) if row else DEFAULT_THRESHOLDS
+        _cache.set(key, thresholds)
+    return dict(thresholds)
+
+
+def set_thresholds(conn, submission_id: str, thresholds: Dict[str, Any]) -> None:
+    with conn:
+        conn.execute('''
+            INSERT INTO submission_thresholds (submission_id, thresholds, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(submission_id) DO UPDATE SET
+                thresholds = excluded.thresholds,
+                updated_at = excluded.updated_at
+        ''', (submission_id, dumps(thresholds).decode()))
+    _cache.invalidate(('thresholds', submission_id))
+
+
+def submission_feedback(conn, submission_id: str) -> Dict[int, Dict[str, Any]]:
+    """All feedback for a submission keyed by anomaly id (one indexed range read)"""
+    key = ('feedback', submission_id)
+    feedback = _cache.get(key)
+    if feedback is None:
+        rows = conn.execute('SELECT anomaly_id, feedback FROM anomaly_feedback WHERE submission_id = ?',
+                            (submission_id,)).fetchall()
+        feedback = {row['anomaly_id']: loads(row['feedback']) for row in rows}
+        _cache.set(key, feedback)
+    return feedback
+
+
+def get_feedback(conn, submission_id: str, anomaly_id: int) -> Dict[str, Any]:
+    return dict(submission_feedback(conn, submission_id).get(anomaly_id, {}))
+
+
+def set_feedback(conn, submission_id: str, anomaly_id: int, feedback: Dict[str, Any]) -> None:
+    with conn:
+        conn.execute('''
+            INSERT INTO anomaly_feedback (submission_id, anomaly_id, feedback, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(submission_id, anomaly_id) DO UPDATE SET
+                feedback = excluded.feedback,
+                updated_at = excluded.updated_at
+        ''', (submission_id, anomaly_id, dumps(feedback).decode()))
+    _cache.invalidate(('feedback', submission_id))
@@ -0,0 +1,77 @@
+import sys
+import json
+import math
+from datetime import datetime, date
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# JSON serialization for API payloads.
+# DataFrames are converted to JSON-safe records in bulk (NaN -> None, numpy scalars
+# -> Python types) and responses are encoded with orjson when it is installed.
+# numpy and pandas are not imported here: payloads can only hold their values once
+# something else has imported them, so the API starts without loading either.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def frame_to_records(df: 'pd.DataFrame') -> List[Dict[str, Any]]:
+    """Convert a DataFrame to records with native Python types and NaN as None"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def series_to_list(series: 'pd.Series') -> List[Any]:
+    """Convert a Series to a list with native Python types and NaN as None"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def to_jsonable(obj: Any) -> Any:
+    """Recursively replace numpy/pandas values and non-finite floats with JSON-safe values"""
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, (datetime, date)):
+        # Includes pd.Timestamp
+        return obj.isoformat()
+    np = sys.modules.get('numpy')
+    if np is not None:
+        if isinstance(obj, np.generic):
+            return to_jsonable(obj.item())
+        if isinstance(obj, np.ndarray):
+            return to_jsonable(obj.tolist())
+    pd = sys.modules.get('pandas')
+    if pd is not None:
+        if isinstance(obj, pd.DataFrame):
+            return to_jsonable(frame_to_records(obj))
+        if isinstance(obj, pd.Series):
+            return to_jsonable(series_to_list(obj))
+        if obj is pd.NA or obj is pd.NaT:
+            return None
+    return obj
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode a payload to JSON bytes (orjson maps NaN to null and handles numpy natively)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # pandas values orjson does not know about
+            return orjson.dumps(to_jsonable(obj), option=_ORJSON_OPTIONS)
+    return json.dumps(to_jsonable(obj), separators=(',', ':'), allow_nan=False).encode('utf-8')
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
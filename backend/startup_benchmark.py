@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Cold-start benchmark for the API.
+# Each run starts a fresh interpreter and measures the time to import main.py, to run
+# the lifespan startup (database initialization) until /api/ready answers 200, and to
+# load the analysis services that are otherwise warmed in the background:
+#
+#   python startup_benchmark.py --runs 5 --top 15
+#
+# --top lists the slowest imports of the last run (python -X importtime).
+
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+import services
+with TestClient(main.app) as client:
+    ready = client.get('/api/ready').status_code
+    serving = time.perf_counter()
+    services.warm()
+    warmed = time.perf_counter()
+print(json.dumps({"import": imported - started, "ready": serving - started, "ready_status": ready,
+                  "warm": warmed - serving}))
+"""
+
+
+def run_once(env) -> dict:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], capture_output=True, text=True,
+                          env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "probe failed")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["importtime"] = proc.stderr
+    return result
+
+
+def slowest_imports(importtime: str, top: int):
+    """(cumulative microseconds, module) of the slowest imports made by the probe and by main.py itself"""
+    rows = []
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        # Two levels deep: further nested imports are included in their parent's time
+        if cumulative.strip().isdigit() and not name[1:].startswith("    "):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure API cold-start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    # Measure startup only: no background warm-up or retention/webhook loops
+    env = {**os.environ, "STARTUP_WARM": "0", "RETENTION_INTERVAL_SECONDS": "0", "WEBHOOK_POLL_SECONDS": "0"}
+    results = [run_once(env) for _ in range(args.runs)]
+    for key, label in (("import", "import main"), ("ready", "ready (import + startup)"), ("warm", "service warm-up")):
+        values = [r[key] for r in results]
+        print(f"{label:<26} median {statistics.median(values) * 1000:8.1f} ms   min {min(values) * 1000:8.1f} ms")
+    if results[-1]["ready_status"] != 200:
+        print(f"[WARNING] /api/ready answered {results[-1]['ready_status']}")
+    if args.top:
+        print(f"\nSlowest imports (cumulative, last run):")
+        for microseconds, name in slowest_imports(results[-1]["importtime"], args.top):
+            print(f"  {microseconds / 1000:8.1f} ms  {name}")
@@ -0,0 +1,240 @@
+import os
+import hmac
+import time
+import shutil
+import hashlib
+import secrets
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+from urllib.parse import quote
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+
+    class ClientError(Exception):
+        """Stand-in for botocore's ClientError; never raised without boto3"""
+
+# Storage for uploads and deliverables.
+# Objects are addressed by keys relative to the data directory ("uploads/12_x.csv",
+# "deliverables/tables/results_12.json"). The local backend stores them under
+# RAYFIELD_DATA_DIR. The S3 backend stores them in a bucket (any S3-compatible
+# endpoint, e.g. MinIO via S3_ENDPOINT_URL) and keeps RAYFIELD_DATA_DIR as a local
+# working copy, which the pipeline scripts read and write. Each working copy records
+# the ETag it was taken from (under ETAG_DIR) and is downloaded again once the object's
+# ETag changes. mock_s3_server.py is a local stand-in for exercising the S3 backend.
+
+DATA_DIR = os.path.abspath(os.environ.get("RAYFIELD_DATA_DIR", os.path.dirname(os.path.abspath(__file__))))
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "local")
+SIGNED_URL_TTL = int(os.environ.get("SIGNED_URL_TTL", 900))
+CHUNK_SIZE = 1 << 20
+ETAG_DIR = ".s3-etags"
+# Must be shared by all API workers for signed local URLs to validate everywhere.
+# Without it each process signs with its own random key (see warn_unsigned_key).
+SIGNING_KEY_CONFIGURED = bool(os.environ.get("STORAGE_SIGNING_KEY"))
+SIGNING_KEY = os.environ.get("STORAGE_SIGNING_KEY") or secrets.token_hex(32)
+
+
+def storage_key(path: str) -> str:
+    """Key of a file inside the data directory"""
+    relative = os.path.relpath(os.path.abspath(path), DATA_DIR)
+    if relative.startswith(os.pardir):
+        raise ValueError(f"{path} is outside the data directory {DATA_DIR}")
+    return relative.replace(os.sep, "/")
+
+
+def sign(key: str, expires: int) -> str:
+    return hmac.new(SIGNING_KEY.encode(), f"{key}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def verify_signature(key: str, expires: int, signature: str) -> bool:
+    return expires >= time.time() and hmac.compare_digest(sign(key, expires), signature)
+
+
+def warn_unsigned_key() -> None:
+    """Log at API startup when signed URLs will not survive restarts or validate across workers"""
+    if not SIGNING_KEY_CONFIGURED:
+        print("[WARNING] STORAGE_SIGNING_KEY is not set: signed download URLs use a per-process key "
+              "and fail on other workers and after a restart")
+
+
+class LocalStorage:
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def local_path(self, key: str) -> str:
+        """Local file for tools that need a path (pandas, matplotlib, FileResponse)"""
+        return self.path(key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.path(key))
+
+    def open_read(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+    @contextmanager
+    def open_write(self, key: str):
+        """Writable binary file; the object appears atomically when the block exits"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                yield f
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def put_file(self, local_path: str, key: str) -> None:
+        if os.path.abspath(local_path) == self.path(key):
+            return
+        with open(local_path, "rb") as src, self.open_write(key) as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+    def read_bytes(self, key: str) -> bytes:
+        with self.open_read(key) as f:
+            return f.read()
+
+    def write_bytes(self, key: str, data: bytes) -> None:
+        with self.open_write(key) as f:
+            f.write(data)
+
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        with self.open_read(key) as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def download_url(self, key: str, ttl: int = SIGNED_URL_TTL) -> str:
+        """Time-limited URL served by /api/storage/{key} without a bearer token"""
+        expires = int(time.time()) + ttl
+        return f"/api/storage/{quote(key)}?expires={expires}&signature={sign(key, expires)}"
+
+
+class S3Storage:
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None, cache_dir: str = DATA_DIR):
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.cache = LocalStorage(cache_dir)
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _etag_path(self, key: str) -> str:
+        return self.cache.path(f"{ETAG_DIR}/{key}")
+
+    def _cached_etag(self, key: str) -> Optional[str]:
+        try:
+            with open(self._etag_path(key)) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _remember_etag(self, key: str, etag: str) -> None:
+        """Record which version of the object the working copy holds"""
+        self.cache.write_bytes(f"{ETAG_DIR}/{key}", etag.encode())
+
+    def local_path(self, key: str) -> str:
+        """Local working copy of an object, downloaded again when the object has changed"""
+        path = self.cache.path(key)
+        etag = self.client.head_object(Bucket=self.bucket, Key=self._key(key))["ETag"]
+        if os.path.isfile(path) and self._cached_etag(key) == etag:
+            return path
+        response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        with self.cache.open_write(key) as f:
+            for chunk in response["Body"].iter_chunks(CHUNK_SIZE):
+                f.write(chunk)
+        self._remember_etag(key, response["ETag"])
+        return path
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError:
+            return False
+
+    def size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=self._key(key))["ContentLength"]
+
+    def open_read(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+
+    @contextmanager
+    def open_write(self, key: str):
+        """Writable binary file, spooled to disk past 8 MB and uploaded when the block exits"""
+        with tempfile.SpooledTemporaryFile(max_size=8 * CHUNK_SIZE) as f:
+            yield f
+            f.seek(0)
+            self.client.upload_fileobj(f, self.bucket, self._key(key))
+
+    def put_file(self, local_path: str, key: str) -> None:
+        self.client.upload_file(local_path, self.bucket, self._key(key))
+        if os.path.abspath(local_path) == self.cache.path(key):
+            # The uploaded file is the working copy; no need to download it again
+            self._remember_etag(key, self.client.head_object(Bucket=self.bucket, Key=self._key(key))["ETag"])
+
+    def read_bytes(self, key: str) -> bytes:
+        return self.open_read(key).read()
+
+    def write_bytes(self, key: str, data: bytes) -> None:
+        """Upload an object and keep the bytes as its working copy"""
+        self.cache.write_bytes(key, data)
+        response = self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+        self._remember_etag(key, response["ETag"])
+
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        return self.open_read(key).iter_chunks(chunk_size)
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        self.cache.delete(key)
+        self.cache.delete(f"{ETAG_DIR}/{key}")
+
+    def download_url(self, key: str, ttl: int = SIGNED_URL_TTL) -> str:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": self._key(key)}, ExpiresIn=ttl
+        )
+
+
+_storage = None
+
+
+def get_storage():
+    """Storage backend selected by STORAGE_BACKEND (created on first use)"""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "s3":
+            _storage = S3Storage(
+                bucket=os.environ["S3_BUCKET"],
+                prefix=os.environ.get("S3_PREFIX", ""),
+                endpoint_url=os.environ.get("S3_ENDPOINT_URL")
+            )
+        else:
+            _storage = LocalStorage(DATA_DIR)
+    return _storage
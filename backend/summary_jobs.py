@@ -0,0 +1,125 @@
+import os
+import time
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from db import connection
+
+# Background GPT summary generation.
+# Summaries are generated once a submission's pipeline completes, or when its results
+# are first viewed without one, on a small thread pool off the request path. Jobs are
+# single-flight per submission across processes: a job is claimed by upserting its row
+# in the summary_jobs table, and while one is pending, further requests only report its
+# status. A failed job is not retried for SUMMARY_RETRY_SECONDS so a dashboard polling a
+# broken submission does not fire an LLM call on every poll. Finished jobs are deleted
+# SUMMARY_JOB_TTL_SECONDS after their last status change; the persisted summary file
+# remains the source of truth for a ready summary.
+
+WORKERS = int(os.environ.get("SUMMARY_JOB_WORKERS", 2))
+RETRY_SECONDS = float(os.environ.get("SUMMARY_RETRY_SECONDS", 60))
+JOB_TTL_SECONDS = float(os.environ.get("SUMMARY_JOB_TTL_SECONDS", 3600))
+# Pending jobs claimed by a process that died mid-job may be reclaimed after this long
+CLAIM_TIMEOUT_SECONDS = 600
+
+# Job outcomes: a job returns one of these after persisting (or declining to persist) a summary
+READY = "ready"
+FALLBACK = "fallback"
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS summary_jobs (
+        submission_id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        error TEXT,
+        claim TEXT,
+        changed_at REAL NOT NULL,
+        finished_at REAL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_summary_jobs_changed ON summary_jobs (status, changed_at)',
+]
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='summary-job')
+
+
+def init_summary_jobs(conn) -> None:
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+
+def _job(submission_id):
+    with connection() as conn:
+        return conn.execute(
+            'SELECT status, claim, changed_at FROM summary_jobs WHERE submission_id = ?', (str(submission_id),)
+        ).fetchone()
+
+
+def status(submission_id) -> Optional[str]:
+    """pending, ready, fallback or failed for submissions with a recorded job, else None"""
+    job = _job(submission_id)
+    return job["status"] if job else None
+
+
+def changed_at(submission_id) -> Optional[float]:
+    """Wall-clock time of the last status change of a submission's job, else None"""
+    job = _job(submission_id)
+    return job["changed_at"] if job else None
+
+
+def prune(conn, now: float) -> int:
+    """Delete finished jobs whose last status change is older than JOB_TTL_SECONDS"""
+    cursor = conn.execute(
+        "DELETE FROM summary_jobs WHERE status != 'pending' AND changed_at < ?", (now - JOB_TTL_SECONDS,)
+    )
+    return cursor.rowcount
+
+
+def _run(submission_id: str, claim: str, job: Callable[[], str]) -> None:
+    try:
+        outcome = job()
+        error = None
+    except Exception as e:
+        print(f"[WARNING] Summary generation failed for submission {submission_id}: {type(e).__name__}: {e}")
+        outcome, error = "failed", str(e)
+    now = time.time()
+    # Changes are at least a second apart: Last-Modified has one-second resolution
+    with connection() as conn:
+        conn.execute(
+            '''
+            UPDATE summary_jobs SET status = ?, error = ?, claim = NULL, finished_at = ?,
+                changed_at = MAX(?, changed_at + 1)
+            WHERE submission_id = ? AND claim = ?
+            ''',
+            (outcome, error, now, now, submission_id, claim)
+        )
+    print(f"[INFO] Summary job for submission {submission_id} finished: {outcome}")
+
+
+def schedule(submission_id, job: Callable[[], str], force: bool = False) -> str:
+    """Queue job for a submission unless one is in flight or recently finished; returns its status"""
+    submission_id = str(submission_id)
+    claim = secrets.token_hex(8)
+    now = time.time()
+    with connection() as conn:
+        prune(conn, now)
+        # Claim in one statement so concurrent workers and processes cannot both start the job
+        conn.execute(
+            '''
+            INSERT INTO summary_jobs (submission_id, status, claim, changed_at) VALUES (?, 'pending', ?, ?)
+            ON CONFLICT (submission_id) DO UPDATE SET
+                status = 'pending', error = NULL, claim = excluded.claim, finished_at = NULL,
+                changed_at = MAX(excluded.changed_at, summary_jobs.changed_at + 1)
+            WHERE (summary_jobs.status = 'pending' AND summary_jobs.changed_at < ?)
+               OR (summary_jobs.status != 'pending' AND (? OR (summary_jobs.status != ? AND summary_jobs.finished_at < ?)))
+            ''',
+            (submission_id, claim, now, now - CLAIM_TIMEOUT_SECONDS, int(force), READY, now - RETRY_SECONDS)
+        )
+        current = conn.execute(
+            'SELECT status, claim FROM summary_jobs WHERE submission_id = ?', (submission_id,)
+        ).fetchone()
+    if current["claim"] != claim:
+        return current["status"]
+    _executor.submit(_run, submission_id, claim, job)
+    return "pending"
@@ -0,0 +1,225 @@
+import os
+import time
+import random
+import secrets
+import mimetypes
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional
+
+# Outbox for report notifications (the Zapier webhook).
+# The pipeline only records a delivery here, so a slow or unreachable endpoint never
+# holds up an upload. The API's background worker claims due deliveries, posts every
+# pending report for the same URL in one multipart request (up to WEBHOOK_BATCH_SIZE
+# files), and retries failures with jittered exponential backoff until
+# WEBHOOK_MAX_ATTEMPTS. Point WEBHOOK_URL at mock_webhook_server.py to test delivery.
+
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL", "https://zapier.com/editor/308521987/draft/308521987/setup")
+TIMEOUT_SECONDS = float(os.environ.get("WEBHOOK_TIMEOUT", 10))
+POLL_SECONDS = float(os.environ.get("WEBHOOK_POLL_SECONDS", 5))
+BATCH_SIZE = int(os.environ.get("WEBHOOK_BATCH_SIZE", 10))
+MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", 8))
+BACKOFF_BASE = float(os.environ.get("WEBHOOK_BACKOFF_BASE", 30))
+BACKOFF_MAX = float(os.environ.get("WEBHOOK_BACKOFF_MAX", 3600))
+# Deliveries claimed by a worker that died mid-request are released after this long
+CLAIM_TIMEOUT_SECONDS = 600
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STATUSES = ('pending', 'delivering', 'delivered', 'failed')
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS webhook_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        submission_id INTEGER,
+        url TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        claim TEXT,
+        claimed_at REAL,
+        last_status_code INTEGER,
+        last_error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        delivered_at TIMESTAMP
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_webhook_outbox_due ON webhook_outbox (status, next_attempt_at)',
+    'CREATE INDEX IF NOT EXISTS idx_webhook_outbox_submission ON webhook_outbox (submission_id, id)',
+]
+
+
+def init_webhook_outbox(conn) -> None:
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+
+def enqueue(conn, file_path: str, submission_id=None, url: str = WEBHOOK_URL) -> int:
+    """Record a report delivery; returns the outbox id"""
+    with conn:
+        cursor = conn.execute(
+            'INSERT INTO webhook_outbox (submission_id, url, file_path, next_attempt_at) VALUES (?, ?, ?, ?)',
+            (int(submission_id) if submission_id else None, url, os.path.abspath(file_path), time.time())
+        )
+    return cursor.lastrowid
+
+
+def backoff(attempts: int) -> float:
+    """Seconds before the next attempt: exponential, capped, with jitter"""
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+
+
+def _claim(conn, now: float) -> List[Dict[str, Any]]:
+    """Claim due deliveries for the oldest due URL (one batch)"""
+    claim = secrets.token_hex(8)
+    with conn:
+        conn.execute(
+            "UPDATE webhook_outbox SET status = 'pending', claim = NULL WHERE status = 'delivering' AND claimed_at < ?",
+            (now - CLAIM_TIMEOUT_SECONDS,)
+        )
+        row = conn.execute(
+            "SELECT url FROM webhook_outbox WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT 1",
+            (now,)
+        ).fetchone()
+        if row is None:
+            return []
+        conn.execute('''
+            UPDATE webhook_outbox SET status = 'delivering', claim = ?, claimed_at = ?
+            WHERE id IN (
+                SELECT id FROM webhook_outbox
+                WHERE status = 'pending' AND next_attempt_at <= ? AND url = ?
+                ORDER BY id LIMIT ?
+            )
+        ''', (claim, now, now, row['url'], BATCH_SIZE))
+    return [dict(r) for r in conn.execute('SELECT * FROM webhook_outbox WHERE claim = ? ORDER BY id', (claim,))]
+
+
+def _post(url: str, deliveries: List[Dict[str, Any]]):
+    """One multipart request carrying every report of the batch; returns (status_code, error)"""
+    import requests
+    with ExitStack() as stack:
+        files = [
+            ('file', (os.path.basename(d['file_path']), stack.enter_context(open(d['file_path'], 'rb')),
+                      mimetypes.guess_type(d['file_path'])[0] or 'application/octet-stream'))
+            for d in deliveries
+        ]
+        data = {'submission_ids': ','.join(str(d['submission_id']) for d in deliveries if d['submission_id'])}
+        try:
+            response = requests.post(url, files=files, data=data, timeout=TIMEOUT_SECONDS)
+        except requests.RequestException as e:
+            return None, f"{type(e).__name__}: {e}"
+    if 200 <= response.status_code < 300:
+        return response.status_code, None
+    return response.status_code, f"HTTP {response.status_code}: {response.text[:200]}"
+
+
+def _finish(conn, deliveries: List[Dict[str, Any]], status_code: Optional[int], error: Optional[str], now: float) -> None:
+    with conn:
+        for d in deliveries:
+            if error is None:
+                conn.execute('''
+                    UPDATE webhook_outbox SET status = 'delivered', attempts = attempts + 1, claim = NULL,
+                        last_status_code = ?, last_error = NULL, delivered_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (status_code, d['id']))
+                continue
+            attempts = d['attempts'] + 1
+            status = 'failed' if attempts >= MAX_ATTEMPTS else 'pending'
+            conn.execute('''
+                UPDATE webhook_outbox SET status = ?, attempts = ?, claim = NULL, next_attempt_at = ?,
+                    last_status_code = ?, last_error = ?
+                WHERE id = ?
+            ''', (status, attempts, now + backoff(attempts), status_code, error, d['id']))
+
+
+def deliver_due(conn, now: Optional[float] = None,
+                prepare: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, int]:
+    """Deliver every due batch; returns delivered/retrying/failed counts.
+
+    prepare(delivery) runs before each file is posted and may build it (reports built on
+    demand); if it raises, the delivery is retried with backoff.
+    """
+    counts = {'delivered': 0, 'retrying': 0, 'failed': 0}
+    # Imported on first delivery, not when the API starts
+    try:
+        import requests
+    except ImportError:
+        print("[WARNING] Webhook delivery needs the requests package")
+        return counts
+    now = time.time() if now is None else now
+    while True:
+        batch = _claim(conn, now)
+        if not batch:
+            return counts
+        if prepare:
+            prepared = []
+            for d in batch:
+                try:
+                    prepare(d)
+                    prepared.append(d)
+                except Exception as e:
+                    error = f"Could not prepare report: {type(e).__name__}: {e}"
+                    print(f"[WARNING] Webhook delivery {d['id']}: {error}")
+                    _finish(conn, [d], None, error, now)
+                    if d['attempts'] + 1 >= MAX_ATTEMPTS:
+                        counts['failed'] += 1
+                    else:
+                        counts['retrying'] += 1
+            batch = prepared
+        present = [d for d in batch if os.path.exists(d['file_path'])]
+        missing = [d for d in batch if d not in present]
+        if missing:
+            # Evicted or never written: nothing to retry
+            with conn:
+                conn.executemany(
+                    "UPDATE webhook_outbox SET status = 'failed', claim = NULL, last_error = 'Report file missing' WHERE id = ?",
+                    [(d['id'],) for d in missing]
+                )
+            counts['failed'] += len(missing)
+        if present:
+            status_code, error = _post(present[0]['url'], present)
+            _finish(conn, present, status_code, error, now)
+            if error is None:
+                counts['delivered'] += len(present)
+                print(f"[INFO] Delivered {len(present)} report(s) to webhook ({status_code})")
+            else:
+                gave_up = sum(1 for d in present if d['attempts'] + 1 >= MAX_ATTEMPTS)
+                counts['failed'] += gave_up
+                counts['retrying'] += len(present) - gave_up
+                print(f"[WARNING] Webhook delivery failed: {error}")
+
+
+def retry(conn, delivery_id: int) -> bool:
+    """Queue a failed delivery again now; returns False if it does not exist or is not failed"""
+    with conn:
+        cursor = conn.execute('''
+            UPDATE webhook_outbox SET status = 'pending', attempts = 0, next_attempt_at = ?
+            WHERE id = ? AND status = 'failed'
+        ''', (time.time(), delivery_id))
+    return cursor.rowcount > 0
+
+
+def list_deliveries(conn, status: Optional[str] = None, submission_id: Optional[int] = None,
+                    cursor: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Newest-first page of deliveries; returns (rows, next_cursor) with keyset pagination on id"""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    where = []
+    params = []
+    if status:
+        where.append('status = ?')
+        params.append(status)
+    if submission_id is not None:
+        where.append('submission_id = ?')
+        params.append(submission_id)
+    if cursor is not None:
+        where.append('id < ?')
+        params.append(cursor)
+    sql = '''SELECT id, submission_id, url, file_path, status, attempts, next_attempt_at, last_status_code,
+                    last_error, created_at, delivered_at FROM webhook_outbox'''
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY id DESC LIMIT ?'
+    rows = [dict(row) for row in conn.execute(sql, params + [limit + 1]).fetchall()]
+    next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+    return rows[:limit], next_cursor
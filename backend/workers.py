@@ -0,0 +1,32 @@
+import os
+import functools
+from typing import Any, Callable, Dict
+
+from anyio import to_thread, CapacityLimiter
+
+# Bounded worker threads for blocking work in async endpoints.
+# pandas parsing, file I/O, subprocesses and the synchronous OpenAI client run here
+# so the event loop stays free for health checks and auth calls. Each endpoint
+# group gets its own limit so one slow group cannot take every worker thread.
+
+WORKER_LIMITS = {
+    'results': int(os.environ.get('RESULTS_CONCURRENCY', 8)),
+    'reports': int(os.environ.get('REPORTS_CONCURRENCY', 4)),
+    'upload': int(os.environ.get('UPLOAD_CONCURRENCY', 2)),
+    'export': int(os.environ.get('EXPORT_CONCURRENCY', 4)),
+    'webhooks': 1,
+}
+
+_limiters: Dict[str, CapacityLimiter] = {}
+
+
+def get_limiter(name: str) -> CapacityLimiter:
+    """Capacity limiter for an endpoint group (created on first use, inside the event loop)"""
+    if name not in _limiters:
+        _limiters[name] = CapacityLimiter(WORKER_LIMITS[name])
+    return _limiters[name]
+
+
+async def run_blocking(name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking callable on a worker thread, bounded by the named limit"""
+    return await to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=get_limiter(name))
@@ -2,6 +2,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from sklearn.linear_model import LinearRegression
 import os
+from manifest import record_artifacts, require_artifact
 
 # Get submission ID from environment
 submission_id = os.environ.get('SUBMISSION_ID', None)
@@ -20,11 +21,8 @@ os.makedirs(TABLES, exist_ok=True)
 os.makedirs(PLOTS, exist_ok=True)
 os.makedirs(LOGS, exist_ok=True)
 
-# Use submission-specific file path
-flagged_file = TABLES + f'flagged_emissions_output{output_suffix}.csv'
-if not os.path.exists(flagged_file):
-    print(f"Warning: {flagged_file} not found, trying fallback...")
-    flagged_file = TABLES + 'flagged_emissions_output.csv'
+# Resolve this submission's flagged output through its manifest (no fallback to other runs' files)
+flagged_file = require_artifact(submission_id, 'flagged_output') if submission_id else TABLES + 'flagged_emissions_output.csv'
 
 df = pd.read_csv(flagged_file, encoding='latin1')
 df.columns = df.columns.str.strip()
@@ -95,4 +93,10 @@ plt.legend()
 plt.grid(True)
 plt.tight_layout()
 plt.savefig(PLOTS + f'yearly_anomaly_detection{output_suffix}.png')
-plt.close() 
\ No newline at end of file
+plt.close()
+
+record_artifacts(submission_id, {
+    'alerts': TABLES + f'alerts_today{output_suffix}.csv',
+    'anomaly_summary': LOGS + f'weekly_summary_anomalies{output_suffix}.txt',
+    'plot_yearly_anomalies': PLOTS + f'yearly_anomaly_detection{output_suffix}.png',
+})
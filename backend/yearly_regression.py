@@ -4,6 +4,7 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
 import matplotlib.pyplot as plt
 import os
+from manifest import record_artifacts, require_artifact
 
 # Get submission ID from environment
 submission_id = os.environ.get('SUBMISSION_ID', None)
@@ -21,11 +22,8 @@ PLOTS = 'deliverables/plots/'
 os.makedirs(TABLES, exist_ok=True)
 os.makedirs(PLOTS, exist_ok=True)
 
-# Use submission-specific file path
-flagged_file = TABLES + f'flagged_emissions_output{output_suffix}.csv'
-if not os.path.exists(flagged_file):
-    print(f"Warning: {flagged_file} not found, trying fallback...")
-    flagged_file = TABLES + 'flagged_emissions_output.csv'
+# Resolve this submission's flagged output through its manifest (no fallback to other runs' files)
+flagged_file = require_artifact(submission_id, 'flagged_output') if submission_id else TABLES + 'flagged_emissions_output.csv'
 
 df = pd.read_csv(flagged_file, encoding='latin1')
 df.columns = df.columns.str.strip()
@@ -77,6 +75,7 @@ plt.legend()
 plt.tight_layout()
 plt.savefig(PLOTS + f'yearly_forecast_vs_actual{output_suffix}.png')
 plt.close()
+record_artifacts(submission_id, {'plot_yearly_forecast': PLOTS + f'yearly_forecast_vs_actual{output_suffix}.png'})
 
 importance = model.coef_
 print("Model coefficient (importance):", importance) 
\ No newline at end of file
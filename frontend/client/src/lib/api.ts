@@ -30,6 +30,25 @@ export const apiClient = {
     }
   },
 
+  // List endpoints return one page at a time; the next page's cursor comes back in X-Next-Cursor
+  async requestPage<T>(endpoint: string, cursor?: string | null): Promise<{ items: T[]; nextCursor: string | null }> {
+    const separator = endpoint.includes('?') ? '&' : '?';
+    const url = `${this.baseURL}${endpoint}${cursor ? `${separator}cursor=${encodeURIComponent(cursor)}` : ''}`;
+
+    try {
+      const response = await fetch(url, { credentials: 'include' });
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      return { items: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') };
+    } catch (error) {
+      console.error('API request failed:', error);
+      throw error;
+    }
+  },
+
   // Auth endpoints
   auth: {
     login: (credentials: { email: string; password: string }) =>
@@ -10,6 +10,10 @@ import { Link } from "wouter";
 import { Download, FileText, Calendar, Filter, RefreshCw } from "lucide-react";
 import { apiClient } from "@/lib/api";
 
+// Each tab lists one report type, paged through /api/reports/list with X-Next-Cursor
+const REPORT_TYPES = ["tables", "logs", "plots"] as const;
+type ReportType = typeof REPORT_TYPES[number];
+
 interface ReportFile {
   name: string;
   type: string;
@@ -23,6 +27,8 @@ export const ExportReports = (): JSX.Element => {
   const [reports, setReports] = useState<ReportFile[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursors, setNextCursors] = useState<Partial<Record<ReportType, string | null>>>({});
+  const [loadingMore, setLoadingMore] = useState<ReportType | null>(null);
   // Add state for current CSV filename
   const [currentCsv, setCurrentCsv] = useState<string | null>(null);
 
@@ -37,8 +43,11 @@ export const ExportReports = (): JSX.Element => {
     setLoading(true);
     setError(null);
     try {
-      const res = await apiClient.request<ReportFile[]>("/api/reports/list");
-      setReports(res);
+      const pages = await Promise.all(
+        REPORT_TYPES.map(type => apiClient.requestPage<ReportFile>(`/api/reports/list?type=${type}`))
+      );
+      setReports(pages.flatMap(page => page.items));
+      setNextCursors(Object.fromEntries(REPORT_TYPES.map((type, i) => [type, pages[i].nextCursor])));
     } catch (err: any) {
       setError("Failed to fetch reports");
     } finally {
@@ -46,6 +55,29 @@ export const ExportReports = (): JSX.Element => {
     }
   };
 
+  const loadMore = async (type: ReportType) => {
+    const cursor = nextCursors[type];
+    if (!cursor) return;
+    setLoadingMore(type);
+    try {
+      const page = await apiClient.requestPage<ReportFile>(`/api/reports/list?type=${type}`, cursor);
+      setReports(prev => [...prev, ...page.items]);
+      setNextCursors(prev => ({ ...prev, [type]: page.nextCursor }));
+    } catch (err: any) {
+      setError("Failed to fetch reports");
+    } finally {
+      setLoadingMore(null);
+    }
+  };
+
+  const renderLoadMore = (type: ReportType) => nextCursors[type] ? (
+    <div className="text-center mt-4">
+      <Button variant="outline" onClick={() => loadMore(type)} disabled={loadingMore === type}>
+        {loadingMore === type ? "Loading..." : "Load more"}
+      </Button>
+    </div>
+  ) : null;
+
   // Group reports by type
   const grouped = {
     system: reports.filter(r => r.type === "tables" && r.name.includes("system")),
@@ -247,6 +279,7 @@ export const ExportReports = (): JSX.Element => {
                   </CardHeader>
                   <CardContent>
                     {renderReportTable(grouped.tables)}
+                    {renderLoadMore("tables")}
                   </CardContent>
                 </Card>
               </TabsContent>
@@ -263,6 +296,7 @@ export const ExportReports = (): JSX.Element => {
                   </CardHeader>
                   <CardContent>
                     {renderReportTable(grouped.logs)}
+                    {renderLoadMore("logs")}
                   </CardContent>
                 </Card>
               </TabsContent>
@@ -279,6 +313,7 @@ export const ExportReports = (): JSX.Element => {
                   </CardHeader>
                   <CardContent>
                     {renderReportTable(grouped.plots)}
+                    {renderLoadMore("plots")}
                   </CardContent>
                 </Card>
               </TabsContent>
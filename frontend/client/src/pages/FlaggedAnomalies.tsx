@@ -31,6 +31,8 @@ interface RealAnomaly {
   [key: string]: any;
 }
 
+const PAGE_SIZE = 60;
+
 export const FlaggedAnomalies = (): JSX.Element => {
   const [anomalies, setAnomalies] = useState<RealAnomaly[]>([]);
   const [loading, setLoading] = useState(true);
@@ -47,11 +49,16 @@ export const FlaggedAnomalies = (): JSX.Element => {
   const [anomalyWarning, setAnomalyWarning] = useState<string>("");
   const [feedbacks, setFeedbacks] = useState<Record<number, AnomalyFeedback>>({});
   const [location] = useLocation();
+  // Anomalies are paged from /api/anomalies; severity and year filters are applied by the API
+  const [activeSubmissionId, setActiveSubmissionId] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [counts, setCounts] = useState<Record<string, number>>({});
 
-  // Compute counts for summary cards
-  const highCount = anomalies.filter(a => a.severity === "High").length;
-  const mediumCount = anomalies.filter(a => a.severity === "Medium").length;
-  const lowCount = anomalies.filter(a => a.severity === "Low").length;
+  // Counts for summary cards cover every anomaly of the submission, not just the loaded pages
+  const highCount = counts.High ?? 0;
+  const mediumCount = counts.Medium ?? 0;
+  const lowCount = counts.Low ?? 0;
 
   useEffect(() => {
     fetchAnomalies();
@@ -81,7 +88,7 @@ export const FlaggedAnomalies = (): JSX.Element => {
   useEffect(() => {
     let id = submissionId;
     if (!id) {
-      apiClient.request('/api/submissions/history').then((res) => {
+      apiClient.request('/api/submissions/history?limit=1').then((res) => {
         const subs = res as { id: number }[];
         if (Array.isArray(subs) && subs.length > 0) {
           id = String(subs[0].id);
@@ -105,7 +112,7 @@ export const FlaggedAnomalies = (): JSX.Element => {
     setError(null);
     let id = submissionId;
     if (!id) {
-      const res = await apiClient.request('/api/submissions/history');
+      const res = await apiClient.request('/api/submissions/history?limit=1');
       const subs = res as { id: number }[];
       if (Array.isArray(subs) && subs.length > 0) {
         id = String(subs[0].id);
@@ -113,12 +120,15 @@ export const FlaggedAnomalies = (): JSX.Element => {
     }
     try {
       if (!id) throw new Error('No submission_id found');
-      const res = await apiClient.request<any>(
-        `/api/submissions/${id}/results`
-      );
-      setAnomalies(res.anomalies_data || []);
+      const [res, severityCounts] = await Promise.all([
+        apiClient.request<any>(`/api/submissions/${id}/results`),
+        apiClient.request<Record<string, number>>(`/api/anomalies/counts?submission_id=${id}`),
+      ]);
       if (res.metrics) setMetrics(res.metrics);
       if (res.anomaly_warning) setAnomalyWarning(res.anomaly_warning);
+      setCounts(severityCounts);
+      await loadAnomalyPage(id);
+      setActiveSubmissionId(id);
     } catch (err) {
       setError('Failed to fetch anomalies');
     } finally {
@@ -126,6 +136,42 @@ export const FlaggedAnomalies = (): JSX.Element => {
     }
   };
 
+  const anomalyQuery = (id: string) => {
+    const params = new URLSearchParams({ submission_id: id, limit: String(PAGE_SIZE) });
+    if (filter !== "all") params.set("severity", filter);
+    if (/^\d{4}$/.test(date)) {
+      params.set("year_from", date);
+      params.set("year_to", date);
+    }
+    return `/api/anomalies?${params}`;
+  };
+
+  // First page of anomalies (cursor null) or the next page appended to the loaded ones
+  const loadAnomalyPage = async (id: string, cursor: string | null = null) => {
+    const page = await apiClient.requestPage<RealAnomaly>(anomalyQuery(id), cursor);
+    setAnomalies(prev => (cursor ? [...prev, ...page.items] : page.items));
+    setNextCursor(page.nextCursor);
+  };
+
+  const loadMore = async () => {
+    if (!activeSubmissionId || !nextCursor) return;
+    setLoadingMore(true);
+    try {
+      await loadAnomalyPage(activeSubmissionId, nextCursor);
+    } catch (err) {
+      setError('Failed to fetch anomalies');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Reload the first page when the severity or year filter changes
+  useEffect(() => {
+    if (!activeSubmissionId) return;
+    if (date && !/^\d{4}$/.test(date)) return;
+    loadAnomalyPage(activeSubmissionId).catch(() => setError('Failed to fetch anomalies'));
+  }, [filter, date]);
+
   // Handle threshold changes
   const handleThresholdChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     const { name, value } = e.target;
@@ -134,7 +180,7 @@ export const FlaggedAnomalies = (): JSX.Element => {
   const saveThresholds = async () => {
     let id = submissionId;
     if (!id) {
-      const res = await apiClient.request('/api/submissions/history');
+      const res = await apiClient.request('/api/submissions/history?limit=1');
       const subs = res as { id: number }[];
       if (Array.isArray(subs) && subs.length > 0) {
         id = String(subs[0].id);
@@ -153,7 +199,7 @@ export const FlaggedAnomalies = (): JSX.Element => {
   const submitFeedback = async (anomalyId: number, status: string, notes?: string) => {
     let id = submissionId;
     if (!id) {
-      const res = await apiClient.request('/api/submissions/history');
+      const res = await apiClient.request('/api/submissions/history?limit=1');
       const subs = res as { id: number }[];
       if (Array.isArray(subs) && subs.length > 0) {
         id = String(subs[0].id);
@@ -172,7 +218,7 @@ export const FlaggedAnomalies = (): JSX.Element => {
   useEffect(() => {
     let id = submissionId;
     if (!id) {
-      apiClient.request('/api/submissions/history').then((res) => {
+      apiClient.request('/api/submissions/history?limit=1').then((res) => {
         const subs = res as { id: number }[];
         if (Array.isArray(subs) && subs.length > 0) {
           id = String(subs[0].id);
@@ -225,11 +271,9 @@ export const FlaggedAnomalies = (): JSX.Element => {
     }
   };
 
-  // Filtering logic for severity, search, and date
+  // Facility search applies to the loaded pages; severity and year are filtered by the API
   const filteredAnomalies = anomalies.filter(anomaly => {
-    if (filter !== "all" && anomaly.severity !== filter.charAt(0).toUpperCase() + filter.slice(1)) return false;
     if (search && !anomaly.facility?.toLowerCase().includes(search.toLowerCase())) return false;
-    if (date && String(anomaly.year) !== date) return false;
     return true;
   });
 
@@ -452,6 +496,13 @@ export const FlaggedAnomalies = (): JSX.Element => {
                 </Card>
               ))}
             </div>
+            {nextCursor && (
+              <div className="text-center mt-6">
+                <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+                  {loadingMore ? "Loading..." : "Load more anomalies"}
+                </Button>
+              </div>
+            )}
           </div>
         </div>
         {/* Details Modal/Section */}
@@ -468,11 +519,10 @@ export const FlaggedAnomalies = (): JSX.Element => {
               <div className="mb-2"><b>Facility:</b> {selectedAnomaly.facility ?? "N/A"}</div>
               <div className="mb-2"><b>Year:</b> {selectedAnomaly.year ?? "N/A"}</div>
               <div className="mb-2"><b>Actual Emission Value:</b> {selectedAnomaly.emission_value?.toFixed(2) ?? "N/A"} units</div>
-              <div className="mb-2"><b>Predicted CO2:</b> {selectedAnomaly["Predicted CO2"]?.toFixed(2) ?? "N/A"}</div>
-              <div className="mb-2"><b>Deviation (%):</b> {selectedAnomaly["Deviation (%)"]?.toFixed(2) ?? "N/A"}</div>
-              <div className="mb-2"><b>7-day Rolling Avg:</b> {selectedAnomaly.rolling_7d?.toFixed(2) ?? "N/A"}</div>
-              <div className="mb-2"><b>Percent Change:</b> {selectedAnomaly.pct_change?.toFixed(2) ?? "N/A"}</div>
-              <div className="mb-2"><b>Flagged by ±15% Rule:</b> {selectedAnomaly.Flagged ?? "N/A"}</div>
+              <div className="mb-2"><b>Predicted CO2:</b> {selectedAnomaly.predicted?.toFixed(2) ?? "N/A"}</div>
+              <div className="mb-2"><b>Deviation (%):</b> {selectedAnomaly.deviation?.toFixed(2) ?? "N/A"}</div>
+              <div className="mb-2"><b>Anomaly Score:</b> {selectedAnomaly.score?.toFixed(3) ?? "N/A"}</div>
+              <div className="mb-2"><b>Explanation:</b> {selectedAnomaly.description ?? "N/A"}</div>
               <div className="mb-2"><b>Severity:</b> {selectedAnomaly.severity ?? "N/A"}</div>
               <div className="mb-2"><b>Detected:</b> {selectedAnomaly.timestamp ? new Date(selectedAnomaly.timestamp).toLocaleString() : "N/A"}</div>
             </div>
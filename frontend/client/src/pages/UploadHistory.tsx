@@ -19,6 +19,8 @@ type SortOrder = "asc" | "desc";
 export default function UploadHistory() {
   const [submissions, setSubmissions] = useState<Submission[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [sortKey, setSortKey] = useState<SortKey>("created_at");
   const [sortOrder, setSortOrder] = useState<SortOrder>("desc");
@@ -31,8 +33,9 @@ export default function UploadHistory() {
     setLoading(true);
     setError(null);
     try {
-      const res = await apiClient.request<Submission[]>("/api/submissions/history");
-      setSubmissions(res);
+      const page = await apiClient.requestPage<Submission>("/api/submissions/history");
+      setSubmissions(page.items);
+      setNextCursor(page.nextCursor);
     } catch (err) {
       setError("Failed to fetch upload history");
     } finally {
@@ -40,6 +43,21 @@ export default function UploadHistory() {
     }
   };
 
+  // Older entries are fetched a page at a time
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await apiClient.requestPage<Submission>("/api/submissions/history", nextCursor);
+      setSubmissions(prev => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      setError("Failed to fetch upload history");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const sorted = [...submissions].sort((a, b) => {
     let cmp = 0;
     if (sortKey === "created_at") {
@@ -127,6 +145,13 @@ export default function UploadHistory() {
                     ))}
                   </tbody>
                 </table>
+                {nextCursor && (
+                  <div className="text-center mt-4">
+                    <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+                      {loadingMore ? "Loading..." : "Load more"}
+                    </Button>
+                  </div>
+                )}
               </div>
             )}
           </CardContent>
@@ -17,6 +17,8 @@ type SortOrder = "asc" | "desc";
 export default function UploadLog() {
   const [logs, setLogs] = useState<UploadLogEntry[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [sortKey, setSortKey] = useState<SortKey>("created_at");
   const [sortOrder, setSortOrder] = useState<SortOrder>("desc");
@@ -29,8 +31,9 @@ export default function UploadLog() {
     setLoading(true);
     setError(null);
     try {
-      const res = await apiClient.request<UploadLogEntry[]>("/api/upload/logs", { credentials: 'include' });
-      setLogs(res);
+      const page = await apiClient.requestPage<UploadLogEntry>("/api/upload/logs");
+      setLogs(page.items);
+      setNextCursor(page.nextCursor);
     } catch (err) {
       setError("Failed to fetch upload logs");
     } finally {
@@ -38,6 +41,21 @@ export default function UploadLog() {
     }
   };
 
+  // Older entries are fetched a page at a time
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await apiClient.requestPage<UploadLogEntry>("/api/upload/logs", nextCursor);
+      setLogs(prev => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      setError("Failed to fetch upload logs");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const sorted = [...logs].sort((a, b) => {
     let cmp = 0;
     if (sortKey === "created_at") {
@@ -116,6 +134,13 @@ export default function UploadLog() {
                     ))}
                   </tbody>
                 </table>
+                {nextCursor && (
+                  <div className="text-center mt-4">
+                    <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+                      {loadingMore ? "Loading..." : "Load more"}
+                    </Button>
+                  </div>
+                )}
               </div>
             )}
           </CardContent>